@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+# Алиас реплики, с которой сейчас можно читать (None - чтения идут на default)
+_read_alias: ContextVar[str | None] = ContextVar("db_read_alias", default=None)
+# Отметка о записях текущего запроса к API (см. PrimaryPinMiddleware)
+_writes: ContextVar[dict | None] = ContextVar("db_writes", default=None)
+
+PIN_KEY_PREFIX = "db:primary-pin"
+
+
+def replica_alias() -> str | None:
+    """
+    Алиас реплики для чтения (DB_READ_REPLICA) или None, если реплики нет.
+    """
+    return settings.DB_READ_REPLICA or None
+
+
+@contextmanager
+def read_from_replica(enabled: bool = True):
+    """
+    Чтения внутри блока (без явного using) идут на реплику, записи - как всегда на default.
+    """
+    token = _read_alias.set(replica_alias() if enabled else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def pin_to_primary(user_id) -> None:
+    """
+    Пользователь только что писал: DB_REPLICA_LAG секунд его чтения идут на default,
+    пока реплика не догонит. Отметка в общем кэше, поэтому её видят все воркеры.
+    """
+    cache.set(f"{PIN_KEY_PREFIX}:{user_id}", 1, timeout=settings.DB_REPLICA_LAG)
+
+
+def is_pinned_to_primary(user_id) -> bool:
+    return cache.get(f"{PIN_KEY_PREFIX}:{user_id}") is not None
+
+
+class ReplicaRouter:
+    """
+    Маршрутизация чтений на реплику (DATABASE_ROUTERS).
+
+    Сам по себе router ничего на реплику не отправляет: чтения уходят туда только
+    внутри read_from_replica() - его включают ReplicaReadMixin для безопасных
+    запросов к API и задача напоминаний (через using). Записи всегда идут на default
+    и отмечаются, чтобы PrimaryPinMiddleware закрепил автора записи за default.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        writes = _writes.get()
+        if writes is not None:
+            writes["happened"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика - копия default: объекты с неё можно связывать с объектами default
+        databases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class PrimaryPinMiddleware:
+    """
+    После запроса к API, который что-то записал, закрепляет пользователя за default
+    (pin_to_primary): следующий список привычек покажет его же правку, даже если
+    реплика отстаёт. Без реплики ничего не делает.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if replica_alias() is None:
+            return self.get_response(request)
+
+        writes = {"happened": False}
+        token = _writes.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            _writes.reset(token)
+
+        # DRF кладёт пользователя из JWT и в исходный HttpRequest
+        user = getattr(request, "user", None)
+        if writes["happened"] and user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    Безопасные запросы (GET, HEAD, OPTIONS) представления читают с реплики.
+
+    Пользователь, который недавно писал (is_pinned_to_primary), читает с default.
+    Представление может добавить своё условие в use_replica().
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with read_from_replica(request.method in SAFE_METHODS):
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Пользователь из JWT известен только после аутентификации
+        if _read_alias.get() is not None and not self.use_replica(request):
+            _read_alias.set(None)
+
+    def use_replica(self, request) -> bool:
+        return not (request.user.is_authenticated and is_pinned_to_primary(request.user.pk))
@@ -39,6 +39,12 @@ def build_logging_config(base_dir: Path) -> dict:
                 "level": "INFO",
                 "propagate": False,
             },
+            # бюджеты SQL-запросов (config.query_budget) - предупреждения при разработке
+            "config": {
+                "handlers": ["console"],
+                "level": "INFO",
+                "propagate": False,
+            },
             # django можно оставить только в консоль
             "django": {
                 "handlers": ["console"],
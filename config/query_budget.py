@@ -0,0 +1,113 @@
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("config.query_budget")
+
+# Списки параметров IN (...) и VALUES (...), (...) разной длины - один и тот же запрос
+PARAMS_LIST_RE = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)(?:\s*,\s*\(\s*%s(?:\s*,\s*%s)*\s*\))*")
+SAVEPOINT_RE = re.compile(r"^\s*(?:SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b", re.IGNORECASE)
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Запрос к API превысил бюджет SQL-запросов или повторил один запрос слишком много раз.
+    """
+
+
+class QueryCounter:
+    """
+    execute_wrapper, который считает SQL-запросы и их "формы" (текст без параметров).
+
+    Одна форма, выполненная много раз за запрос к API, - почти всегда N+1:
+    цикл по строкам, в котором каждая строка догружает связанный объект.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        if not SAVEPOINT_RE.match(sql):
+            self.shapes[PARAMS_LIST_RE.sub("(...)", sql)] += 1
+        return execute(sql, params, many, context)
+
+    def duplicates(self, limit: int) -> list[tuple[str, int]]:
+        return [(shape, times) for shape, times in self.shapes.most_common() if times > limit]
+
+
+def view_query_budget(view_func, request) -> int | None:
+    """
+    Бюджет запросов представления для этого запроса или None, если он не объявлен.
+
+    Представления DRF объявляют query_budgets = {"list": 3, "create": 6, ...}: ключ -
+    действие ViewSet или HTTP-метод в нижнем регистре для APIView. Для сторонних
+    представлений (например, simplejwt) бюджеты задаются в settings.QUERY_BUDGETS
+    по имени маршрута: {"token_obtain_pair": {"post": 2}}.
+    """
+    method = request.method.lower()
+    budgets = getattr(getattr(view_func, "cls", None), "query_budgets", None)
+    if budgets is None and request.resolver_match is not None:
+        budgets = settings.QUERY_BUDGETS.get(request.resolver_match.url_name)
+    if budgets is None:
+        return None
+    if isinstance(budgets, int):
+        return budgets
+    action = getattr(view_func, "actions", {}).get(method)
+    if action in budgets:
+        return budgets[action]
+    return budgets.get(method)
+
+
+class QueryBudgetMiddleware:
+    """
+    Следит за числом SQL-запросов на один запрос к API (для разработки и тестов).
+
+    QUERY_BUDGET_MODE:
+    - "off" - ничего не делает (по умолчанию без DEBUG)
+    - "log" - предупреждение в лог при превышении бюджета представления (см. view_query_budget)
+      или при форме запроса, повторённой больше QUERY_BUDGET_MAX_DUPLICATES раз
+    - "raise" - то же, но QueryBudgetExceeded: тест упадёт на регрессии
+    В режимах log и raise ответ получает заголовок X-Query-Count.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = settings.QUERY_BUDGET_MODE
+        if mode == "off":
+            return self.get_response(request)
+
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+
+        response["X-Query-Count"] = str(counter.count)
+        problems = self.check(request, counter)
+        if problems:
+            message = f"{request.method} {request.path}: " + "; ".join(problems)
+            if mode == "raise":
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = view_query_budget(view_func, request)
+
+    @staticmethod
+    def check(request, counter: QueryCounter) -> list[str]:
+        problems = []
+        budget = getattr(request, "query_budget", None)
+        if budget is not None and counter.count > budget:
+            problems.append(f"{counter.count} SQL-запросов при бюджете {budget}")
+        for shape, times in counter.duplicates(settings.QUERY_BUDGET_MAX_DUPLICATES):
+            problems.append(f"запрос повторён {times} раз (N+1?): {shape}")
+        return problems
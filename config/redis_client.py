@@ -0,0 +1,59 @@
+import threading
+import uuid
+
+import redis
+from django.conf import settings
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_redis() -> redis.Redis:
+    """
+    Общий на процесс клиент Redis (REDIS_URL).
+
+    Соединение открывается лениво, при первом запросе, поэтому модуль можно
+    импортировать и там, где Redis не используется.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+class RedisLock:
+    """
+    Блокировка в Redis (SET NX EX) с токеном владельца.
+
+    Подкласс задаёт key и timeout - через сколько секунд блокировка истечёт сама,
+    если владелец умер, не сняв её.
+    """
+
+    key: str
+    timeout: int
+
+    # Снимаем только свою блокировку: чужую (взятую после истечения нашей) не трогаем
+    release_script = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, client=None):
+        self.client = client or get_redis()
+        self._release = self.client.register_script(self.release_script)
+
+    def acquire(self) -> str | None:
+        """
+        Возвращает токен блокировки или None, если её держит другой владелец.
+        """
+        token = uuid.uuid4().hex
+        if self.client.set(self.key, token, nx=True, ex=self.timeout):
+            return token
+        return None
+
+    def release(self, token: str) -> bool:
+        return bool(self._release(keys=[self.key], args=[token]))
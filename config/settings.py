@@ -56,6 +56,8 @@ INSTALLED_APPS = [
 
 # Middleware (промежуточные слои)
 MIDDLEWARE = [
+    # Первым: считает и запросы остальных middleware (см. QUERY_BUDGET_MODE)
+    'config.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -64,6 +66,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Закрепляет автора записи за основной базой, пока реплика не догонит (config.db_router)
+    'config.db_router.PrimaryPinMiddleware',
 ]
 
 # Основной файл маршрутизации
@@ -103,6 +107,15 @@ if DB_ENGINE == "postgres":
             "PORT": os.getenv("POSTGRES_PORT", "5432"),
         }
     }
+    # Реплика только для чтения: та же база и пользователь, другой хост
+    if os.getenv("POSTGRES_REPLICA_HOST"):
+        DATABASES["replica"] = {
+            **DATABASES["default"],
+            "HOST": os.getenv("POSTGRES_REPLICA_HOST"),
+            "PORT": os.getenv("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+            # В тестах реплика - это та же тестовая база default
+            "TEST": {"MIRROR": "default"},
+        }
 else:
     DATABASES = {
         "default": {
@@ -111,6 +124,16 @@ else:
         }
     }
 
+# Чтения с реплики (config.db_router): алиас из DATABASES или пусто - всё на default.
+# На реплику идут лента публичных привычек, GET своих привычек и выборка напоминаний
+DB_READ_REPLICA = os.getenv(
+    "DB_READ_REPLICA", "replica" if DB_ENGINE == "postgres" and "replica" in DATABASES else ""
+)
+# На сколько секунд реплика может отставать: столько после своей записи пользователь
+# читает с default
+DB_REPLICA_LAG = int(os.getenv("DB_REPLICA_LAG", "5"))
+DATABASE_ROUTERS = ["config.db_router.ReplicaRouter"]
+
 
 # Валидация паролей
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -154,7 +177,8 @@ MEDIA_ROOT = BASE_DIR / "media"
 # DRF: базовые настройки API
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWT с кэшем пользователя: без SELECT auth_user на каждый запрос
+        "users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -176,13 +200,40 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),     # длинный (для обновления Access)
 }
 
+# Кэш пользователей для CachedJWTAuthentication: "memory" - LRU в процессе,
+# "redis" - общий для воркеров. TTL - сколько секунд другой процесс может видеть
+# старые is_active / пароль (в своём процессе кэш сбрасывается сразу)
+USERS_AUTH_CACHE_BACKEND = os.getenv("USERS_AUTH_CACHE_BACKEND", "memory")
+USERS_AUTH_CACHE_TTL = float(os.getenv("USERS_AUTH_CACHE_TTL", "60"))
+USERS_AUTH_CACHE_SIZE = int(os.getenv("USERS_AUTH_CACHE_SIZE", "10000"))
+
 # Настройки для Celery
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = os.getenv("REDIS_PORT", "6379")
 REDIS_DB = os.getenv("REDIS_DB", "0")
 
+# Общий адрес Redis (Celery, лимиты Telegram и т.д.)
+REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+
+# Кэш Django: redis - общий для всех процессов, locmem - для локальной разработки и тестов
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+
+if CACHE_BACKEND == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # URL-адрес брокера сообщений
-CELERY_BROKER_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+CELERY_BROKER_URL = REDIS_URL
 
 # URL-адрес брокера результатов, также Redis
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
@@ -201,3 +252,86 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers.DatabaseScheduler"
+
+# Задачи, которые должны быть в расписании всегда (DatabaseScheduler подхватит их в БД сам)
+CELERY_BEAT_SCHEDULE = {
+    # Повторы отложенных сообщений outbox (новые доставляются сразу после постановки)
+    "deliver-outbox": {
+        "task": "notifications.tasks.deliver_outbox",
+        "schedule": 60.0,
+    },
+    # Напоминания о привычках: задача выбирает всё, чему пора (next_due_at <= now),
+    # поэтому интервал можно увеличить (HABITS_REMINDER_INTERVAL) без потери напоминаний
+    "send-habits-reminders": {
+        "task": "habits.tasks.send_habits_reminders",
+        "schedule": float(os.getenv("HABITS_REMINDER_INTERVAL", "60")),
+    },
+}
+
+# Telegram Bot API
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+# Размер пула keep-alive соединений и число параллельных отправок в send_many()
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", "20"))
+TELEGRAM_SEND_CONCURRENCY = int(os.getenv("TELEGRAM_SEND_CONCURRENCY", "20"))
+TELEGRAM_TIMEOUT = float(os.getenv("TELEGRAM_TIMEOUT", "10"))
+# Лимиты Bot API: ~30 сообщений/с на бота и ~1 сообщение/с в один чат
+TELEGRAM_RATE_LIMIT_GLOBAL = float(os.getenv("TELEGRAM_RATE_LIMIT_GLOBAL", "30"))
+TELEGRAM_RATE_LIMIT_PER_CHAT = float(os.getenv("TELEGRAM_RATE_LIMIT_PER_CHAT", "1"))
+# redis (по умолчанию) - общий бюджет для всех воркеров и процессов; memory - свой бюджет
+# у каждого процесса, годится только для одного процесса доставки (локальный запуск)
+TELEGRAM_RATE_LIMIT_BACKEND = os.getenv("TELEGRAM_RATE_LIMIT_BACKEND", "redis")
+# Сколько раз повторять сообщение после 429 (retry_after)
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "3"))
+
+# Outbox исходящих сообщений
+# Сколько сообщений забирать на отправку за раз
+NOTIFICATIONS_OUTBOX_BATCH_SIZE = int(os.getenv("NOTIFICATIONS_OUTBOX_BATCH_SIZE", "200"))
+# Сколько попыток до перевода в DEAD и базовая задержка повтора (секунды, растёт как 2^n)
+NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS = int(os.getenv("NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS", "5"))
+NOTIFICATIONS_OUTBOX_BACKOFF = int(os.getenv("NOTIFICATIONS_OUTBOX_BACKOFF", "30"))
+# На сколько секунд забранное сообщение скрыто от других воркеров
+NOTIFICATIONS_OUTBOX_LEASE = int(os.getenv("NOTIFICATIONS_OUTBOX_LEASE", "300"))
+# Сколько секунд один запуск deliver_outbox забирает новые пачки: с запасом меньше
+# аренды и CELERY_TASK_TIME_LIMIT, остаток доставит следующий запуск
+NOTIFICATIONS_OUTBOX_RUN_SECONDS = int(os.getenv("NOTIFICATIONS_OUTBOX_RUN_SECONDS", "120"))
+# Рассылки: сколько получателей ставит в outbox одна подзадача
+NOTIFICATIONS_BROADCAST_CHUNK_SIZE = int(os.getenv("NOTIFICATIONS_BROADCAST_CHUNK_SIZE", "5000"))
+
+# Напоминания о привычках
+# Сколько отметок last_notified_at записывать одним UPDATE
+HABITS_REMINDER_WRITE_BATCH_SIZE = int(os.getenv("HABITS_REMINDER_WRITE_BATCH_SIZE", "500"))
+# На сколько подзадач (шардов по диапазонам owner_id) делить рассылку одной минуты
+HABITS_REMINDER_SHARDS = int(os.getenv("HABITS_REMINDER_SHARDS", "4"))
+# Напоминание, опоздавшее больше чем на столько секунд (простой воркеров, долгий сбой),
+# не отправляется, а переносится на следующий период
+HABITS_REMINDER_MAX_LATENESS = int(os.getenv("HABITS_REMINDER_MAX_LATENESS", "3600"))
+# Откуда брать кандидатов: "db" - выборка по индексу каждую минуту, "redis" - расписание в ZSET
+# (habits.timeline; после включения заполнить командой rebuild_reminder_timeline)
+HABITS_REMINDER_BACKEND = os.getenv("HABITS_REMINDER_BACKEND", "db")
+# Сколько due-напоминаний забирать из расписания за один запуск и на сколько секунд их "арендовать"
+HABITS_REMINDER_TIMELINE_BATCH_SIZE = int(os.getenv("HABITS_REMINDER_TIMELINE_BATCH_SIZE", "50000"))
+HABITS_REMINDER_TIMELINE_LEASE = int(os.getenv("HABITS_REMINDER_TIMELINE_LEASE", "300"))
+# Защита от пересекающихся запусков через Redis (habits.locks): блокировка запуска
+# на HABITS_REMINDER_LOCK_TIMEOUT секунд и ключи идемпотентности отправки на HABITS_REMINDER_DEDUP_TTL
+HABITS_REMINDER_LOCKING = os.getenv("HABITS_REMINDER_LOCKING", "True") == "True"
+HABITS_REMINDER_LOCK_TIMEOUT = int(os.getenv("HABITS_REMINDER_LOCK_TIMEOUT", "600"))
+HABITS_REMINDER_DEDUP_TTL = int(os.getenv("HABITS_REMINDER_DEDUP_TTL", "900"))
+
+# Кэш ленты публичных привычек: сколько секунд живёт страница и сколько ждать,
+# пока её пересчитывает другой запрос (защита от stampede)
+HABITS_PUBLIC_FEED_CACHE_TTL = int(os.getenv("HABITS_PUBLIC_FEED_CACHE_TTL", "300"))
+HABITS_PUBLIC_FEED_LOCK_TIMEOUT = float(os.getenv("HABITS_PUBLIC_FEED_LOCK_TIMEOUT", "5"))
+
+# Сколько привычек (create + update + delete) принимает пакетный эндпоинт /api/habits/bulk/
+HABITS_BULK_MAX_ITEMS = int(os.getenv("HABITS_BULK_MAX_ITEMS", "100"))
+
+# Бюджеты SQL-запросов на запрос к API (config.query_budget.QueryBudgetMiddleware):
+# "off", "log" (по умолчанию при DEBUG) или "raise"
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "log" if DEBUG else "off")
+# Сколько раз один и тот же запрос (с точностью до параметров) может выполниться за запрос к API
+QUERY_BUDGET_MAX_DUPLICATES = int(os.getenv("QUERY_BUDGET_MAX_DUPLICATES", "2"))
+# Бюджеты сторонних представлений по имени маршрута; свои представления объявляют query_budgets
+QUERY_BUDGETS = {
+    "token_obtain_pair": {"post": 1},
+    "token_refresh": {"post": 1},
+}
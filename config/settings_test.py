@@ -0,0 +1,23 @@
+"""
+Настройки для тестов (pytest.ini): боевые настройки плюс отдельная база "replica".
+
+Тестам маршрутизации (config/tests/test_db_router.py) нужна реплика со своими данными,
+чтобы отличать чтения с неё от чтений с default. Поэтому здесь "replica" - независимая
+тестовая база, а не зеркало default, как у настоящей реплики в settings.py:
+- на SQLite - ещё одна база в памяти;
+- на Postgres - отдельная тестовая база на сервере default.
+"""
+from config.settings import *  # noqa: F401,F403
+from config.settings import DATABASES
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["replica"] = {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+else:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "TEST": {"NAME": f"test_{DATABASES['default']['NAME']}_replica"},
+    }
+
+# Чтения с реплики включают только тесты маршрутизации (settings.DB_READ_REPLICA),
+# остальные тесты пишут и читают default
+DB_READ_REPLICA = ""
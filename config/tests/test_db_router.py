@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from config.db_router import ReplicaRouter, is_pinned_to_primary, read_from_replica
+from habits import tasks
+from habits.feed import PublicFeedCache
+from habits.models import Habit
+from notifications.models import OutboxMessage
+from users.models import UserProfile
+
+User = get_user_model()
+
+# Реплика в тестах - отдельная база без репликации (config/settings_test.py): что прочитано с неё,
+# видно по данным, которых нет в default
+pytestmark = pytest.mark.django_db(databases=["default", "replica"])
+
+
+@pytest.fixture(autouse=True)
+def replica(settings):
+    settings.DB_READ_REPLICA = "replica"
+    settings.DB_REPLICA_LAG = 5
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def copy_to_replica(obj, **changes):
+    """
+    Копия строки в реплике (bulk_create - без сигналов, которые писали бы в default).
+    """
+    model = type(obj)
+    values = {field.attname: getattr(obj, field.attname) for field in model._meta.concrete_fields}
+    model.objects.using("replica").bulk_create([model(**{**values, **changes})])
+
+
+@pytest.fixture
+def owner():
+    owner = User.objects.create_user(username="replica_owner", password="pass12345")
+    copy_to_replica(owner)
+    copy_to_replica(owner.profile)
+    return owner
+
+
+@pytest.fixture
+def api_client(owner):
+    client = APIClient()
+    client.force_authenticate(user=owner)
+    return client
+
+
+@pytest.fixture
+def habit(owner):
+    habit = Habit.objects.create(
+        owner=owner, place="Дом", time="08:00", action="С основной базы", duration=60, periodicity=1
+    )
+    copy_to_replica(habit, action="С реплики")
+    return habit
+
+
+def test_safe_habit_requests_read_from_replica(api_client, habit):
+    listed = api_client.get("/api/habits/").json()["results"]
+    detail = api_client.get(f"/api/habits/{habit.id}/").json()
+
+    assert [item["action"] for item in listed] == ["С реплики"]
+    assert detail["action"] == "С реплики"
+
+
+def test_writer_reads_primary_until_replica_catches_up(api_client, owner, habit):
+    resp = api_client.patch(f"/api/habits/{habit.id}/", {"action": "Правка"}, format="json")
+
+    assert resp.status_code == 200
+    assert is_pinned_to_primary(owner.pk)
+    assert api_client.get(f"/api/habits/{habit.id}/").json()["action"] == "Правка"
+
+    other = User.objects.create_user(username="replica_other", password="pass12345")
+    api_client.force_authenticate(user=other)
+    assert not is_pinned_to_primary(other.pk)
+
+    # Закрепление истекает через DB_REPLICA_LAG секунд
+    cache.delete(f"db:primary-pin:{owner.pk}")
+    api_client.force_authenticate(user=owner)
+    assert api_client.get(f"/api/habits/{habit.id}/").json()["action"] == "С реплики"
+
+
+def test_public_feed_reads_primary_right_after_change(api_client, habit):
+    Habit.objects.filter(id=habit.id).update(is_public=True)
+    Habit.objects.using("replica").filter(id=habit.id).update(is_public=True)
+
+    assert api_client.get("/api/habits/public/").json()["results"][0]["action"] == "С реплики"
+
+    PublicFeedCache().bump()
+
+    assert api_client.get("/api/habits/public/").json()["results"][0]["action"] == "С основной базы"
+
+
+def test_reads_outside_replica_block_use_default(habit):
+    assert Habit.objects.get(id=habit.id).action == "С основной базы"
+    with read_from_replica():
+        assert Habit.objects.get(id=habit.id).action == "С реплики"
+        # Запись внутри блока всё равно уходит в default
+        assert ReplicaRouter().db_for_write(Habit) == "default"
+    with read_from_replica(enabled=False):
+        assert Habit.objects.get(id=habit.id).action == "С основной базы"
+
+
+def test_reminder_scan_reads_replica_and_writes_primary(habit):
+    now = timezone.now().replace(microsecond=0)
+    due_at = now - timedelta(seconds=63)
+    Habit.objects.using("replica").filter(id=habit.id).update(next_due_at=due_at)
+    Habit.objects.filter(id=habit.id).update(next_due_at=due_at)
+
+    counters = tasks.send_habits_reminders_shard(now.isoformat(), 0, 1)
+
+    assert counters["returned"] == 1
+    # Отметка (skip - у владельца нет чата) записана в default, реплика не тронута
+    habit.refresh_from_db()
+    assert habit.next_due_at > now
+    assert Habit.objects.using("replica").get(id=habit.id).next_due_at == due_at
+
+
+def test_reminder_scan_skips_row_changed_on_primary(fake_redis, owner, habit):
+    now = timezone.now().replace(microsecond=0)
+    owner.profile.telegram_chat_id = "100500"
+    owner.profile.save()
+    UserProfile.objects.using("replica").filter(id=owner.profile.id).update(telegram_chat_id="100500")
+    # Реплика ещё видит старое время (due минуту назад), а на основной базе
+    # пользователь уже перенёс привычку на три часа вперёд
+    Habit.objects.using("replica").filter(id=habit.id).update(next_due_at=now - timedelta(minutes=1))
+    moved_to = now + timedelta(hours=3)
+    Habit.objects.filter(id=habit.id).update(next_due_at=moved_to)
+
+    counters = tasks.send_habits_reminders_shard(now.isoformat(), 0, 1)
+
+    assert counters["changed"] == 1
+    assert counters["messages"] == 0
+    assert not OutboxMessage.objects.exists()
+    habit.refresh_from_db()
+    assert habit.next_due_at == moved_to
+    assert habit.last_notified_at is None
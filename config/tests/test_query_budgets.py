@@ -0,0 +1,211 @@
+import logging
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from config.query_budget import QueryBudgetExceeded, QueryCounter, view_query_budget
+from habits.models import Habit
+from habits.views import HabitViewSet
+
+User = get_user_model()
+
+# Маршруты без бюджета: админка, документация и корень роутера DRF не ходят в БД за данными
+SKIPPED_ROUTES = {"api-root", "schema", "swagger-ui", "redoc"}
+
+# Сколько строк засеять: N+1 по строкам страницы даст столько же одинаковых запросов,
+# больше QUERY_BUDGET_MAX_DUPLICATES
+ROWS = 5
+
+
+def habit_fields(number, **fields):
+    return {
+        "place": "Дом",
+        "time": f"{(7 + number) % 24:02d}:30",
+        "action": f"Привычка {number}",
+        "duration": 60,
+        "periodicity": 1,
+        **fields,
+    }
+
+
+# Имя маршрута -> запросы (метод, аргументы reverse, тело, ожидаемый статус).
+# Каждый маршрут API из config.urls должен быть здесь (test_every_api_route_is_covered)
+ROUTE_REQUESTS = {
+    "habits-list": [
+        ("get", lambda world: {}, None, 200),
+        ("post", lambda world: {}, habit_fields(20, related_habit="pleasant"), 201),
+    ],
+    "habits-detail": [
+        ("get", lambda world: {"pk": world["habit"].pk}, None, 200),
+        ("put", lambda world: {"pk": world["habit"].pk}, habit_fields(21, related_habit="pleasant"), 200),
+        ("patch", lambda world: {"pk": world["habit"].pk}, {"time": "06:15"}, 200),
+        ("delete", lambda world: {"pk": world["habit"].pk}, None, 204),
+    ],
+    "habits-bulk": [
+        (
+            "post",
+            lambda world: {},
+            {
+                "create": [habit_fields(number, related_habit="pleasant") for number in range(ROWS)],
+                "update": [{"id": "habit", "time": "06:00"}],
+                "delete": ["linked"],
+            },
+            200,
+        ),
+    ],
+    "public-habits": [("get", lambda world: {}, None, 200)],
+    "register": [("post", lambda world: {}, {"username": "budget_new", "password": "pass12345"}, 201)],
+    "set-telegram-chat-id": [("patch", lambda world: {}, {"telegram_chat_id": "42"}, 200)],
+    "reminder-settings": [("patch", lambda world: {}, {"timezone": "Asia/Tokyo"}, 200)],
+    "token_obtain_pair": [
+        ("post", lambda world: {}, {"username": "budget_owner", "password": "pass12345"}, 200),
+    ],
+    "token_refresh": [("post", lambda world: {}, {"refresh": "refresh"}, 200)],
+}
+
+
+def api_route_names(resolver=None, prefix=""):
+    for pattern in (resolver or get_resolver()).url_patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if not route.startswith("admin"):
+                yield from api_route_names(pattern, route)
+        elif isinstance(pattern, URLPattern) and pattern.name and route.lstrip("^").startswith("api/"):
+            yield pattern.name
+
+
+def with_world(value, world):
+    # Подставляет объекты из world вместо их имён ("pleasant" -> id приятной привычки)
+    if isinstance(value, dict):
+        return {key: with_world(item, world) for key, item in value.items()}
+    if isinstance(value, list):
+        return [with_world(item, world) for item in value]
+    if isinstance(value, str) and value in world:
+        item = world[value]
+        return item.pk if hasattr(item, "pk") else item
+    return value
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def query_budget(settings):
+    """
+    Включает QueryBudgetMiddleware в режиме raise: превышение бюджета роняет тест.
+    """
+    settings.QUERY_BUDGET_MODE = "raise"
+
+
+@pytest.fixture
+def world():
+    owner = User.objects.create_user(username="budget_owner", password="pass12345")
+    owner.profile.timezone = "Asia/Novosibirsk"
+    owner.profile.save()
+    other = User.objects.create_user(username="budget_other", password="pass12345")
+
+    pleasant = Habit.objects.create(owner=owner, is_pleasant=True, **habit_fields(0, action="Ванна"))
+    habits = [
+        Habit.objects.create(owner=owner, related_habit=pleasant, **habit_fields(number))
+        for number in range(1, ROWS + 1)
+    ]
+    for number in range(ROWS):
+        Habit.objects.create(owner=other, is_public=True, **habit_fields(number))
+
+    refresh = RefreshToken.for_user(owner)
+    return {
+        "owner": owner,
+        "pleasant": pleasant,
+        "habit": habits[0],
+        "linked": habits[1],
+        "refresh": str(refresh),
+        "access": str(refresh.access_token),
+    }
+
+
+def test_every_api_route_is_covered():
+    names = set(api_route_names()) - SKIPPED_ROUTES
+
+    assert names == set(ROUTE_REQUESTS)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name, method, kwargs, payload, expected",
+    [
+        (name, method, kwargs, payload, expected)
+        for name, cases in ROUTE_REQUESTS.items()
+        for method, kwargs, payload, expected in cases
+    ],
+    ids=lambda value: value if isinstance(value, str) else "",
+)
+def test_route_stays_within_query_budget(query_budget, world, name, method, kwargs, payload, expected):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {world['access']}")
+
+    url = reverse(name, kwargs=kwargs(world))
+    resp = getattr(client, method)(url, with_world(payload, world), format="json")
+
+    assert resp.status_code == expected, resp.content
+    assert "X-Query-Count" in resp
+
+
+@pytest.mark.django_db
+def test_exceeded_budget_raises(query_budget, world, monkeypatch):
+    monkeypatch.setattr(HabitViewSet, "query_budgets", {"list": 1})
+    client = APIClient()
+    client.force_authenticate(user=world["owner"])
+
+    with pytest.raises(QueryBudgetExceeded, match="бюджете 1"):
+        client.get("/api/habits/")
+
+
+@pytest.mark.django_db
+def test_budget_is_only_logged_in_log_mode(settings, world, monkeypatch, caplog):
+    settings.QUERY_BUDGET_MODE = "log"
+    monkeypatch.setattr(HabitViewSet, "query_budgets", {"list": 1})
+    # Логгер config не пробрасывает записи в root, а caplog слушает именно root
+    monkeypatch.setattr(logging.getLogger("config"), "propagate", True)
+    client = APIClient()
+    client.force_authenticate(user=world["owner"])
+
+    resp = client.get("/api/habits/")
+
+    assert resp.status_code == 200
+    assert "бюджете 1" in caplog.text
+
+
+def test_counter_groups_queries_by_shape():
+    counter = QueryCounter()
+    for sql in (
+        'SELECT * FROM "habits_habit" WHERE "id" = %s',
+        'SELECT * FROM "habits_habit" WHERE "id" = %s',
+        'SELECT * FROM "habits_habit" WHERE "id" = %s',
+        'SELECT * FROM "habits_habit" WHERE "id" IN (%s, %s)',
+        'SELECT * FROM "habits_habit" WHERE "id" IN (%s)',
+        'SAVEPOINT "s1_x1"',
+        'SAVEPOINT "s1_x2"',
+    ):
+        counter(lambda *args: None, sql, (), False, {})
+
+    assert counter.count == 7
+    assert counter.duplicates(2) == [('SELECT * FROM "habits_habit" WHERE "id" = %s', 3)]
+    assert counter.duplicates(1)[1] == ('SELECT * FROM "habits_habit" WHERE "id" IN (...)', 2)
+
+
+def test_view_budget_is_looked_up_by_action_then_method(rf, settings):
+    settings.QUERY_BUDGETS = {}
+    view = HabitViewSet.as_view({"get": "list", "post": "create"})
+    request = rf.get("/api/habits/")
+    request.resolver_match = None
+
+    assert view_query_budget(view, request) == HabitViewSet.query_budgets["list"]
+    assert view_query_budget(lambda request: None, request) is None
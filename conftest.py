@@ -0,0 +1,15 @@
+import fakeredis
+import pytest
+
+from config import redis_client
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """
+    Общий клиент Redis (config.redis_client) - fakeredis вместо настоящего Redis:
+    блокировки, ключи идемпотентности, расписание, лимитер и кэши работают без сервера.
+    """
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(redis_client, "_client", client)
+    return client
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Habit
+from .models import Habit, ReminderWatermark
 
 
 @admin.register(Habit)
@@ -24,4 +24,15 @@ class HabitAdmin(admin.ModelAdmin):
         "is_public",
     )
     list_filter = ("is_pleasant", "is_public", "periodicity")
+    # Поля расписания вычисляются в Habit.save(), руками не редактируются
+    readonly_fields = ("next_due_at", "last_notified_at", "reminder_text")
     search_fields = ("action", "place", "reward", "owner__username")
+
+
+@admin.register(ReminderWatermark)
+class ReminderWatermarkAdmin(admin.ModelAdmin):
+    """
+    Водяные знаки периодических задач: видно, до какого момента дошла обработка.
+    """
+
+    list_display = ("name", "processed_until")
@@ -0,0 +1,169 @@
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import UserProfile
+
+from .feed import PublicFeedCache
+from .models import Habit, get_zone, next_reminder_at
+from .serializers import HabitBulkItemSerializer, HabitSerializer
+from .services import refresh_reminder_texts
+from .timeline import ReminderTimeline, timeline_enabled
+
+NOT_FOUND = "Привычка не найдена."
+DUPLICATE = "Привычка встречается в пакете больше одного раза."
+
+
+class HabitBulkWriter:
+    """
+    Пакетное создание, изменение и удаление привычек одного владельца.
+
+    Число запросов не зависит от размера пакета:
+    - все related_habit из пакета - одним запросом, изменяемые и удаляемые привычки - одним
+    - каждый элемент проверяется HabitSerializer (те же поля и validate), без запросов
+    - запись - bulk_create / bulk_update / delete в одной транзакции
+
+    Пакет применяется целиком или не применяется вовсе: если хоть один элемент
+    не прошёл проверку, возвращаются ошибки по каждому элементу и ничего не пишется.
+
+    bulk_create / bulk_update не вызывают save() и сигналы, поэтому вычисляемые поля
+    (next_due_at в поясе владельца, reminder_text), тексты связанных привычек,
+    расписание в Redis и версия публичной ленты обновляются здесь.
+    """
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def apply(self, create: list[dict], update: list[dict], delete: list[int]):
+        """
+        Возвращает (data, None) при успехе или (None, errors) с ошибками по элементам.
+        """
+        errors = {
+            "create": [None] * len(create),
+            "update": [None] * len(update),
+            "delete": [None] * len(delete),
+        }
+
+        update_ids = [_as_pk(item.get("id")) for item in update]
+        related_ids = {_as_pk(item.get("related_habit")) for item in (*create, *update)} - {None}
+        related_habits = Habit.objects.in_bulk(related_ids) if related_ids else {}
+        own_ids = {pk for pk in (*update_ids, *delete) if pk is not None}
+        instances = (
+            Habit.objects.select_related("related_habit").filter(owner=self.owner).in_bulk(own_ids)
+            if own_ids
+            else {}
+        )
+        context = {"related_habits": related_habits}
+
+        to_create = []
+        for index, item in enumerate(create):
+            serializer = HabitBulkItemSerializer(data=item, context=context)
+            if serializer.is_valid():
+                to_create.append(serializer.validated_data)
+            else:
+                errors["create"][index] = serializer.errors
+
+        to_update = []
+        seen = set(delete)
+        for index, (pk, item) in enumerate(zip(update_ids, update)):
+            instance = instances.get(pk)
+            if instance is None:
+                errors["update"][index] = {"id": [NOT_FOUND]}
+                continue
+            if pk in seen:
+                errors["update"][index] = {"id": [DUPLICATE]}
+                continue
+            seen.add(pk)
+            serializer = HabitBulkItemSerializer(instance, data=item, partial=True, context=context)
+            if serializer.is_valid():
+                to_update.append((instance, serializer.validated_data))
+            else:
+                errors["update"][index] = serializer.errors
+
+        deleted = set()
+        for index, pk in enumerate(delete):
+            if pk not in instances:
+                errors["delete"][index] = NOT_FOUND
+            elif pk in deleted:
+                errors["delete"][index] = DUPLICATE
+            deleted.add(pk)
+
+        if any(error is not None for items in errors.values() for error in items):
+            return None, errors
+
+        with transaction.atomic():
+            created = self._create(to_create)
+            updated = self._update(to_update)
+            if delete:
+                Habit.objects.filter(owner=self.owner, id__in=delete).delete()
+
+            if timeline_enabled() and (created or updated):
+                ReminderTimeline().sync([(self.owner.pk, habit.pk) for habit in (*created, *updated)])
+            # Удаление публичных привычек и отвязку публичных (SET_NULL) ленте сообщат сигналы post_delete
+            if any(habit.is_public for habit in created) or any(
+                habit.is_public or habit._saved_is_public for habit in updated
+            ):
+                transaction.on_commit(PublicFeedCache().bump)
+
+        return {
+            "created": HabitSerializer(created, many=True).data,
+            "updated": HabitSerializer(updated, many=True).data,
+            "deleted": delete,
+        }, None
+
+    def _zone(self):
+        if not hasattr(self, "_owner_zone"):
+            name = UserProfile.objects.filter(user=self.owner).values_list("timezone", flat=True).first()
+            self._owner_zone = get_zone(name)
+        return self._owner_zone
+
+    def _create(self, items: list[dict]) -> list[Habit]:
+        if not items:
+            return []
+        now = timezone.now()
+        habits = []
+        for data in items:
+            habit = Habit(owner=self.owner, **data)
+            habit.next_due_at = next_reminder_at(habit.time, habit.periodicity, now=now, tz=self._zone())
+            habit.reminder_text = habit.render_reminder_text()
+            habits.append(habit)
+        return Habit.objects.bulk_create(habits)
+
+    def _update(self, items) -> list[Habit]:
+        if not items:
+            return []
+        now = timezone.now()
+        fields = {"updated_at"}
+        pleasant_renamed = []
+        for habit, data in items:
+            for name, value in data.items():
+                setattr(habit, name, value)
+            fields.update(data)
+
+            if habit._schedule_key() != habit._saved_schedule:
+                habit.next_due_at = next_reminder_at(
+                    habit.time, habit.periodicity, habit.last_notified_at, now=now, tz=self._zone()
+                )
+                fields.add("next_due_at")
+            if Habit.REMINDER_TEXT_FIELDS & set(data):
+                habit.reminder_text = habit.render_reminder_text()
+                fields.add("reminder_text")
+            if habit.is_pleasant and "action" in data:
+                pleasant_renamed.append(habit.pk)
+            habit.updated_at = now
+
+        habits = [habit for habit, _data in items]
+        # Одно множество полей на весь пакет: у остальных привычек значения не изменились
+        Habit.objects.bulk_update(habits, sorted(fields))
+        if pleasant_renamed:
+            refresh_reminder_texts(Habit.objects.filter(related_habit_id__in=pleasant_renamed))
+        return habits
+
+
+def _as_pk(value) -> int | None:
+    # id из JSON: число или строка с числом, как принимает PrimaryKeyRelatedField
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
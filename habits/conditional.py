@@ -0,0 +1,95 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET для списка (ETag) и карточки привычки (ETag и Last-Modified).
+
+    Валидаторы считаются по той же странице, что и ответ, но без сериализации:
+    страница выбирается лёгким запросом (id, created_at, updated_at, related_habit_id).
+    Максимум updated_at ловит изменения, набор id - удаления и сдвиг страницы,
+    related_habit_id - обнуление связи при удалении приятной привычки (SET_NULL
+    не трогает updated_at), count и ссылка next - изменения вне страницы, видные
+    в ответе. В курсорном режиме это один запрос без COUNT(*). Если клиент прислал
+    совпадающий If-None-Match (для карточки и If-Modified-Since), отдаём 304 без сериализации.
+
+    Список Last-Modified не отдаёт: максимум updated_at не видит удалений, и клиент
+    с одним If-Modified-Since получил бы 304 на список, из которого пропала привычка.
+    """
+
+    # ETag списка зависит от пользователя (у каждого своя выборка) или нет (общая лента)
+    etag_per_user = True
+    validator_fields = ("id", "created_at", "updated_at", "related_habit_id")
+
+    def list(self, request, *args, **kwargs):
+        state = self.get_list_state()
+        return self.conditional_response(
+            request,
+            (state["digest"],),
+            None,
+            lambda: self.list_response(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        state = (
+            self.filter_queryset(self.get_queryset())
+            .filter(**{self.lookup_field: kwargs[lookup]})
+            .values_list("updated_at", "related_habit_id")
+            .first()
+        )
+        if state is None:
+            # 404 отдаст обычный retrieve
+            return super().retrieve(request, *args, **kwargs)
+        updated_at, related_habit_id = state
+        return self.conditional_response(
+            request,
+            (related_habit_id,),
+            updated_at,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+    def list_response(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def get_list_state(self) -> dict:
+        queryset = self.filter_queryset(self.get_queryset()).only(*self.validator_fields)
+        # Отдельный экземпляр пагинатора: self.paginator понадобится для самого ответа
+        paginator = self.pagination_class() if self.pagination_class else None
+        page = paginator.paginate_queryset(queryset, self.request, view=self) if paginator else None
+        rows = list(queryset) if page is None else page
+
+        count = None
+        next_link = None
+        if page is not None:
+            next_link = paginator.get_next_link()
+            if getattr(paginator, "page", None) is not None:
+                count = paginator.page.paginator.count
+        updated_at = max((row.updated_at for row in rows), default=None)
+        source = f"{count}|{next_link}|{updated_at and updated_at.isoformat()}|" + ",".join(
+            f"{row.id}:{row.related_habit_id}" for row in rows
+        )
+        return {"digest": hashlib.md5(source.encode(), usedforsecurity=False).hexdigest()}
+
+    def conditional_response(self, request, parts, last_modified, render):
+        # last_modified=None - только ETag: If-Modified-Since не проверяется
+        scope = request.user.pk if self.etag_per_user else ""
+        # Полный путь с query: у каждой страницы (page, cursor, page_size) свой ETag
+        source = "|".join(
+            str(part)
+            for part in (scope, request.get_full_path(), last_modified and last_modified.isoformat(), *parts)
+        )
+        etag = quote_etag(hashlib.md5(source.encode(), usedforsecurity=False).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render()
+        if 200 <= response.status_code < 300 or response.status_code == 304:
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
@@ -0,0 +1,97 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class PublicFeedCache:
+    """
+    Кэш страниц ленты публичных привычек (PublicHabitViewSet).
+
+    Лента одинакова для всех пользователей, поэтому страница сериализуется один раз
+    и кладётся в кэш под ключом с номером версии ленты. Любое изменение публичной
+    привычки увеличивает версию (см. habits.signals), и все старые страницы разом
+    перестают находиться - удалять их не нужно, они истекут по TTL.
+
+    Пересчёт одной страницы одной версии выполняет один запрос: он ставит блокировку
+    (cache.add), остальные ждут появления страницы в кэше, а не идут в БД все разом.
+    """
+
+    version_key = "habits:public-feed:version"
+    # Лента менялась последние DB_REPLICA_LAG секунд: реплика может ещё не видеть изменение
+    changed_key = "habits:public-feed:changed"
+    key_prefix = "habits:public-feed:page"
+    poll_interval = 0.05
+
+    def version(self) -> int:
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, self._initial_version(), timeout=None)
+            version = cache.get(self.version_key) or self._initial_version()
+        return version
+
+    def bump(self) -> None:
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            # Версии нет (кэш очищен или вытеснил ключ): начинаем с момента времени,
+            # чтобы не вернуться к номеру, под которым ещё лежат старые страницы
+            cache.set(self.version_key, self._initial_version(), timeout=None)
+        cache.set(self.changed_key, 1, timeout=settings.DB_REPLICA_LAG)
+
+    def recently_changed(self) -> bool:
+        """
+        Новую версию ленты в кэш должна положить выборка с default, а не с отстающей реплики.
+        """
+        return cache.get(self.changed_key) is not None
+
+    def page_key(self, request) -> str:
+        query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.items()))
+        # Ссылки next/previous абсолютные, поэтому хост тоже часть ключа
+        source = f"{request.get_host()}{request.path}?{query}"
+        digest = hashlib.md5(source.encode(), usedforsecurity=False).hexdigest()
+        return f"{self.key_prefix}:{self.version()}:{digest}"
+
+    def get_page(self, request, compute):
+        """
+        Страница из кэша или compute() (сериализованные данные ответа) с записью в кэш.
+        """
+        return self._get_or_compute(self.page_key(request), compute)
+
+    def get_state(self, request, compute):
+        """
+        Валидаторы страницы для условных GET (см. habits.conditional), тоже одни на версию.
+        """
+        return self._get_or_compute(f"{self.page_key(request)}:state", compute)
+
+    def _get_or_compute(self, key, compute):
+        data = cache.get(key)
+        if data is not None:
+            return data
+
+        lock_key = f"{key}:lock"
+        timeout = settings.HABITS_PUBLIC_FEED_LOCK_TIMEOUT
+        if cache.add(lock_key, 1, timeout=timeout):
+            try:
+                data = compute()
+                cache.set(key, data, timeout=settings.HABITS_PUBLIC_FEED_CACHE_TTL)
+            finally:
+                cache.delete(lock_key)
+            return data
+
+        # Страницу уже считает другой запрос: ждём его результат
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            data = cache.get(key)
+            if data is not None:
+                return data
+            if cache.get(lock_key) is None:
+                # Считавший запрос упал, не записав страницу
+                break
+        return compute()
+
+    @staticmethod
+    def _initial_version() -> int:
+        return int(time.time() * 1000)
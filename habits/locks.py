@@ -0,0 +1,61 @@
+from django.conf import settings
+
+from config.redis_client import RedisLock, get_redis
+
+
+def locking_enabled() -> bool:
+    return settings.HABITS_REMINDER_LOCKING
+
+
+class ReminderRunLock(RedisLock):
+    """
+    Блокировка запуска задачи напоминаний в Redis.
+
+    Координатор берёт её (SET NX EX) и передаёт токен в колбэк chord, который её снимает.
+    Пока предыдущий запуск не закончился, следующий тик beat пропускается: выборка
+    без нижней границы, и пропущенные напоминания заберёт первый запуск после
+    освобождения. Если запуск упал,
+    блокировка истечёт сама через HABITS_REMINDER_LOCK_TIMEOUT.
+    """
+
+    key = "habits:reminders:run-lock"
+
+    @property
+    def timeout(self) -> int:
+        return settings.HABITS_REMINDER_LOCK_TIMEOUT
+
+
+class SentReminderKeys:
+    """
+    Ключи идемпотентности отправки: один на пару (привычка, запланированная минута).
+
+    Перед постановкой в outbox шард атомарно ставит ключи (SET NX): привычку, ключ
+    которой уже занят, обрабатывает другой запуск, и второй раз она не отправится,
+    даже если запуски пересеклись (истекла блокировка, два beat во время деплоя).
+    TTL (HABITS_REMINDER_DEDUP_TTL) нужен только на время, пока строка в БД ещё due:
+    после коммита next_due_at уже в будущем и повторно привычку не выберут.
+    """
+
+    key_prefix = "habits:reminders:sent"
+
+    def __init__(self, client=None):
+        self.client = client or get_redis()
+
+    def key(self, habit) -> str:
+        return f"{self.key_prefix}:{habit.id}:{int(habit.next_due_at.timestamp() // 60)}"
+
+    def claim(self, habits) -> set[int]:
+        """
+        Ставит ключи одним pipeline. Возвращает id привычек, ключи которых поставили мы.
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for habit in habits:
+            pipe.set(self.key(habit), 1, nx=True, ex=settings.HABITS_REMINDER_DEDUP_TTL)
+        return {habit.id for habit, claimed in zip(habits, pipe.execute()) if claimed}
+
+    def release(self, habits) -> None:
+        """
+        Снимает ключи, если пачку не удалось записать: следующий запуск отправит её заново.
+        """
+        if habits:
+            self.client.delete(*(self.key(habit) for habit in habits))
@@ -0,0 +1,59 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from habits.models import Habit
+from habits.seeding import seed_habits
+from habits.serializers import HabitSerializer, HabitValuesSerializer
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк сериализации страницы списка привычек: HabitSerializer против HabitValuesSerializer.
+
+    Засеивает привычки во временной транзакции (она откатывается), затем --repeat раз
+    выбирает страницу из --page-size строк и рендерит её в JSON обоими путями,
+    как это делают HabitViewSet.list и PublicHabitViewSet.list. Заодно проверяет,
+    что JSON совпадает байт в байт. Результат - JSON в stdout:
+
+        python manage.py benchmark_habit_serializers --page-size 100 --repeat 200
+    """
+
+    help = "Сравнить rows/s HabitSerializer и HabitValuesSerializer на странице списка"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        page_size, repeat = options["page_size"], options["repeat"]
+        renderer = JSONRenderer()
+        fast = HabitValuesSerializer()
+
+        with transaction.atomic():
+            seed_habits(page_size, prefix="bench_ser_", seed=1)
+            queryset = Habit.objects.filter(owner__username__startswith="bench_ser_").order_by("-created_at")
+
+            def model_path():
+                return renderer.render(HabitSerializer(list(queryset[:page_size]), many=True).data)
+
+            def values_path():
+                return renderer.render(fast.to_representation(list(fast.values(queryset)[:page_size])))
+
+            identical = model_path() == values_path()
+            report = {"page_size": page_size, "repeat": repeat, "identical_json": identical}
+            for name, render in (("habit_serializer", model_path), ("values_serializer", values_path)):
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    render()
+                elapsed = time.perf_counter() - started
+                report[f"{name}_rows_per_s"] = round(page_size * repeat / elapsed)
+            report["speedup"] = round(
+                report["values_serializer_rows_per_s"] / report["habit_serializer_rows_per_s"], 2
+            )
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,172 @@
+import json
+import os
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from celery.signals import task_postrun
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from config.celery import app as celery_app
+from habits import tasks
+from habits.locks import SentReminderKeys, locking_enabled
+from habits.models import Habit
+from habits.timeline import ReminderTimeline, timeline_enabled
+from notifications import services
+from notifications.ratelimit import InMemoryRateLimiter
+from notifications.services import TelegramClient
+from notifications.testing import StubTelegramServer
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[round(fraction * (len(values) - 1))]
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк задачи напоминаний против локальной заглушки Telegram.
+
+    - время "замораживается" на минуте с наибольшим числом due-привычек (или --at),
+      привычки, ставшие due раньше чем за --window секунд, считаются уже обработанными
+    - send_habits_reminders выполняется синхронно (Celery eager): шарды, outbox и доставка
+    - Telegram - StubTelegramServer с задержкой --latency и долей ошибок --error-rate
+    - все изменения в БД откатываются (ключи идемпотентности в Redis снимаются),
+      поэтому прогон повторяем и результаты можно сравнивать между коммитами
+
+    Задержки в отчёте:
+    - request_latency_* - один HTTP-запрос к Telegram, как его видит клиент (без ожидания лимитера)
+    - time_to_send_* - от старта запуска до приёма сообщения заглушкой: насколько позже
+      минуты напоминания сообщение доходит до Telegram
+
+    Данные готовит seed_habits. Результат - JSON в stdout:
+
+        python manage.py seed_habits --habits 100000 --seed 1
+        python manage.py benchmark_reminders --latency 0.05 --error-rate 0.01 > before.json
+    """
+
+    help = "Прогнать задачу напоминаний против заглушки Telegram и вывести метрики в JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--at", help="Момент запуска (ISO), по умолчанию - самая загруженная минута")
+        parser.add_argument(
+            "--window", type=int, default=60, help="Окно запуска, секунд: более ранние due уже обработаны"
+        )
+        parser.add_argument("--latency", type=float, default=0.05, help="Задержка ответа заглушки, секунд")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 500 от заглушки")
+        parser.add_argument("--global-rate", type=float, default=settings.TELEGRAM_RATE_LIMIT_GLOBAL)
+        parser.add_argument("--per-chat-rate", type=float, default=settings.TELEGRAM_RATE_LIMIT_PER_CHAT)
+        parser.add_argument("--concurrency", type=int, default=settings.TELEGRAM_SEND_CONCURRENCY)
+
+    def handle(self, *args, **options):
+        now = self._run_moment(options["at"])
+        since = now - timedelta(seconds=options["window"])
+        due = list(
+            Habit.objects
+            .filter(is_pleasant=False, next_due_at__gt=since, next_due_at__lte=now)
+            .values_list("id", "next_due_at")
+        )
+
+        token = os.getenv("TELEGRAM_BOT_TOKEN") or "benchmark"
+        results = {}
+
+        def collect(sender=None, retval=None, **kwargs):
+            if sender.name in (tasks.summarize_habits_reminders.name, "notifications.tasks.deliver_outbox"):
+                for key, value in retval.items():
+                    results[key] = results.get(key, 0) + value
+
+        stub = StubTelegramServer(latency=options["latency"], error_rate=options["error_rate"])
+        client = TelegramClient(
+            api_url=stub.url,
+            concurrency=options["concurrency"],
+            rate_limiter=InMemoryRateLimiter(options["global_rate"], options["per_chat_rate"]),
+        )
+        request_latencies = []
+        post = client._post
+
+        def timed_post(chat_id, text):
+            # Один HTTP-запрос (ответ с ошибкой тоже считается): list.append потокобезопасен
+            started_at = time.perf_counter()
+            try:
+                post(chat_id, text)
+            finally:
+                request_latencies.append((time.perf_counter() - started_at) * 1000)
+        eager = (celery_app.conf.task_always_eager, celery_app.conf.task_eager_propagates)
+        celery_app.conf.task_always_eager = celery_app.conf.task_eager_propagates = True
+        task_postrun.connect(collect, weak=False)
+        try:
+            with (
+                stub,
+                mock.patch.object(services, "_client", client),
+                mock.patch.object(client, "_post", timed_post),
+                mock.patch.object(timezone, "now", return_value=now),
+                mock.patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": token}),
+                transaction.atomic(),
+            ):
+                # Всё, что стало due раньше окна, считаем уже обработанными прошлыми запусками
+                Habit.objects.filter(is_pleasant=False, next_due_at__lte=since).update(next_due_at=None)
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    tasks.send_habits_reminders()
+                    wall_time = time.perf_counter() - started
+                transaction.set_rollback(True)
+        finally:
+            task_postrun.disconnect(collect)
+            celery_app.conf.task_always_eager, celery_app.conf.task_eager_propagates = eager
+            self._reset_redis(due)
+
+        times_to_send = [(received - started) * 1000 for received in stub.received_at]
+        attempts = results.get("sent", 0) + results.get("retried", 0) + results.get("dead", 0)
+        report = {
+            "run_at": now.isoformat(),
+            "habits_due": len(due),
+            "wall_time_s": round(wall_time, 3),
+            "queries": len(queries.captured_queries),
+            "rows_returned": results.get("returned", 0),
+            "reminders_queued": results.get("queued", 0),
+            "messages": results.get("messages", 0),
+            "sends": len(stub.received_at),
+            "sends_per_s": round(len(stub.received_at) / wall_time, 1) if wall_time else 0.0,
+            "request_latency_p50_ms": round(percentile(request_latencies, 0.50), 1),
+            "request_latency_p99_ms": round(percentile(request_latencies, 0.99), 1),
+            "time_to_send_p50_ms": round(percentile(times_to_send, 0.50), 1),
+            "time_to_send_p99_ms": round(percentile(times_to_send, 0.99), 1),
+            "send_errors": results.get("retried", 0) + results.get("dead", 0),
+            "error_rate": round((attempts - results.get("sent", 0)) / attempts, 4) if attempts else 0.0,
+        }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def _run_moment(self, at):
+        if at:
+            value = parse_datetime(at)
+            if value is None:
+                raise CommandError(f"Не удалось разобрать --at: {at}")
+            return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+        busiest = (
+            Habit.objects
+            .filter(is_pleasant=False, next_due_at__gt=timezone.now())
+            .values("next_due_at")
+            .annotate(habits=Count("id"))
+            .order_by("-habits", "next_due_at")
+            .first()
+        )
+        if busiest is None:
+            raise CommandError("Нет привычек для напоминаний: сначала засейте их командой seed_habits")
+        return busiest["next_due_at"] + timedelta(seconds=5)
+
+    def _reset_redis(self, due) -> None:
+        # БД откатилась, а Redis - нет: возвращаем его в состояние до прогона
+        if locking_enabled():
+            SentReminderKeys().release([SimpleNamespace(id=habit_id, next_due_at=at) for habit_id, at in due])
+        if timeline_enabled():
+            ReminderTimeline().rebuild()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from habits.timeline import ReminderTimeline
+
+
+class Command(BaseCommand):
+    """
+    Пересобирает расписание напоминаний в Redis из БД.
+
+    Нужна при включении HABITS_REMINDER_BACKEND=redis, после потери данных Redis
+    или массовых правок привычек в обход ORM (bulk_update, SQL).
+    """
+
+    help = "Пересобрать расписание напоминаний (Redis ZSET) из таблицы привычек"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Строк БД / членов ZADD за раз")
+
+    def handle(self, *args, **options):
+        total = ReminderTimeline().rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Reminder timeline rebuilt: {total} active reminders"))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from habits.seeding import delete_seeded, seed_habits
+
+
+class Command(BaseCommand):
+    """
+    Засеивает пользователей, профили и привычки для нагрузочных замеров.
+
+    Время привычек распределено как у живых пользователей (пики на :00 и :30,
+    утренний и вечерний пик), запись только bulk_create пачками.
+
+        python manage.py seed_habits --habits 1000000 --habits-per-user 5 --seed 42
+        python manage.py seed_habits --clear
+    """
+
+    help = "Засеять N привычек (и пользователей с профилями) с реалистичным распределением времени"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habits", type=int, default=10_000, help="Сколько привычек создать")
+        parser.add_argument("--habits-per-user", type=int, default=5)
+        parser.add_argument("--prefix", default="seed_", help="Префикс username засеянных пользователей")
+        parser.add_argument("--seed", type=int, default=None, help="Seed генератора для повторяемости")
+        parser.add_argument(
+            "--clear", action="store_true", help="Удалить ранее засеянных пользователей и выйти"
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted = delete_seeded(options["prefix"])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} seeded users"))
+            return
+
+        users, habits = seed_habits(
+            options["habits"],
+            habits_per_user=options["habits_per_user"],
+            prefix=options["prefix"],
+            seed=options["seed"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Seeded {users} users and {habits} habits"))
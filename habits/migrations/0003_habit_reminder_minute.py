@@ -0,0 +1,41 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+def fill_reminder_minute(apps, schema_editor):
+    """
+    Заполняем reminder_minute для уже существующих привычек.
+    """
+    Habit = apps.get_model("habits", "Habit")
+
+    batch = []
+    for habit in Habit.objects.only("id", "time").iterator(chunk_size=1000):
+        habit.reminder_minute = habit.time.hour * 60 + habit.time.minute
+        batch.append(habit)
+        if len(batch) >= 1000:
+            Habit.objects.bulk_update(batch, ["reminder_minute"])
+            batch = []
+
+    if batch:
+        Habit.objects.bulk_update(batch, ["reminder_minute"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0002_habit_last_notified_at_alter_habit_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habit',
+            name='reminder_minute',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Минута суток (0..1439), вычисляется из time. Нужна для поиска по индексу.', verbose_name='Минута напоминания'),
+        ),
+        migrations.RunPython(fill_reminder_minute, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(fields=['is_pleasant', 'reminder_minute'], name='habit_reminder_minute_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:17
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_next_due_at(apps, schema_editor):
+    """
+    Заполняем next_due_at для уже существующих привычек.
+
+    Логика повторяет habits.models.next_reminder_at на момент миграции
+    (саму функцию не импортируем: она может поменяться в будущем).
+    """
+    Habit = apps.get_model("habits", "Habit")
+    tz = timezone.get_default_timezone()
+    now = timezone.now()
+    today = timezone.localtime(now, tz).date()
+
+    def combine(day, time):
+        return timezone.make_aware(datetime.combine(day, time.replace(second=0, microsecond=0)), tz)
+
+    batch = []
+    habits = Habit.objects.only("id", "time", "periodicity", "last_notified_at")
+    for habit in habits.iterator(chunk_size=1000):
+        if habit.last_notified_at:
+            day = timezone.localtime(habit.last_notified_at, tz).date() + timedelta(days=habit.periodicity)
+        else:
+            day = today
+
+        due = combine(day, habit.time)
+        if due <= now:
+            due = combine(today, habit.time)
+        if due <= now:
+            due = combine(today + timedelta(days=1), habit.time)
+
+        habit.next_due_at = due
+        batch.append(habit)
+        if len(batch) >= 1000:
+            Habit.objects.bulk_update(batch, ["next_due_at"])
+            batch = []
+
+    if batch:
+        Habit.objects.bulk_update(batch, ["next_due_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0003_habit_reminder_minute'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='habit',
+            name='habit_reminder_minute_idx',
+        ),
+        migrations.AddField(
+            model_name='habit',
+            name='next_due_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Не раньше этого момента привычку можно напомнить снова (учитывает periodicity).', null=True, verbose_name='Следующее напоминание'),
+        ),
+        migrations.RunPython(fill_next_due_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(fields=['is_pleasant', 'reminder_minute', 'next_due_at'], name='habit_reminder_due_idx'),
+        ),
+    ]
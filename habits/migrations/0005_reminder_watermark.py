@@ -0,0 +1,36 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0004_habit_next_due_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderWatermark',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Задача')),
+                ('processed_until', models.DateTimeField(verbose_name='Обработано до')),
+            ],
+            options={
+                'verbose_name': 'Водяной знак задачи',
+                'verbose_name_plural': 'Водяные знаки задач',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='habit',
+            name='habit_reminder_due_idx',
+        ),
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(
+                condition=models.Q(('is_pleasant', False)),
+                fields=['next_due_at'],
+                name='habit_reminder_due_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+def fill_reminder_text(apps, schema_editor):
+    """
+    Заполняем reminder_text для уже существующих привычек.
+
+    Формат повторяет habits.models.render_reminder_text на момент миграции.
+    """
+    Habit = apps.get_model("habits", "Habit")
+
+    batch = []
+    habits = Habit.objects.select_related("related_habit").only(
+        "id", "action", "place", "time", "reward", "related_habit__action"
+    )
+    for habit in habits.iterator(chunk_size=1000):
+        reward = habit.related_habit.action if habit.related_habit_id else habit.reward
+        reward_text = f"\nНаграда: {reward}" if reward else ""
+        habit.reminder_text = (
+            f"Действие: {habit.action}\nМесто: {habit.place}\nВремя: {habit.time.strftime('%H:%M')}{reward_text}"
+        )
+        batch.append(habit)
+        if len(batch) >= 1000:
+            Habit.objects.bulk_update(batch, ["reminder_text"])
+            batch = []
+
+    if batch:
+        Habit.objects.bulk_update(batch, ["reminder_text"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0005_reminder_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habit',
+            name='reminder_text',
+            field=models.TextField(
+                blank=True,
+                default='',
+                editable=False,
+                help_text='Готовый текст напоминания, пересобирается при сохранении привычки и её награды.',
+                verbose_name='Текст напоминания',
+            ),
+        ),
+        migrations.RunPython(fill_reminder_text, migrations.RunPython.noop),
+    ]
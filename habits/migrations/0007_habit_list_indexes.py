@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0006_habit_reminder_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(fields=['owner', '-created_at'], name='habit_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(
+                condition=models.Q(('is_public', True)),
+                fields=['-created_at'],
+                name='habit_public_created_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0007_habit_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='habit',
+            name='habit_owner_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='habit',
+            name='habit_public_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='habit_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(
+                condition=models.Q(('is_public', True)),
+                fields=['-created_at', '-id'],
+                name='habit_public_created_idx',
+            ),
+        ),
+    ]
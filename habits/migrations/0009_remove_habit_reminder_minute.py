@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0008_habit_list_indexes_id'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='habit',
+            name='reminder_minute',
+        ),
+    ]
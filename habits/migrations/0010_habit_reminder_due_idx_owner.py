@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-18 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0009_remove_habit_reminder_minute'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='habit',
+            name='habit_reminder_due_idx',
+        ),
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(condition=models.Q(('is_pleasant', False)), fields=['next_due_at', 'owner'], name='habit_reminder_due_idx'),
+        ),
+    ]
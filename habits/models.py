@@ -1,5 +1,75 @@
+import zoneinfo
+from datetime import datetime, timedelta
+from functools import lru_cache
+
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+
+from users.models import UserProfile
+
+
+def minute_of_day(value) -> int:
+    """
+    Переводит время привычки в номер минуты суток (0..1439).
+    """
+    if isinstance(value, str):
+        value = parse_time(value)
+    return value.hour * 60 + value.minute
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str | None):
+    """
+    ZoneInfo по IANA-имени (UserProfile.timezone). Пустое имя - пояс проекта (TIME_ZONE).
+    """
+    return zoneinfo.ZoneInfo(name) if name else timezone.get_default_timezone()
+
+
+def next_reminder_at(time, periodicity, last_notified_at=None, now=None, tz=None):
+    """
+    Ближайший момент напоминания (дата + time с точностью до минуты) как aware datetime.
+
+    - time - местное время в поясе пользователя tz (по умолчанию текущий пояс)
+    - если напоминаний ещё не было, это ближайшее time после текущего момента
+    - иначе не раньше, чем через periodicity дней после последней отправки
+    - пропущенные дни не копятся: результат всегда строго в будущем
+
+    Дата и время собираются в местном поясе, поэтому переходы на летнее/зимнее время
+    учитываются сами: в БД хранится уже абсолютный момент, и выборка задачи
+    напоминаний остаётся одним range-запросом по индексу.
+    """
+    if isinstance(time, str):
+        time = parse_time(time)
+    now = now or timezone.now()
+    tz = tz or timezone.get_current_timezone()
+    time = time.replace(second=0, microsecond=0)
+
+    if last_notified_at:
+        day = timezone.localtime(last_notified_at, tz).date() + timedelta(days=periodicity)
+    else:
+        day = timezone.localtime(now, tz).date()
+
+    due = timezone.make_aware(datetime.combine(day, time), tz)
+    if due <= now:
+        day = timezone.localtime(now, tz).date()
+        due = timezone.make_aware(datetime.combine(day, time), tz)
+    if due <= now:
+        due = timezone.make_aware(datetime.combine(day + timedelta(days=1), time), tz)
+    return due
+
+
+def render_reminder_text(action, place, time, reward=None) -> str:
+    """
+    Текст напоминания о привычке: действие, место, время и награда (если есть).
+
+    reward - награда привычки или действие связанной приятной привычки.
+    """
+    if isinstance(time, str):
+        time = parse_time(time)
+    reward_text = f"\nНаграда: {reward}" if reward else ""
+    return f"Действие: {action}\nМесто: {place}\nВремя: {time.strftime('%H:%M')}{reward_text}"
 
 
 class Habit(models.Model):
@@ -93,11 +163,132 @@ class Habit(models.Model):
         verbose_name="Последняя отправка напоминания"
     )
 
+    next_due_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Следующее напоминание",
+        help_text="Не раньше этого момента привычку можно напомнить снова (учитывает periodicity).",
+    )
+
+    reminder_text = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Текст напоминания",
+        help_text="Готовый текст напоминания, пересобирается при сохранении привычки и её награды.",
+    )
+
     class Meta:
         verbose_name = "Привычка"
         verbose_name_plural = "Привычки"
         ordering = ("-created_at",)
+        indexes = [
+            # Под HabitViewSet: WHERE owner_id = ? ORDER BY created_at DESC, id DESC (без сортировки
+            # в запросе); id - для курсорной пагинации по (created_at, id)
+            models.Index(fields=["owner", "-created_at", "-id"], name="habit_owner_created_idx"),
+            # Под PublicHabitViewSet: публичных привычек мало, индекс только по ним
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(is_public=True),
+                name="habit_public_created_idx",
+            ),
+            # Под выборку задачи напоминаний (habits.tasks.due_habits):
+            # is_pleasant=False AND next_due_at <= now AND owner_id в диапазоне шарда
+            # (один range scan, диапазон шарда проверяется по индексу без чтения таблицы)
+            models.Index(
+                fields=["next_due_at", "owner"],
+                condition=models.Q(is_pleasant=False),
+                name="habit_reminder_due_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         # Для админки и логов удобно видеть короткое описание привычки
         return f"{self.owner} — {self.action} ({self.time})"
+
+    # Поля, из которых собирается reminder_text
+    REMINDER_TEXT_FIELDS = {"action", "place", "time", "reward", "related_habit"}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем расписание из БД, чтобы в save() понять, менялись ли time/periodicity/is_pleasant
+        instance._saved_schedule = instance._schedule_key()
+        # По нему сигналы понимают, что привычка ушла из публичной ленты
+        instance._saved_is_public = instance.__dict__.get("is_public")
+        return instance
+
+    def _schedule_key(self):
+        time = self.__dict__.get("time")
+        if time is None:
+            return None
+        # is_pleasant тоже часть расписания: приятные привычки задача не трогает,
+        # и при переводе в полезную их next_due_at мог давно остаться в прошлом
+        return minute_of_day(time), self.__dict__.get("periodicity"), self.__dict__.get("is_pleasant")
+
+    def render_reminder_text(self) -> str:
+        reward = self.related_habit.action if self.related_habit_id else self.reward
+        return render_reminder_text(self.action, self.place, self.time, reward)
+
+    def owner_zone(self):
+        """
+        Часовой пояс владельца (UserProfile.timezone).
+        """
+        name = UserProfile.objects.filter(user_id=self.owner_id).values_list("timezone", flat=True).first()
+        return get_zone(name)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        extra_fields = set()
+        if update_fields is None or {"time", "periodicity", "is_pleasant"} & set(update_fields):
+            # next_due_at пересчитываем только при смене расписания, иначе не трогаем
+            schedule = self._schedule_key()
+            if self.next_due_at is None or schedule != getattr(self, "_saved_schedule", None):
+                self.next_due_at = next_reminder_at(
+                    self.time, self.periodicity, self.last_notified_at, tz=self.owner_zone()
+                )
+                extra_fields.add("next_due_at")
+
+        # Текст напоминания зависит от этих полей (и от action связанной привычки - см. signals)
+        if update_fields is None or self.REMINDER_TEXT_FIELDS & set(update_fields):
+            self.reminder_text = self.render_reminder_text()
+            extra_fields.add("reminder_text")
+
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *extra_fields}
+
+        super().save(*args, **kwargs)
+        self._saved_schedule = self._schedule_key()
+        self._saved_is_public = self.is_public
+
+
+class ReminderWatermark(models.Model):
+    """
+    Водяной знак периодической задачи: до какого момента прошёл последний успешный запуск.
+
+    Задача напоминаний сдвигает знак только после успеха всех шардов. Это отчёт
+    для мониторинга (насколько отстаёт рассылка), а не граница выборки: задача
+    выбирает всё, что due, без нижней границы (см. send_habits_reminders_shard).
+    """
+
+    name = models.CharField(
+        max_length=64,
+        primary_key=True,
+        verbose_name="Задача",
+    )
+
+    processed_until = models.DateTimeField(
+        verbose_name="Обработано до",
+    )
+
+    class Meta:
+        verbose_name = "Водяной знак задачи"
+        verbose_name_plural = "Водяные знаки задач"
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.processed_until}"
+
+
+# Импорт сигналов - в самом конце файла, когда модели уже загружены
+from . import signals  # noqa: F401, E402
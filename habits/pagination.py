@@ -1,11 +1,143 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class HabitCursorPagination(BasePagination):
+    """
+    Курсорная (keyset) пагинация привычек по (created_at, id), от новых к старым.
+
+    Курсор - позиция последней привычки страницы. Следующая страница - это
+    created_at <= c AND (created_at < c OR id < i): первое условие ограничивает
+    диапазон индекса (owner, -created_at, -id) / (-created_at, -id), поэтому глубокая
+    страница стоит столько же, сколько первая. COUNT(*) не выполняется, ссылка
+    только на следующую страницу.
+    """
+
+    page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 5
+    cursor_query_param = "cursor"
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Неверный курсор."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(created_at__lte=created_at).filter(
+                Q(created_at__lt=created_at) | Q(id__lt=pk)
+            )
+
+        # Лишняя строка показывает, есть ли следующая страница
+        page = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            # Страница может быть из values() (см. HabitValuesSerializer)
+            if isinstance(last, dict):
+                self.next_position = (last["created_at"], last["id"])
+            else:
+                self.next_position = (last.created_at, last.id)
+        return page
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk = base64.urlsafe_b64decode(encoded.encode()).decode().split("|")
+            return datetime.fromisoformat(created_at), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position) -> str:
+        created_at, pk = position
+        return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{pk}".encode()).decode()
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
 
 
 class HabitPagination(PageNumberPagination):
     """
     Пагинация для привычек.
+
+    По умолчанию - постраничная (page, count). С ?pagination=cursor - курсорная
+    (HabitCursorPagination): без COUNT(*) и OFFSET, для длинных списков.
     """
 
     page_size = 5
     page_size_query_param = "page_size"
     max_page_size = 5  # По ТЗ 5 привычек на страницу
+    mode_query_param = "pagination"
+    cursor_class = HabitCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if request.query_params.get(self.mode_query_param) == "cursor":
+            self.cursor_paginator = self.cursor_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_next_link()
+        return super().get_next_link()
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "cursor - курсорная пагинация (без count), иначе постраничная.",
+                "schema": {"type": "string", "enum": ["page", "cursor"]},
+            },
+            {
+                "name": HabitCursorPagination.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Курсор следующей страницы (ссылка next) при pagination=cursor.",
+                "schema": {"type": "string"},
+            },
+        ]
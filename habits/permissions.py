@@ -11,4 +11,5 @@ class IsOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return True
-        return obj.owner == request.user
+        # owner_id, а не owner: сравнение объектов загрузило бы владельца отдельным запросом
+        return obj.owner_id == request.user.pk
@@ -0,0 +1,162 @@
+import random
+from datetime import time as dt_time
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from habits.feed import PublicFeedCache
+from habits.models import Habit, get_zone, next_reminder_at, render_reminder_text
+from habits.timeline import ReminderTimeline, timeline_enabled
+from users.models import UserProfile
+
+User = get_user_model()
+
+# Вес часа суток для времени привычки: утренний пик 7-8, вечерний 19-20, ночью почти пусто
+HOUR_WEIGHTS = (1, 1, 1, 1, 1, 2, 6, 10, 9, 5, 3, 3, 3, 3, 3, 3, 3, 4, 6, 7, 6, 4, 2, 1)
+
+ACTIONS = ("Зарядка", "Прогулка", "Чтение", "Медитация", "Растяжка", "Пробежка", "Стакан воды", "Английский")
+PLEASANT_ACTIONS = ("Ванна", "Кофе", "Сериал", "Шоколадка", "Музыка")
+PLACES = ("Дом", "Парк", "Офис", "Спортзал", "Балкон")
+REWARDS = ("Чай", "Кофе", "Десерт", "Прогулка")
+# Часовые пояса пользователей и их веса
+ZONES = ("Europe/Moscow", "Europe/Berlin", "Asia/Yekaterinburg", "Asia/Novosibirsk", "America/New_York")
+ZONE_WEIGHTS = (50, 15, 15, 10, 10)
+
+
+def random_habit_time(rng: random.Random) -> dt_time:
+    """
+    Время привычки с реалистичным распределением.
+
+    Люди выбирают "круглое" время: 40% привычек на :00, 25% на :30,
+    10% на :15/:45, остальные равномерно по минутам часа.
+    """
+    hour = rng.choices(range(24), weights=HOUR_WEIGHTS)[0]
+    roll = rng.random()
+    if roll < 0.40:
+        minute = 0
+    elif roll < 0.65:
+        minute = 30
+    elif roll < 0.75:
+        minute = rng.choice((15, 45))
+    else:
+        minute = rng.randrange(60)
+    return dt_time(hour, minute)
+
+
+def seed_habits(count: int, habits_per_user: int = 5, prefix: str = "seed_", seed: int | None = None,
+                due_at=None, chunk_size: int = 1000) -> tuple[int, int]:
+    """
+    Засеивает count привычек для ceil(count / habits_per_user) пользователей с профилями.
+
+    Пишет только bulk_create пачками по chunk_size пользователей. save() и сигналы
+    не вызываются, поэтому вычисляемые поля (next_due_at, reminder_text)
+    заполняются здесь, а расписание в Redis и версия публичной ленты обновляются в конце.
+
+    - ~90% пользователей с telegram_chat_id, ~20% с group_reminders, пояса из ZONES
+    - ~20% привычек приятные, треть полезных ссылается на приятную привычку владельца
+    - periodicity в основном 1 день, иногда 2-7
+    - due_at: если задан, все полезные привычки due в этот момент (худший случай для бенчмарков)
+
+    Возвращает (пользователей, привычек).
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    users_count = -(-count // habits_per_user)
+    start_number = User.objects.filter(username__startswith=prefix).count()
+
+    habits_created = 0
+    for chunk_start in range(0, users_count, chunk_size):
+        users = User.objects.bulk_create(
+            User(username=f"{prefix}{start_number + number}", password="!")
+            for number in range(chunk_start, min(chunk_start + chunk_size, users_count))
+        )
+        profiles = UserProfile.objects.bulk_create(
+            UserProfile(
+                user=user,
+                telegram_chat_id=str(user.id) if rng.random() < 0.9 else None,
+                group_reminders=rng.random() < 0.2,
+                timezone=rng.choices(ZONES, weights=ZONE_WEIGHTS)[0],
+            )
+            for user in users
+        )
+        zones = {profile.user_id: get_zone(profile.timezone) for profile in profiles}
+
+        per_user = []
+        for user in users:
+            size = min(habits_per_user, count - habits_created)
+            habits_created += size
+            pleasant_count = sum(rng.random() < 0.2 for _ in range(size))
+            per_user.append((user, pleasant_count, size - pleasant_count))
+
+        # Сначала приятные привычки: на них ссылаются полезные
+        pleasant = Habit.objects.bulk_create(
+            _build_habit(rng, user, zones[user.id], now, is_pleasant=True)
+            for user, pleasant_count, _useful in per_user
+            for _ in range(pleasant_count)
+        )
+        pleasant_by_owner = {}
+        for habit in pleasant:
+            pleasant_by_owner.setdefault(habit.owner_id, []).append(habit)
+
+        Habit.objects.bulk_create(
+            _build_habit(
+                rng, user, zones[user.id], now, related=pleasant_by_owner.get(user.id), due_at=due_at
+            )
+            for user, _pleasant, useful_count in per_user
+            for _ in range(useful_count)
+        )
+
+    if timeline_enabled():
+        ReminderTimeline().rebuild()
+    # bulk_create сигналов не шлёт: среди засеянных есть публичные привычки
+    PublicFeedCache().bump()
+    return users_count, habits_created
+
+
+def delete_seeded(prefix: str = "seed_", chunk_size: int = 1000) -> int:
+    """
+    Удаляет засеянных пользователей (с привычками и профилями) пачками.
+    """
+    users = User.objects.filter(username__startswith=prefix)
+    deleted = 0
+    while True:
+        ids = list(users.values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        User.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+
+def _build_habit(rng, user, zone, now, is_pleasant=False, related=None, due_at=None) -> Habit:
+    if due_at:
+        habit_time = timezone.localtime(due_at, zone).time().replace(second=0, microsecond=0)
+    else:
+        habit_time = random_habit_time(rng)
+    periodicity = 1 if rng.random() < 0.8 else rng.randint(2, 7)
+    action = rng.choice(PLEASANT_ACTIONS if is_pleasant else ACTIONS)
+    place = rng.choice(PLACES)
+
+    related_habit = None
+    reward = None
+    if not is_pleasant:
+        if related and rng.random() < 1 / 3:
+            related_habit = rng.choice(related)
+        else:
+            reward = rng.choice(REWARDS)
+
+    return Habit(
+        owner=user,
+        place=place,
+        time=habit_time,
+        action=action,
+        is_pleasant=is_pleasant,
+        related_habit=related_habit,
+        periodicity=periodicity,
+        reward=reward,
+        duration=rng.choice((30, 60, 90, 120)),
+        is_public=rng.random() < 0.1,
+        next_due_at=due_at or next_reminder_at(habit_time, periodicity, now=now, tz=zone),
+        reminder_text=render_reminder_text(
+            action, place, habit_time, related_habit.action if related_habit else reward
+        ),
+    )
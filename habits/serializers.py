@@ -1,4 +1,9 @@
-from rest_framework import serializers
+from datetime import time as dt_time
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
 from .models import Habit
 
@@ -41,7 +46,12 @@ class HabitSerializer(serializers.ModelSerializer):
         """
         # При обновлении часть полей может не прийти, поэтому подставляем текущие значения из instance.
         is_pleasant = attrs.get("is_pleasant", getattr(self.instance, "is_pleasant", False))
-        related_habit = attrs.get("related_habit", getattr(self.instance, "related_habit", None))
+        # Не attrs.get(..., getattr(...)): значение по умолчанию считается всегда,
+        # и старая связанная привычка грузилась бы даже при новой в attrs
+        if "related_habit" in attrs:
+            related_habit = attrs["related_habit"]
+        else:
+            related_habit = getattr(self.instance, "related_habit", None)
         reward = attrs.get("reward", getattr(self.instance, "reward", None))
         duration = attrs.get("duration", getattr(self.instance, "duration", None))
         periodicity = attrs.get("periodicity", getattr(self.instance, "periodicity", 1))
@@ -77,3 +87,121 @@ class HabitSerializer(serializers.ModelSerializer):
             )
 
         return attrs
+
+
+class HabitValuesSerializer:
+    """
+    Быстрый read-only сериализатор списков привычек.
+
+    Работает со строками values() вместо экземпляров модели и не проходит
+    поле за полем через to_representation ModelSerializer: для каждого поля
+    HabitSerializer заранее выбирается конвертер. Строки, числа, bool и id
+    связей из values() уже в нужном виде и копируются как есть, дата и время
+    в ISO 8601 форматируются так же, как в полях DRF (текущий пояс берётся
+    один раз на страницу), остальное идёт через to_representation поля.
+    JSON совпадает с HabitSerializer байт в байт (см. тест на паритет).
+    """
+
+    # Поля, значения которых из values() совпадают с to_representation
+    passthrough_fields = (
+        serializers.CharField,
+        serializers.IntegerField,
+        serializers.BooleanField,
+        serializers.PrimaryKeyRelatedField,
+    )
+
+    def __init__(self, serializer_class=HabitSerializer):
+        fields = serializer_class().fields
+        self.sources = [field.source for field in fields.values()]
+        # (имя в ответе, ключ в values(), фабрика конвертера от текущего пояса или None)
+        self.converters = [
+            (name, field.source, self._converter_factory(field)) for name, field in fields.items()
+        ]
+
+    def values(self, queryset):
+        return queryset.values(*self.sources)
+
+    def to_representation(self, rows) -> list[dict]:
+        zone = timezone.get_current_timezone()
+        converters = [
+            (name, source, factory and factory(zone)) for name, source, factory in self.converters
+        ]
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, convert in converters:
+                value = row[source]
+                item[name] = value if convert is None or value is None else convert(value)
+            data.append(item)
+        return data
+
+    def _converter_factory(self, field):
+        if isinstance(field, self.passthrough_fields):
+            return None
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+            if (
+                output_format and output_format.lower() == ISO_8601
+                and settings.USE_TZ and not hasattr(field, "timezone")
+            ):
+                return _iso_datetime
+        elif isinstance(field, serializers.TimeField):
+            output_format = getattr(field, "format", api_settings.TIME_FORMAT)
+            if output_format and output_format.lower() == ISO_8601:
+                return lambda zone: dt_time.isoformat
+        return lambda zone: field.to_representation
+
+
+def _iso_datetime(zone):
+    # То же, что DateTimeField.to_representation для aware-значений из БД
+    def convert(value):
+        value = value.astimezone(zone).isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+    return convert
+
+
+class PreloadedHabitField(serializers.PrimaryKeyRelatedField):
+    """
+    related_habit по id из заранее загруженного словаря context["related_habits"]
+    вместо запроса на каждый элемент (см. habits.bulk).
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        habit = self.context["related_habits"].get(pk)
+        if habit is None:
+            self.fail("does_not_exist", pk_value=data)
+        return habit
+
+
+class HabitBulkItemSerializer(HabitSerializer):
+    """
+    Элемент пакетного запроса: те же поля и правила validate, что у HabitSerializer.
+    """
+
+    related_habit = PreloadedHabitField(queryset=Habit.objects.all(), required=False, allow_null=True)
+
+
+class HabitBulkSerializer(serializers.Serializer):
+    """
+    Пакетный запрос: create - новые привычки, update - частичные правки (с id), delete - id.
+    """
+
+    create = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    update = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    delete = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    def validate(self, attrs):
+        total = len(attrs["create"]) + len(attrs["update"]) + len(attrs["delete"])
+        if not total:
+            raise serializers.ValidationError("Пустой пакет.")
+        if total > settings.HABITS_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"В пакете не больше {settings.HABITS_BULK_MAX_ITEMS} привычек."
+            )
+        return attrs
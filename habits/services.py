@@ -0,0 +1,157 @@
+from django.conf import settings
+
+from habits.models import Habit, ReminderWatermark, get_zone, next_reminder_at
+
+
+class ReminderRecord:
+    """
+    Компактная строка выборки напоминаний: готовый текст (Habit.reminder_text) и поля для отметки.
+
+    Задача напоминаний читает values_list(*ReminderRecord.fields) через iterator(),
+    без построения Habit/User/UserProfile, поэтому память воркера не растёт
+    вместе с таблицей привычек.
+    """
+
+    fields = (
+        "id",
+        "owner_id",
+        "time",
+        "periodicity",
+        "last_notified_at",
+        "next_due_at",
+        "reminder_text",
+        "owner__profile__telegram_chat_id",
+        "owner__profile__group_reminders",
+        "owner__profile__timezone",
+    )
+
+    __slots__ = (
+        "id",
+        "owner_id",
+        "time",
+        "periodicity",
+        "last_notified_at",
+        "next_due_at",
+        "reminder_text",
+        "chat_id",
+        "group_reminders",
+        "timezone",
+    )
+
+    def __init__(self, id, owner_id, time, periodicity, last_notified_at, next_due_at,  # noqa: A002
+                 reminder_text, chat_id, group_reminders, timezone):
+        self.id = id
+        self.owner_id = owner_id
+        self.time = time
+        self.periodicity = periodicity
+        self.last_notified_at = last_notified_at
+        self.next_due_at = next_due_at
+        self.reminder_text = reminder_text
+        self.chat_id = chat_id
+        self.group_reminders = group_reminders
+        self.timezone = timezone
+
+    def mark_notified(self, now) -> None:
+        """
+        Фиксирует отправку напоминания и сдвигает next_due_at на следующий период.
+        """
+        self.last_notified_at = now
+        self.next_due_at = next_reminder_at(
+            self.time, self.periodicity, now, now=now, tz=get_zone(self.timezone)
+        )
+
+    def skip(self, now) -> None:
+        """
+        Пропуск без отправки: сдвигаем next_due_at, last_notified_at не трогаем.
+        """
+        self.next_due_at = next_reminder_at(
+            self.time, self.periodicity, self.last_notified_at, now=now, tz=get_zone(self.timezone)
+        )
+
+
+def refresh_reminder_texts(habits, batch_size: int = 500) -> int:
+    """
+    Пересобирает reminder_text привычек из queryset пачками bulk_update.
+
+    Нужна там, где текст меняется не через save() самой привычки: правка или удаление
+    связанной приятной привычки (related_habit), массовые правки.
+    """
+    refreshed = 0
+    batch = []
+    for habit in habits.select_related("related_habit").iterator(chunk_size=batch_size):
+        habit.reminder_text = habit.render_reminder_text()
+        batch.append(habit)
+        if len(batch) >= batch_size:
+            Habit.objects.bulk_update(batch, ["reminder_text"])
+            refreshed += len(batch)
+            batch = []
+    if batch:
+        Habit.objects.bulk_update(batch, ["reminder_text"])
+        refreshed += len(batch)
+    return refreshed
+
+
+def reschedule_owner_habits(owner_id: int, zone_name: str, batch_size: int = 500) -> int:
+    """
+    Пересчитывает next_due_at всех привычек пользователя в новом часовом поясе.
+
+    Местное время привычек не меняется, меняется абсолютный момент напоминания.
+    """
+    zone = get_zone(zone_name)
+    habits = list(
+        Habit.objects.filter(owner_id=owner_id).only("id", "time", "periodicity", "last_notified_at")
+    )
+    for habit in habits:
+        habit.next_due_at = next_reminder_at(habit.time, habit.periodicity, habit.last_notified_at, tz=zone)
+    Habit.objects.bulk_update(habits, ["next_due_at"], batch_size=batch_size)
+    return len(habits)
+
+
+class NotifiedHabitsWriter:
+    """
+    Пакетная запись отметок об отправке напоминаний.
+
+    Вместо habit.save() на каждую отправку копим привычки и пишем
+    last_notified_at/next_due_at одним UPDATE на пачку из batch_size штук.
+
+    Хвост пачки сбрасывает flush(): задача напоминаний вызывает его в транзакции пачки,
+    вместе с INSERT сообщений в outbox, поэтому отметки и сообщения пишутся (или
+    откатываются) вместе.
+    """
+
+    fields = ("last_notified_at", "next_due_at")
+
+    def __init__(self, batch_size: int | None = None):
+        self.batch_size = batch_size or settings.HABITS_REMINDER_WRITE_BATCH_SIZE
+        self.pending: list[Habit] = []
+        self.written = 0
+        self.statements = 0
+
+    def add(self, habit) -> None:
+        if not isinstance(habit, Habit):
+            # ReminderRecord: для UPDATE достаточно pk и записываемых полей
+            habit = Habit(pk=habit.id, last_notified_at=habit.last_notified_at, next_due_at=habit.next_due_at)
+        self.pending.append(habit)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+
+        Habit.objects.bulk_update(self.pending, self.fields, batch_size=self.batch_size)
+        self.statements += 1
+        self.written += len(self.pending)
+        self.pending = []
+
+
+def advance_watermark(name: str, value) -> None:
+    """
+    Сдвигает водяной знак вперёд. Назад не двигает: запоздавший колбэк старого запуска
+    не откатит знак, уже сдвинутый более новым.
+    """
+    _watermark, created = ReminderWatermark.objects.get_or_create(
+        name=name, defaults={"processed_until": value}
+    )
+    if not created:
+        ReminderWatermark.objects.filter(name=name, processed_until__lt=value).update(processed_until=value)
@@ -0,0 +1,138 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import UserProfile
+
+from .models import Habit
+
+
+# Расписание напоминаний в Redis (habits.timeline) поддерживается только при
+# HABITS_REMINDER_BACKEND=redis. bulk_create/bulk_update сигналов не шлют - такие
+# места синхронизируют расписание сами (см. habits.tasks).
+# Если транзакция откатится, в расписании останется лишний член: задача напоминаний
+# перепроверит его по БД и исправит, так что это безопасно.
+
+
+@receiver(post_save, sender=Habit)
+def schedule_habit(sender, instance, raw=False, **kwargs):
+    from .timeline import ReminderTimeline, timeline_enabled
+
+    if timeline_enabled() and not raw:
+        ReminderTimeline().sync([(instance.owner_id, instance.pk)])
+
+
+@receiver(post_delete, sender=Habit)
+def unschedule_habit(sender, instance, **kwargs):
+    from .timeline import ReminderTimeline, timeline_enabled
+
+    if timeline_enabled():
+        ReminderTimeline().remove(instance.owner_id, instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+def sync_owner_schedule(sender, instance, created=False, raw=False, **kwargs):
+    """
+    - сменился часовой пояс - пересчитываем next_due_at привычек пользователя
+    - появился или пропал telegram_chat_id - меняется набор активных напоминаний (расписание в Redis)
+    """
+    if raw:
+        return
+
+    if not created and instance.timezone != getattr(instance, "_saved_timezone", instance.timezone):
+        from .services import reschedule_owner_habits
+
+        reschedule_owner_habits(instance.user_id, instance.timezone)
+
+    from .timeline import ReminderTimeline, timeline_enabled
+
+    if timeline_enabled():
+        ReminderTimeline().sync_owner(instance.user_id)
+
+
+@receiver(post_save, sender=Habit)
+def refresh_linked_reminder_texts(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    action приятной привычки входит в reminder_text полезных привычек, которые на неё ссылаются.
+    """
+    if raw or not instance.is_pleasant:
+        return
+    if update_fields is not None and "action" not in update_fields:
+        return
+
+    from .services import refresh_reminder_texts
+
+    refresh_reminder_texts(instance.related_for.all())
+
+
+@receiver(pre_delete, sender=Habit)
+def remember_linked_habits(sender, instance, origin=None, **kwargs):
+    # После удаления related_for уже пуст (SET_NULL), поэтому запоминаем ссылающиеся привычки
+    # заранее: (id, is_public) - публичным обнуление связи меняет ленту
+    if not instance.is_pleasant:
+        return
+    if isinstance(origin, QuerySet) and origin.model is Habit:
+        # Удаление queryset: связи всех удаляемых привычек - одним запросом на всё удаление
+        links = getattr(origin, "_linked_habits", None)
+        if links is None:
+            links = {}
+            linked = Habit.objects.filter(related_habit__in=origin.values("id"))
+            for related_id, habit_id, is_public in linked.values_list("related_habit_id", "id", "is_public"):
+                links.setdefault(related_id, []).append((habit_id, is_public))
+            origin._linked_habits = links
+        instance._linked_habits = links.get(instance.pk, [])
+    else:
+        instance._linked_habits = list(instance.related_for.values_list("id", "is_public"))
+
+
+@receiver(post_delete, sender=Habit)
+def refresh_unlinked_habits(sender, instance, origin=None, **kwargs):
+    """
+    Привычки, отвязанные SET_NULL: пересобираем reminder_text, а если среди них есть
+    публичные - обновляем ленту (SET_NULL идёт в обход save() и сигналов).
+    """
+    if isinstance(origin, QuerySet) and getattr(origin, "_linked_habits", None) is not None:
+        # post_delete приходит, когда SET_NULL уже выполнен для всех удалённых: все
+        # отвязанные привычки обрабатываем один раз, на первом сигнале
+        if not getattr(origin, "_linked_habits_refreshed", False):
+            origin._linked_habits_refreshed = True
+            _refresh_unlinked([pair for pairs in origin._linked_habits.values() for pair in pairs])
+        return
+
+    _refresh_unlinked(getattr(instance, "_linked_habits", None) or [])
+
+
+def _refresh_unlinked(linked: list[tuple[int, bool]]) -> None:
+    if not linked:
+        return
+
+    from .services import refresh_reminder_texts
+
+    refresh_reminder_texts(Habit.objects.filter(id__in=[habit_id for habit_id, _is_public in linked]))
+    if any(is_public for _habit_id, is_public in linked):
+        _bump_public_feed()
+
+
+@receiver(post_save, sender=Habit)
+def invalidate_public_feed_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Публичная привычка изменилась, появилась в ленте или ушла из неё - новая версия ленты.
+    """
+    if raw:
+        return
+    if instance.is_public or getattr(instance, "_saved_is_public", False):
+        _bump_public_feed()
+
+
+@receiver(post_delete, sender=Habit)
+def invalidate_public_feed_on_delete(sender, instance, **kwargs):
+    if instance.is_public:
+        _bump_public_feed()
+
+
+def _bump_public_feed():
+    from .feed import PublicFeedCache
+
+    # После коммита: иначе параллельный запрос успеет закэшировать под новой версией старые данные
+    transaction.on_commit(PublicFeedCache().bump)
@@ -1,108 +1,400 @@
 import logging
-from datetime import timedelta
+from datetime import datetime, timedelta
 
-from celery import shared_task
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Max
 from django.utils import timezone
 
+from config.db_router import replica_alias
 from habits.models import Habit
-from notifications.services import send_telegram_message
+from habits.locks import ReminderRunLock, SentReminderKeys, locking_enabled
+from habits.services import NotifiedHabitsWriter, ReminderRecord, advance_watermark
+from habits.timeline import ReminderTimeline, timeline_enabled
+from notifications.outbox import enqueue_messages
+from notifications.services import TELEGRAM_MESSAGE_MAX_LENGTH
+from notifications.tasks import deliver_outbox
 
 logger = logging.getLogger("notifications")
 
+# Имя водяного знака (ReminderWatermark) задачи напоминаний
+WATERMARK_NAME = "habits.send_habits_reminders"
+
 
 @shared_task
 def send_habits_reminders() -> int:
     """
-    Периодическая Celery-задача напоминаний о привычках.
+    Периодическая Celery-задача напоминаний о привычках (координатор).
 
     Логика:
-    - проверяется текущее время (по минутам)
-    - учитывается периодичность (periodicity + last_notified_at)
-    - отправляется Telegram-уведомление владельцу привычки
-    - задача устойчива к ошибкам (одна ошибка не роняет всю задачу)
+    - фиксируется текущее время (одно на все шарды)
+    - выбирается всё, что due (next_due_at <= now) и ещё не обработано: каждая обработанная
+      привычка сдвигает next_due_at в будущее, поэтому опоздавший beat, запуск раз
+      в несколько минут или упавший шард ничего не теряют - следующий запуск заберёт остаток
+    - привычки делятся на HABITS_REMINDER_SHARDS шардов по диапазонам owner_id
+    - на каждый шард ставится отдельная подзадача, их выполняют свободные воркеры
+    - колбэк chord собирает счётчики шардов в общий итог и сдвигает водяной знак на now
+      (только для отчёта и мониторинга: выборку он не ограничивает)
+
+    При HABITS_REMINDER_BACKEND=redis кандидатов даёт расписание в Redis (habits.timeline):
+    шарды получают готовые списки привычек, а в тихую минуту БД не читается вовсе.
+
+    Пересекающиеся запуски безопасны (HABITS_REMINDER_LOCKING): запуск держит блокировку
+    в Redis до колбэка chord (если шард упал - до errback release_reminders_run_lock),
+    а каждая отправка перед постановкой в outbox ставит ключ идемпотентности
+    (привычка, запланированная минута) - см. habits.locks.
+
+    Возвращает количество поставленных шардов.
     """
     now = timezone.localtime()
+    shards = max(1, settings.HABITS_REMINDER_SHARDS)
     logger.info(
-        "send_habits_reminders: started now=%s",
+        "send_habits_reminders: started now=%s shards=%s",
         now.strftime("%Y-%m-%d %H:%M:%S"),
+        shards,
+    )
+
+    lock_token = None
+    if locking_enabled():
+        lock_token = ReminderRunLock().acquire()
+        if lock_token is None:
+            logger.info(
+                "send_habits_reminders: skipped now=%s, previous run still in progress", now.isoformat()
+            )
+            return 0
+
+    try:
+        shard_tasks = _shard_tasks(now, shards)
+        if not shard_tasks:
+            logger.info("send_habits_reminders: nothing due now=%s", now.isoformat())
+            _release_run_lock(lock_token)
+            return 0
+        # Упавший шард не вызовет колбэк: блокировку тогда снимает errback, а не её таймаут
+        callback = summarize_habits_reminders.s(now.isoformat(), lock_token).on_error(
+            release_reminders_run_lock.s(lock_token=lock_token)
+        )
+        chord(group(shard_tasks))(callback)
+    except BaseException:
+        _release_run_lock(lock_token)
+        raise
+    return len(shard_tasks)
+
+
+def _shard_tasks(now, shards: int) -> list:
+    """
+    Подзадачи шардов для этого запуска (пустой список - отправлять нечего).
+    """
+    if timeline_enabled():
+        buckets = {}
+        for owner_id, habit_id in ReminderTimeline().claim_due(now):
+            buckets.setdefault(owner_id % shards, []).append((owner_id, habit_id))
+        return [
+            send_habits_reminders_shard.s(now.isoformat(), shard, shards, members)
+            for shard, members in sorted(buckets.items())
+        ]
+
+    return [
+        send_habits_reminders_shard.s(now.isoformat(), shard, shards, owners=owners)
+        for shard, owners in enumerate(_owner_ranges(shards))
+    ]
+
+
+def _owner_ranges(shards: int) -> list[tuple[int, int | None]]:
+    """
+    Делит owner_id на shards диапазонов (after_id, until_id] равной ширины.
+
+    Диапазон, а не owner_id % shards: условие на owner_id проверяется по второму столбцу
+    индекса habit_reminder_due_idx, и шард читает из таблицы только свои строки. until_id=None
+    у последнего диапазона: в него попадут и владельцы, появившиеся после разбиения.
+    """
+    max_owner_id = Habit.objects.using(replica_alias()).aggregate(value=Max("owner_id"))["value"] or 0
+    width = max(1, -(-max_owner_id // shards))
+    bounds = [shard * width for shard in range(shards)]
+    return list(zip(bounds, bounds[1:] + [None]))
+
+
+def _release_run_lock(lock_token: str | None) -> None:
+    if lock_token:
+        ReminderRunLock().release(lock_token)
+
+
+@shared_task
+def release_reminders_run_lock(request, exc, traceback, lock_token: str | None = None) -> None:
+    """
+    Errback колбэка chord: шард (или сам колбэк) упал, summarize_habits_reminders не
+    снимет блокировку - снимаем её здесь, чтобы следующий тик beat не ждал
+    HABITS_REMINDER_LOCK_TIMEOUT. Водяной знак не сдвигается.
+    """
+    logger.error("send_habits_reminders: failed task_id=%s error=%r", request.id, exc)
+    _release_run_lock(lock_token)
+
+
+@shared_task
+def send_habits_reminders_shard(now_iso: str, shard: int, shards: int, members=None, owners=None) -> dict:
+    """
+    Постановка напоминаний одного шарда в outbox.
+
+    Логика:
+    - один range-запрос по индексу habit_reminder_due_idx: next_due_at <= now; периодичность
+      уже учтена в next_due_at. Нижней границы нет намеренно: обработанные привычки уходят
+      в будущее, и выборка растёт только с числом ещё не обработанных. Граница по водяному
+      знаку навсегда оставила бы позади строку, чей next_due_at оказался ниже знака
+      (сохранение, закоммиченное после чтения шарда, отставание реплики)
+    - каждая привычка окна сдвигается на следующий next_due_at: отправленная - через
+      mark_notified, а без telegram_chat_id или опоздавшая больше чем на
+      HABITS_REMINDER_MAX_LATENESS - через skip (без отправки)
+    - строки читаются потоком (iterator) в компактные ReminderRecord, в памяти не больше
+      одной пачки, поэтому память воркера не зависит от размера таблицы
+    - при group_reminders привычки одного чата склеиваются в одно сообщение
+    - пачка (HABITS_REMINDER_WRITE_BATCH_SIZE) пишется одной транзакцией:
+      INSERT сообщений в outbox + UPDATE отметок last_notified_at/next_due_at
+    - отправкой занимается deliver_outbox: медленный Telegram не задерживает выборку
+
+    owners - диапазон owner_id шарда (after_id, until_id], None - все владельцы.
+    members - [(owner_id, habit_id), ...] из расписания в Redis: тогда выбираются только
+    эти привычки, а после отправки их члены в расписании сдвигаются на новый next_due_at.
+
+    Выборка читает с реплики (DB_READ_REPLICA), если она есть, а отметки пишутся в default.
+    Привычку, которая ещё не дошла до реплики, заберёт один из следующих запусков.
+    Строку, которая изменилась после чтения (отставание реплики, правка пользователя
+    во время долгого прохода), пачка перепроверяет по default и пропускает (_changed_rows).
+
+    Возвращает счётчики шарда для summarize_habits_reminders.
+    """
+    now = datetime.fromisoformat(now_iso)
+    habits = due_habits(now, owners=owners, members=members)
+
+    counters = {"queued": 0, "skipped": 0, "duplicates": 0, "changed": 0, "messages": 0, "outbox_inserts": 0}
+    writer = NotifiedHabitsWriter()
+    rows = habits.values_list(*ReminderRecord.fields).iterator(chunk_size=writer.batch_size)
+
+    # Пачку режем только на границе владельцев, чтобы не разрывать группу одного чата
+    batch = []
+    habits_due = 0
+    for row in rows:
+        habit = ReminderRecord(*row)
+        if len(batch) >= writer.batch_size and habit.owner_id != batch[-1].owner_id:
+            _enqueue_batch(batch, now, writer, counters)
+            batch = []
+        batch.append(habit)
+        habits_due += 1
+    if batch:
+        _enqueue_batch(batch, now, writer, counters)
+
+    logger.info(
+        "send_habits_reminders: shard=%s/%s habits_due=%s",
+        shard,
+        shards,
+        habits_due,
     )
+    counters["returned"] = habits_due
+
+    if members is not None:
+        # bulk_update сигналов не шлёт: сдвигаем расписание сами (заодно чистим неактивные члены)
+        ReminderTimeline().sync(members)
+
+    if counters["messages"]:
+        deliver_outbox.delay()
+
+    counters["write_statements"] = writer.statements + counters["outbox_inserts"]
+    return counters
 
+
+def due_habits(now, owners=None, members=None):
+    """
+    Выборка шарда: привычки, которым пора напомнить (next_due_at <= now), с реплики.
+
+    owners - диапазон owner_id (after_id, until_id], members - список из расписания в Redis.
+    """
+    # Привычки без чата тоже выбираются: их next_due_at надо сдвинуть, иначе они
+    # выбирались бы каждую минуту
     habits = (
-        Habit.objects
-        .select_related("owner", "owner__profile", "related_habit")
-        .filter(is_pleasant=False)
-        .filter(owner__profile__telegram_chat_id__isnull=False)
+        Habit.objects.using(replica_alias())
+        .filter(is_pleasant=False, next_due_at__lte=now)
+        # Привычки одного владельца идут подряд, чтобы их можно было склеить в одно сообщение
+        .order_by("owner_id", "time", "id")
     )
+    if members is not None:
+        # next_due_at <= now остаётся защитой: устаревший член расписания не даст повторной отправки
+        return habits.filter(id__in=[habit_id for _owner_id, habit_id in members])
+    if owners is not None:
+        after_id, until_id = owners
+        habits = habits.filter(owner_id__gt=after_id)
+        if until_id is not None:
+            habits = habits.filter(owner_id__lte=until_id)
+    return habits
 
-    logger.info("send_habits_reminders: habits_total=%s", habits.count())
 
-    sent = 0
-    skipped_by_time = 0
-    skipped_by_periodicity = 0
+def _enqueue_batch(habits, now, writer, counters) -> None:
+    """
+    Ставит напоминания пачки в outbox и отмечает привычки одной транзакцией.
 
-    now_minutes = now.hour * 60 + now.minute
+    Если задача упадёт посреди пачки, откатятся и сообщения, и отметки:
+    напоминание не потеряется "наполовину" и не уйдёт дважды.
 
-    for habit in habits:
-        habit_minutes = habit.time.hour * 60 + habit.time.minute
+    Привычки, ключ идемпотентности которых уже занят, обрабатывает другой запуск:
+    их не отправляем и не отмечаем. Так же пропускаем привычки, изменившиеся
+    после чтения (_changed_rows): их отметка затёрла бы новое расписание.
+    """
+    oldest = now - timedelta(seconds=settings.HABITS_REMINDER_MAX_LATENESS)
+    due = [habit for habit in habits if habit.chat_id and habit.next_due_at >= oldest]
+
+    sent_keys = SentReminderKeys() if locking_enabled() and due else None
+    if sent_keys:
+        claimed = sent_keys.claim(due)
+        taken = {habit.id for habit in due if habit.id not in claimed}
+        if taken:
+            due = [habit for habit in due if habit.id in claimed]
+            habits = [habit for habit in habits if habit.id not in taken]
+            counters["duplicates"] += len(taken)
+
+    claimed_due = due
+    changed_due = []
+    try:
+        with transaction.atomic():
+            changed = _changed_rows(habits)
+            if changed:
+                changed_due = [habit for habit in due if habit.id in changed]
+                due = [habit for habit in due if habit.id not in changed]
+                habits = [habit for habit in habits if habit.id not in changed]
+                counters["changed"] += len(changed)
+
+            messages = [
+                (chat_id, _reminder_text(part))
+                for chat_id, chat_habits in _group_by_chat(due)
+                for part in _split_message(chat_habits)
+            ]
+            if messages:
+                enqueue_messages(messages)
+                counters["outbox_inserts"] += 1
+            due_ids = {habit.id for habit in due}
+            for habit in habits:
+                if habit.id in due_ids:
+                    habit.mark_notified(now)
+                else:
+                    habit.skip(now)
+                writer.add(habit)
+            writer.flush()
+    except BaseException:
+        # Пачка откатилась: снимаем ключи, иначе следующий запуск посчитает её отправленной
+        if sent_keys:
+            sent_keys.release(claimed_due)
+        raise
+
+    if sent_keys and changed_due:
+        # Ключи стоят на устаревшую минуту: новое расписание отправит следующий запуск
+        sent_keys.release(changed_due)
 
-        # 1) Проверка времени (по минутам)
-        if habit_minutes != now_minutes:
-            skipped_by_time += 1
+    counters["messages"] += len(messages)
+    counters["queued"] += len(due)
+    counters["skipped"] += len(habits) - len(due)
+
+
+def _changed_rows(habits) -> set[int]:
+    """
+    Перечитывает строки пачки в default под блокировкой (SELECT ... FOR UPDATE) и
+    возвращает id тех, чьё расписание изменилось с момента чтения шарда: привычка
+    удалена, стала приятной, сменились next_due_at, time, periodicity или last_notified_at.
+
+    Вызывать внутри транзакции пачки: до её коммита эти строки никто не перезапишет.
+    """
+    if not habits:
+        return set()
+    current = {
+        habit_id: schedule
+        for habit_id, *schedule in Habit.objects.using(DEFAULT_DB_ALIAS)
+        .select_for_update()
+        .filter(id__in=[habit.id for habit in habits])
+        .values_list("id", "is_pleasant", "next_due_at", "time", "periodicity", "last_notified_at")
+    }
+    return {
+        habit.id
+        for habit in habits
+        if current.get(habit.id)
+        != [False, habit.next_due_at, habit.time, habit.periodicity, habit.last_notified_at]
+    }
+
+
+def _group_by_chat(habits) -> list[tuple[str, list[ReminderRecord]]]:
+    """
+    Раскладывает привычки по сообщениям.
+
+    Если владелец включил group_reminders, все его привычки этой минуты
+    уходят в его чат одним сообщением, иначе - по сообщению на привычку.
+    """
+    groups = []
+    grouped = {}
+    for habit in habits:
+        if not habit.group_reminders:
+            groups.append((habit.chat_id, [habit]))
             continue
 
-        # 2) Проверка периодичности
-        if habit.last_notified_at:
-            next_allowed = habit.last_notified_at + timedelta(days=habit.periodicity)
-            if now < next_allowed:
-                skipped_by_periodicity += 1
-                logger.info(
-                    "send_habits_reminders: skip_by_periodicity habit_id=%s owner=%s next_allowed=%s",
-                    habit.id,
-                    habit.owner.username,
-                    next_allowed.strftime("%Y-%m-%d %H:%M:%S"),
-                )
-                continue
-
-        chat_id = habit.owner.profile.telegram_chat_id
-
-        # 3) Текст напоминания
-        reward_text = ""
-        if habit.related_habit:
-            reward_text = f"\nНаграда: {habit.related_habit.action}"
-        elif habit.reward:
-            reward_text = f"\nНаграда: {habit.reward}"
-
-        message = (
-            f"⏰ Напоминание о привычке\n"
-            f"Действие: {habit.action}\n"
-            f"Место: {habit.place}\n"
-            f"Время: {habit.time.strftime('%H:%M')}"
-            f"{reward_text}"
-        )
+        if habit.chat_id not in grouped:
+            grouped[habit.chat_id] = []
+            groups.append((habit.chat_id, grouped[habit.chat_id]))
+        grouped[habit.chat_id].append(habit)
+    return groups
 
-        try:
-            send_telegram_message(chat_id, message)
-            habit.last_notified_at = now
-            habit.save(update_fields=["last_notified_at"])
-            sent += 1
 
-            logger.info(
-                "send_habits_reminders: sent habit_id=%s owner=%s",
-                habit.id,
-                habit.owner.username,
-            )
-        except Exception:  # noqa
-            # Намеренно не роняем всю периодическую задачу из-за одной ошибки
-            logger.exception(
-                "send_habits_reminders: failed habit_id=%s owner=%s",
-                habit.id,
-                habit.owner.username,
-            )
+def _reminder_text(habits: list[ReminderRecord]) -> str:
+    """
+    Текст напоминания из заранее собранных Habit.reminder_text.
+
+    Для нескольких привычек - одно сообщение с пронумерованным списком.
+    """
+    if len(habits) == 1:
+        return f"⏰ Напоминание о привычке\n{habits[0].reminder_text}"
+
+    items = "\n\n".join(f"{number}) {habit.reminder_text}" for number, habit in enumerate(habits, start=1))
+    return f"⏰ Напоминание о привычках ({len(habits)})\n\n{items}"
+
+
+def _split_message(habits: list[ReminderRecord]) -> list[list[ReminderRecord]]:
+    """
+    Делит привычки одного чата на части, текст каждой из которых (_reminder_text)
+    укладывается в TELEGRAM_MESSAGE_MAX_LENGTH.
+    """
+    parts = [[]]
+    for habit in habits:
+        if parts[-1] and _message_length(_reminder_text(parts[-1] + [habit])) > TELEGRAM_MESSAGE_MAX_LENGTH:
+            parts.append([])
+        parts[-1].append(habit)
+    return parts
+
+
+def _message_length(text: str) -> int:
+    # Длина так, как её считает Telegram: в кодовых единицах UTF-16
+    return len(text.encode("utf-16-le")) // 2
+
+
+@shared_task
+def summarize_habits_reminders(results: list[dict], now_iso: str, lock_token: str | None = None) -> dict:
+    """
+    Колбэк chord: суммирует счётчики всех шардов, пишет итоговую строку в лог,
+    сдвигает водяной знак (отчёт: до какого момента прошёл последний успешный запуск)
+    и снимает блокировку запуска.
+
+    Возвращает суммарные счётчики (их читает, например, benchmark_reminders).
+    """
+    advance_watermark(WATERMARK_NAME, datetime.fromisoformat(now_iso))
+    _release_run_lock(lock_token)
+
+    totals = {key: sum(result[key] for result in results) for key in results[0]} if results else {}
+    queued = totals.get("queued", 0)
+    write_statements = totals.get("write_statements", 0)
 
     logger.info(
-        "send_habits_reminders: finished sent=%s skipped_by_time=%s skipped_by_periodicity=%s",
-        sent,
-        skipped_by_time,
-        skipped_by_periodicity,
+        "send_habits_reminders: finished now=%s shards=%s queued=%s messages=%s skipped=%s "
+        "write_statements=%s statements_per_reminder=%.4f duplicates=%s changed=%s",
+        now_iso,
+        len(results),
+        queued,
+        totals.get("messages", 0),
+        totals.get("skipped", 0),
+        write_statements,
+        write_statements / queued if queued else 0.0,
+        totals.get("duplicates", 0),
+        totals.get("changed", 0),
     )
-    return sent
+    return totals
@@ -1,12 +1,28 @@
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
 from habits.models import Habit
+from habits.serializers import HabitSerializer, HabitValuesSerializer
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кэш ленты публичных привычек живёт между тестами, а версия в транзакции теста не меняется
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -232,3 +248,225 @@ def test_public_habits_list_is_read_only(api_client, user, other_user):
     # Попытка POST в public endpoint должна быть запрещена
     create_resp = api_client.post("/api/habits/public/", {"action": "x"}, format="json")
     assert create_resp.status_code in (401, 403, 405)
+
+
+def make_public_habits(owner, count):
+    habits = [
+        Habit.objects.create(
+            owner=owner,
+            place="Парк",
+            time="10:00",
+            action=f"Публичная {number}",
+            is_pleasant=False,
+            reward="Кофе",
+            duration=60,
+            periodicity=1,
+            is_public=True,
+        )
+        for number in range(count)
+    ]
+    # Половина привычек с одинаковым created_at: порядок внутри решает id
+    moment = timezone.now() - timedelta(days=1)
+    Habit.objects.filter(id__in=[habit.id for habit in habits[::2]]).update(created_at=moment)
+    return habits
+
+
+@pytest.mark.django_db
+def test_public_habits_cursor_pagination_walks_all_pages(api_client, user, other_user):
+    make_public_habits(other_user, 12)
+    expected = list(
+        Habit.objects.filter(is_public=True).order_by("-created_at", "-id").values_list("id", flat=True)
+    )
+
+    seen = []
+    url = "/api/habits/public/?pagination=cursor"
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            resp = api_client.get(url)
+        assert resp.status_code == 200
+        assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        data = resp.json()
+        assert "count" not in data
+        seen.extend(habit["id"] for habit in data["results"])
+        url = data["next"]
+
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_own_habits_cursor_pagination(api_client, user, other_user):
+    make_public_habits(user, 7)
+    make_public_habits(other_user, 3)
+
+    first = api_client.get("/api/habits/?pagination=cursor&page_size=4").json()
+    second = api_client.get(first["next"]).json()
+
+    assert len(first["results"]) == 4
+    assert len(second["results"]) == 3
+    assert second["next"] is None
+    ids = {habit["id"] for habit in first["results"] + second["results"]}
+    assert ids == set(Habit.objects.filter(owner=user).values_list("id", flat=True))
+
+
+@pytest.mark.django_db
+def test_page_number_pagination_is_default(api_client, user, other_user):
+    make_public_habits(other_user, 6)
+
+    data = api_client.get("/api/habits/public/").json()
+
+    assert data["count"] == 6
+    assert len(data["results"]) == 5
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_returns_404(api_client, user):
+    resp = api_client.get("/api/habits/?pagination=cursor&cursor=broken")
+    assert resp.status_code == 404
+
+
+@pytest.fixture
+def forbid_serialization(monkeypatch):
+    """
+    После вызова любая сериализация привычки падает: 304 должен отдаваться без неё.
+    """
+    def forbid():
+        def fail(self, instance):
+            raise AssertionError("serialized")
+
+        monkeypatch.setattr("habits.serializers.HabitSerializer.to_representation", fail)
+        monkeypatch.setattr("habits.serializers.HabitValuesSerializer.to_representation", fail)
+    return forbid
+
+
+@pytest.mark.django_db
+def test_habits_list_conditional_get(api_client, user, forbid_serialization):
+    habits = make_public_habits(user, 3)
+    resp = api_client.get("/api/habits/")
+    etag = resp["ETag"]
+    # Max(updated_at) не видит удалений: список валидируется только по ETag
+    assert "Last-Modified" not in resp
+    # Другая страница - другой ETag
+    assert api_client.get("/api/habits/?page_size=2")["ETag"] != etag
+
+    forbid_serialization()
+    with CaptureQueriesContext(connection) as queries:
+        not_modified = api_client.get("/api/habits/", HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == 304
+    assert not_modified["ETag"] == etag
+    # Только лёгкая выборка страницы для валидаторов (и count постраничного режима)
+    assert len(queries.captured_queries) == 2
+    assert "action" not in queries.captured_queries[-1]["sql"]
+
+    # Удаление не меняет Max(updated_at), но меняет набор id
+    Habit.objects.filter(id=habits[0].id).delete()
+    with pytest.raises(AssertionError, match="serialized"):
+        api_client.get("/api/habits/", HTTP_IF_NONE_MATCH=etag)
+    # If-Modified-Since без ETag не даёт 304 на список, из которого пропала привычка
+    with pytest.raises(AssertionError, match="serialized"):
+        api_client.get("/api/habits/", HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+
+
+@pytest.mark.django_db
+def test_habits_cursor_list_conditional_get(api_client, user, forbid_serialization):
+    make_public_habits(user, 3)
+    url = "/api/habits/?pagination=cursor&page_size=2"
+    etag = api_client.get(url)["ETag"]
+
+    forbid_serialization()
+    with CaptureQueriesContext(connection) as queries:
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert len(queries.captured_queries) == 1
+    assert "COUNT(" not in queries.captured_queries[0]["sql"]
+
+
+@pytest.mark.django_db
+def test_habit_detail_conditional_get(api_client, user, forbid_serialization):
+    habit = make_public_habits(user, 1)[0]
+    url = f"/api/habits/{habit.id}/"
+    resp = api_client.get(url)
+    etag, last_modified = resp["ETag"], resp["Last-Modified"]
+
+    forbid_serialization()
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+    Habit.objects.filter(id=habit.id).update(updated_at=timezone.now() + timedelta(minutes=1))
+    with pytest.raises(AssertionError, match="serialized"):
+        api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert api_client.get(f"/api/habits/{habit.id + 100}/", HTTP_IF_NONE_MATCH=etag).status_code == 404
+
+
+@pytest.mark.django_db
+def test_public_feed_not_modified_without_queries(api_client, user, other_user):
+    make_public_habits(other_user, 2)
+    etag = api_client.get("/api/habits/public/")["ETag"]
+
+    with CaptureQueriesContext(connection) as queries:
+        resp = api_client.get("/api/habits/public/", HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 304
+    assert queries.captured_queries == []
+
+
+@pytest.mark.django_db
+def test_values_serializer_matches_habit_serializer(user, other_user, settings):
+    pleasant = Habit.objects.create(
+        owner=user,
+        place="Дом",
+        time="07:05:09",
+        action="Кофе",
+        is_pleasant=True,
+        duration=30,
+        periodicity=1,
+        is_public=True,
+    )
+    Habit.objects.create(
+        owner=user,
+        place="Парк «Сокольники»",
+        time="23:59",
+        action="Прогулка\nвечером",
+        related_habit=pleasant,
+        duration=120,
+        periodicity=7,
+        is_public=False,
+    )
+    Habit.objects.create(
+        owner=other_user,
+        place="Офис",
+        time="00:00",
+        action="Вода",
+        reward="",
+        duration=1,
+        periodicity=3,
+        is_public=True,
+    )
+    # Микросекунды, UTC и "круглое" время - разные ветки форматирования DateTimeField
+    Habit.objects.filter(id=pleasant.id).update(
+        created_at=datetime(2026, 1, 1, 0, 0, tzinfo=dt_timezone.utc),
+        updated_at=datetime(2026, 6, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+    )
+    fast = HabitValuesSerializer()
+    renderer = JSONRenderer()
+
+    for zone in ("Europe/Moscow", "UTC"):
+        settings.TIME_ZONE = zone
+        queryset = Habit.objects.order_by("id")
+        expected = HabitSerializer(queryset, many=True).data
+        actual = fast.to_representation(fast.values(queryset))
+
+        assert set(actual[0]) == set(HabitSerializer.Meta.fields)
+        assert renderer.render(actual) == renderer.render(expected)
+
+
+@pytest.mark.django_db
+def test_list_endpoints_match_habit_serializer(api_client, user, other_user):
+    make_public_habits(user, 3)
+    make_public_habits(other_user, 2)
+
+    own = api_client.get("/api/habits/?page_size=5").json()["results"]
+    public = api_client.get("/api/habits/public/?pagination=cursor").json()["results"]
+
+    own_habits = Habit.objects.filter(owner=user).order_by("-created_at")[:5]
+    public_habits = Habit.objects.filter(is_public=True).order_by("-created_at", "-id")[:5]
+    assert own == HabitSerializer(own_habits, many=True).data
+    assert public == HabitSerializer(public_habits, many=True).data
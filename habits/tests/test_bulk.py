@@ -0,0 +1,188 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from habits.models import Habit, get_zone, next_reminder_at
+from habits.timeline import ReminderTimeline
+
+User = get_user_model()
+
+URL = "/api/habits/bulk/"
+
+
+@pytest.fixture
+def user():
+    user = User.objects.create_user(username="bulk_owner", password="pass12345")
+    user.profile.timezone = "Asia/Novosibirsk"
+    user.profile.save()
+    return user
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def pleasant(user):
+    return Habit.objects.create(
+        owner=user, place="Дом", time="21:00", action="Ванна", is_pleasant=True, duration=60, periodicity=1
+    )
+
+
+def habit_payload(number, **fields):
+    return {
+        "place": "Дом",
+        "time": f"{7 + number % 12:02d}:30",
+        "action": f"Привычка {number}",
+        "is_pleasant": False,
+        "reward": "Чай",
+        "duration": 60,
+        "periodicity": 1,
+        **fields,
+    }
+
+
+def bulk_queries(client, payload) -> int:
+    with CaptureQueriesContext(connection) as queries:
+        resp = client.post(URL, payload, format="json")
+    assert resp.status_code == 200, resp.json()
+    return len(queries.captured_queries)
+
+
+@pytest.mark.django_db
+def test_bulk_create_fills_derived_fields(api_client, user, pleasant):
+    payload = {
+        "create": [
+            habit_payload(1),
+            habit_payload(2, reward=None, related_habit=pleasant.id, is_public=True),
+        ]
+    }
+
+    resp = api_client.post(URL, payload, format="json")
+
+    assert resp.status_code == 200
+    created = resp.json()["created"]
+    assert [habit["action"] for habit in created] == ["Привычка 1", "Привычка 2"]
+    zone = get_zone("Asia/Novosibirsk")
+    habits = Habit.objects.filter(id__in=[item["id"] for item in created]).select_related("related_habit")
+    for habit in habits:
+        assert habit.owner == user
+        assert habit.next_due_at == next_reminder_at(habit.time, habit.periodicity, tz=zone)
+        assert habit.reminder_text == habit.render_reminder_text()
+    assert "Награда: Ванна" in Habit.objects.get(action="Привычка 2").reminder_text
+
+
+@pytest.mark.django_db
+def test_bulk_query_count_does_not_grow_with_batch(api_client, user, pleasant):
+    def batch(size, offset):
+        existing = [
+            Habit.objects.create(owner=user, **habit_payload(offset + number, time="10:00"))
+            for number in range(2 * size)
+        ]
+        return {
+            "create": [
+                habit_payload(offset + number, reward=None, related_habit=pleasant.id)
+                for number in range(size)
+            ],
+            "update": [{"id": habit.id, "time": "11:15", "action": "Правка"} for habit in existing[:size]],
+            "delete": [habit.id for habit in existing[size:]],
+        }
+
+    small = bulk_queries(api_client, batch(2, 0))
+    large = bulk_queries(api_client, batch(20, 100))
+
+    assert small == large
+
+
+@pytest.mark.django_db
+def test_bulk_update_recomputes_schedule_and_texts(api_client, user, pleasant):
+    habit = Habit.objects.create(owner=user, **habit_payload(1, reward=None, related_habit=pleasant))
+    before = Habit.objects.get(id=habit.id)
+
+    resp = api_client.post(
+        URL,
+        {"update": [{"id": habit.id, "time": "06:45"}, {"id": pleasant.id, "action": "Душ"}]},
+        format="json",
+    )
+
+    assert resp.status_code == 200
+    habit.refresh_from_db()
+    assert habit.next_due_at == next_reminder_at(habit.time, 1, tz=get_zone("Asia/Novosibirsk"))
+    assert habit.updated_at > before.updated_at
+    # Текст пересобран и по своему времени, и по новому action связанной приятной привычки
+    assert habit.reminder_text == "Действие: Привычка 1\nМесто: Дом\nВремя: 06:45\nНаграда: Душ"
+
+
+@pytest.mark.django_db
+def test_bulk_reports_errors_per_item_and_writes_nothing(api_client, user, pleasant):
+    other = User.objects.create_user(username="stranger", password="pass12345")
+    foreign = Habit.objects.create(owner=other, **habit_payload(1))
+    own = Habit.objects.create(owner=user, **habit_payload(2))
+
+    resp = api_client.post(
+        URL,
+        {
+            "create": [
+                habit_payload(3),
+                habit_payload(4, duration=500),
+                habit_payload(5, related_habit=999999),
+            ],
+            "update": [
+                {"id": foreign.id, "action": "x"},
+                {"id": own.id, "related_habit": own.id, "reward": None},
+            ],
+            "delete": [foreign.id, pleasant.id],
+        },
+        format="json",
+    )
+
+    assert resp.status_code == 400
+    errors = resp.json()
+    assert errors["create"][0] is None
+    assert errors["create"][1] and errors["create"][2]
+    assert errors["update"][0] == {"id": ["Привычка не найдена."]}
+    # related_habit должна быть приятной - правило HabitSerializer.validate
+    assert errors["update"][1]
+    assert errors["delete"] == ["Привычка не найдена.", None]
+    assert Habit.objects.count() == 3
+    assert not Habit.objects.filter(action="Привычка 3").exists()
+
+
+@pytest.mark.django_db
+def test_bulk_delete_unlinks_reminder_texts(api_client, user, pleasant):
+    linked = Habit.objects.create(owner=user, **habit_payload(1, reward=None, related_habit=pleasant))
+
+    resp = api_client.post(URL, {"delete": [pleasant.id]}, format="json")
+
+    assert resp.status_code == 200
+    linked.refresh_from_db()
+    assert linked.related_habit is None
+    assert "Награда" not in linked.reminder_text
+
+
+@pytest.mark.django_db
+def test_bulk_limits_batch_size(api_client, settings):
+    settings.HABITS_BULK_MAX_ITEMS = 2
+
+    payload = {"create": [habit_payload(number) for number in range(3)]}
+    assert api_client.post(URL, payload, format="json").status_code == 400
+    assert api_client.post(URL, {}, format="json").status_code == 400
+
+
+@pytest.mark.django_db
+def test_bulk_syncs_redis_timeline(api_client, user, fake_redis, settings):
+    settings.HABITS_REMINDER_BACKEND = "redis"
+    user.profile.telegram_chat_id = "42"
+    user.profile.save()
+    timeline = ReminderTimeline()
+
+    resp = api_client.post(URL, {"create": [habit_payload(1), habit_payload(2)]}, format="json")
+
+    ids = [habit["id"] for habit in resp.json()["created"]]
+    members = {member.decode() for member in timeline.client.zrange(timeline.key, 0, -1)}
+    assert members == {f"{user.id}:{habit_id}" for habit_id in ids}
@@ -0,0 +1,72 @@
+import json
+import random
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from habits.models import Habit, ReminderWatermark
+from habits.seeding import random_habit_time
+from notifications.models import OutboxMessage
+from users.models import UserProfile
+
+
+def test_random_habit_time_prefers_round_minutes():
+    rng = random.Random(1)
+    times = [random_habit_time(rng) for _ in range(2000)]
+
+    on_hour = sum(value.minute == 0 for value in times)
+    on_half = sum(value.minute == 30 for value in times)
+    morning = sum(6 <= value.hour <= 9 for value in times)
+    assert on_hour > len(times) * 0.35
+    assert on_half > len(times) * 0.2
+    assert morning > len(times) * 0.3
+
+
+@pytest.mark.django_db
+def test_seed_habits_fills_derived_fields():
+    call_command("seed_habits", "--habits", "50", "--habits-per-user", "5", "--seed", "7", stdout=StringIO())
+
+    assert Habit.objects.count() == 50
+    assert UserProfile.objects.filter(user__username__startswith="seed_").count() == 10
+    for habit in Habit.objects.select_related("related_habit"):
+        assert habit.next_due_at is not None
+        assert habit.reminder_text == habit.render_reminder_text()
+
+    call_command("seed_habits", "--clear", stdout=StringIO())
+    assert not Habit.objects.exists()
+
+
+@pytest.mark.django_db
+def test_benchmark_reminders_reports_json_and_rolls_back(settings, fake_redis):
+    settings.HABITS_REMINDER_LOCKING = False
+    settings.HABITS_REMINDER_SHARDS = 1
+    call_command("seed_habits", "--habits", "40", "--seed", "3", stdout=StringIO())
+
+    out = StringIO()
+    call_command("benchmark_reminders", "--latency", "0", "--global-rate", "1000", stdout=out)
+    report = json.loads(out.getvalue())
+
+    assert report["habits_due"] > 0
+    assert report["rows_returned"] == report["habits_due"]
+    assert report["sends"] == report["messages"]
+    assert report["queries"] > 0
+    assert report["request_latency_p99_ms"] >= report["request_latency_p50_ms"] > 0
+    assert report["time_to_send_p99_ms"] >= report["time_to_send_p50_ms"]
+
+    # Прогон откатывается: его можно повторить на тех же данных
+    assert not OutboxMessage.objects.exists()
+    assert not ReminderWatermark.objects.exists()
+    assert not Habit.objects.filter(last_notified_at__isnull=False).exists()
+
+
+@pytest.mark.django_db
+def test_benchmark_habit_serializers_reports_identical_json():
+    out = StringIO()
+    call_command("benchmark_habit_serializers", "--page-size", "20", "--repeat", "2", stdout=out)
+    report = json.loads(out.getvalue())
+
+    assert report["identical_json"] is True
+    assert report["habit_serializer_rows_per_s"] > 0
+    assert report["values_serializer_rows_per_s"] > 0
+    assert not Habit.objects.exists()
@@ -0,0 +1,182 @@
+import threading
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.request import Request
+
+from habits.feed import PublicFeedCache
+from habits.models import Habit
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="reader", password="pass12345")
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def make_habit(owner, action="Публичная", is_public=True):
+    return Habit.objects.create(
+        owner=owner,
+        place="Парк",
+        time="10:00",
+        action=action,
+        is_pleasant=False,
+        reward="Кофе",
+        duration=60,
+        periodicity=1,
+        is_public=is_public,
+    )
+
+
+def feed_actions(client):
+    return [habit["action"] for habit in client.get("/api/habits/public/").json()["results"]]
+
+
+@pytest.mark.django_db
+def test_repeated_feed_request_is_served_from_cache(api_client, user):
+    make_habit(user)
+    first = api_client.get("/api/habits/public/").json()
+
+    with CaptureQueriesContext(connection) as queries:
+        second = api_client.get("/api/habits/public/").json()
+
+    assert second == first
+    assert not any('"habits_habit"' in query["sql"] for query in queries.captured_queries)
+
+
+@pytest.mark.django_db
+def test_public_habit_changes_bump_feed_version(api_client, user, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        habit = make_habit(user, action="Было")
+    assert feed_actions(api_client) == ["Было"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        habit.action = "Стало"
+        habit.save()
+    assert feed_actions(api_client) == ["Стало"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        habit.is_public = False
+        habit.save()
+    assert feed_actions(api_client) == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        habit.is_public = True
+        habit.save(update_fields=["is_public"])
+    assert feed_actions(api_client) == ["Стало"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        habit.delete()
+    assert feed_actions(api_client) == []
+
+
+@pytest.mark.django_db
+def test_private_habit_changes_keep_feed_version(user, django_capture_on_commit_callbacks):
+    feed = PublicFeedCache()
+    version = feed.version()
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        habit = make_habit(user, is_public=False)
+        habit.action = "Другая"
+        habit.save()
+        habit.delete()
+
+    assert callbacks == []
+    assert feed.version() == version
+
+
+def test_bump_survives_missing_version_key():
+    feed = PublicFeedCache()
+    version = feed.version()
+
+    feed.bump()
+    assert feed.version() == version + 1
+
+    cache.delete(feed.version_key)
+    feed.bump()
+    assert feed.version() >= version
+
+
+def feed_request(path="/api/habits/public/"):
+    return Request(APIRequestFactory().get(path))
+
+
+def test_concurrent_miss_waits_for_single_recompute(settings):
+    settings.HABITS_PUBLIC_FEED_LOCK_TIMEOUT = 2
+    feed = PublicFeedCache()
+    request = feed_request()
+    key = feed.page_key(request)
+    # Страницу уже считает другой запрос: он держит блокировку и скоро запишет результат
+    cache.add(f"{key}:lock", 1)
+    threading.Timer(0.1, cache.set, args=(key, {"results": ["из кэша"]})).start()
+
+    calls = []
+    data = feed.get_page(request, lambda: calls.append(1) or {"results": ["пересчёт"]})
+
+    assert data == {"results": ["из кэша"]}
+    assert calls == []
+
+
+def test_recompute_when_lock_holder_fails(settings):
+    settings.HABITS_PUBLIC_FEED_LOCK_TIMEOUT = 2
+    feed = PublicFeedCache()
+    request = feed_request()
+    key = feed.page_key(request)
+    cache.add(f"{key}:lock", 1)
+    # Держатель блокировки упал, не записав страницу
+    threading.Timer(0.1, cache.delete, args=(f"{key}:lock",)).start()
+
+    assert feed.get_page(request, lambda: {"results": ["пересчёт"]}) == {"results": ["пересчёт"]}
+
+
+def test_failed_compute_releases_lock():
+    feed = PublicFeedCache()
+    request = feed_request()
+
+    def broken():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        feed.get_page(request, broken)
+
+    assert cache.get(f"{feed.page_key(request)}:lock") is None
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("bulk", [False, True], ids=["instance", "queryset"])
+def test_unlinking_public_habit_bumps_feed_version(user, django_capture_on_commit_callbacks, bulk):
+    pleasant = make_habit(user, action="Ванна", is_public=False)
+    Habit.objects.filter(id=pleasant.id).update(is_pleasant=True, reward="")
+    pleasant.refresh_from_db()
+    linked = make_habit(user)
+    Habit.objects.filter(id=linked.id).update(related_habit=pleasant, reward="")
+    feed = PublicFeedCache()
+    version = feed.version()
+
+    # SET_NULL обнуляет related_habit публичной привычки в обход save()
+    with django_capture_on_commit_callbacks(execute=True):
+        if bulk:
+            Habit.objects.filter(id=pleasant.id).delete()
+        else:
+            pleasant.delete()
+
+    linked.refresh_from_db()
+    assert linked.related_habit_id is None
+    assert feed.version() > version
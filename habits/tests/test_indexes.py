@@ -0,0 +1,76 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from habits.seeding import seed_habits
+from habits.services import ReminderRecord
+from habits.tasks import due_habits
+
+User = get_user_model()
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(connection.vendor != "postgresql", reason="EXPLAIN-планы проверяем на Postgres"),
+]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кэш ленты публичных привычек живёт между тестами, а версия в транзакции теста не меняется
+    cache.clear()
+
+
+@pytest.fixture
+def seeded():
+    # Таблица должна быть достаточно большой, чтобы планировщик не предпочёл seq scan "по размеру"
+    seed_habits(20_000, prefix="explain_", seed=1)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE habits_habit")
+    return User.objects.filter(username__startswith="explain_", habits__isnull=False).first()
+
+
+def assert_no_seq_scan(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN {sql}", params)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+    assert "Seq Scan on habits_habit" not in plan, f"{sql}\n{plan}"
+
+
+def assert_endpoint_uses_indexes(user, url):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get(url).status_code == 200
+
+    habit_queries = [query["sql"] for query in queries.captured_queries if '"habits_habit"' in query["sql"]]
+    assert habit_queries
+    for sql in habit_queries:
+        assert_no_seq_scan(sql)
+
+
+def test_own_habits_list_uses_owner_index(seeded):
+    assert_endpoint_uses_indexes(seeded, "/api/habits/")
+
+
+def test_public_habits_list_uses_partial_index(seeded):
+    assert_endpoint_uses_indexes(seeded, "/api/habits/public/")
+
+
+@pytest.mark.parametrize("owners", [None, (0, 100), (100, None)])
+def test_reminder_scan_uses_partial_index(seeded, owners):
+    # Запрос шарда как есть: без нижней границы, с диапазоном шарда и сортировкой по владельцу
+    habits = due_habits(timezone.now(), owners=owners).values_list(*ReminderRecord.fields)
+    sql, params = habits.query.sql_with_params()
+    assert_no_seq_scan(sql, params)
+
+
+def test_public_habits_cursor_page_uses_partial_index(seeded):
+    first = APIClient()
+    first.force_authenticate(user=seeded)
+    next_url = first.get("/api/habits/public/?pagination=cursor").json()["next"]
+
+    assert_endpoint_uses_indexes(seeded, next_url)
@@ -0,0 +1,663 @@
+import zoneinfo
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from config.celery import app as celery_app
+from habits import tasks
+from habits.locks import ReminderRunLock, SentReminderKeys
+from habits.models import Habit, ReminderWatermark, next_reminder_at
+from habits.services import ReminderRecord
+from habits.timeline import ReminderTimeline
+from notifications import outbox
+from notifications.models import OutboxMessage
+from notifications.services import SendResult
+
+User = get_user_model()
+
+# Блокировки, ключи идемпотентности и расписание - в fakeredis вместо настоящего Redis
+pytestmark = pytest.mark.usefixtures("fake_redis")
+
+
+@pytest.fixture
+def freeze_now(monkeypatch):
+    """
+    Подменяет timezone.now(), чтобы задача видела нужную минуту.
+    """
+    def _freeze(hour, minute, second=5, day=10):
+        value = timezone.make_aware(datetime(2026, 1, day, hour, minute, second))
+        monkeypatch.setattr(timezone, "now", lambda: value)
+        return value
+    return _freeze
+
+
+@pytest.fixture(autouse=True)
+def eager_celery(monkeypatch):
+    # chord из координатора выполняется синхронно, без брокера и result backend
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(celery_app.conf, "task_eager_propagates", True)
+
+
+@pytest.fixture
+def sent_messages(monkeypatch):
+    sent = []
+
+    def fake_send_many(messages):
+        messages = list(messages)
+        sent.extend(messages)
+        return [SendResult(chat_id=chat_id, ok=True) for chat_id, _ in messages]
+
+    # Напоминания уходят через outbox: подменяем отправку в его доставщике
+    monkeypatch.setattr(outbox, "send_many", fake_send_many)
+    return sent
+
+
+@pytest.fixture
+def task_log(caplog, monkeypatch):
+    # Логгер notifications не пробрасывает записи в root, а caplog слушает именно root
+    monkeypatch.setattr(tasks.logger, "propagate", True)
+    caplog.set_level("INFO", logger="notifications")
+    return caplog
+
+
+@pytest.fixture
+def tg_user():
+    user = User.objects.create_user(username="tg_owner", password="pass12345")
+    user.profile.telegram_chat_id = "100500"
+    user.profile.save(update_fields=["telegram_chat_id"])
+    return user
+
+
+@pytest.fixture
+def redis_timeline(fake_redis, settings):
+    settings.HABITS_REMINDER_BACKEND = "redis"
+    return ReminderTimeline()
+
+
+def timeline_members(timeline) -> dict:
+    members = timeline.client.zrange(timeline.key, 0, -1, withscores=True)
+    return {member.decode(): score for member, score in members}
+
+
+def run_reminders(sent_messages) -> int:
+    """
+    Запускает координатор и возвращает, сколько сообщений ушло за этот запуск.
+    """
+    before = len(sent_messages)
+    tasks.send_habits_reminders()
+    return len(sent_messages) - before
+
+
+def make_chat_user(username, chat_id):
+    user = User.objects.create_user(username=username, password="pass12345")
+    user.profile.telegram_chat_id = chat_id
+    user.profile.save(update_fields=["telegram_chat_id"])
+    return user
+
+
+def make_habit(owner, time, **kwargs):
+    defaults = {
+        "place": "Дом",
+        "action": "Читать книгу",
+        "is_pleasant": False,
+        "reward": "Чай",
+        "duration": 60,
+        "periodicity": 1,
+    }
+    defaults.update(kwargs)
+    return Habit.objects.create(owner=owner, time=time, **defaults)
+
+
+@pytest.mark.django_db
+def test_next_due_at_follows_time_on_create_and_update(tg_user):
+    client = APIClient()
+    client.force_authenticate(user=tg_user)
+
+    payload = {
+        "place": "Дом",
+        "time": "07:45",
+        "action": "Зарядка",
+        "is_pleasant": False,
+        "reward": "Кофе",
+        "duration": 60,
+        "periodicity": 1,
+    }
+    resp = client.post("/api/habits/", payload, format="json")
+    habit = Habit.objects.get(id=resp.data["id"])
+    assert habit.next_due_at.astimezone(habit.owner_zone()).strftime("%H:%M") == "07:45"
+
+    client.patch(f"/api/habits/{habit.id}/", {"time": "21:10"}, format="json")
+    habit.refresh_from_db()
+    assert habit.next_due_at.astimezone(habit.owner_zone()).strftime("%H:%M") == "21:10"
+
+
+@pytest.mark.django_db
+def test_next_due_at_follows_time_with_update_fields(tg_user):
+    habit = make_habit(tg_user, "10:00")
+
+    habit.time = "11:30"
+    habit.save(update_fields=["time"])
+
+    habit.refresh_from_db()
+    assert habit.next_due_at.astimezone(habit.owner_zone()).strftime("%H:%M") == "11:30"
+
+
+@pytest.mark.django_db
+def test_send_habits_reminders_sends_only_current_minute(tg_user, freeze_now, sent_messages):
+    freeze_now(7, 0)
+    due = make_habit(tg_user, "08:00", action="Отжимания")
+    make_habit(tg_user, "08:01", action="Приседания")
+    make_habit(tg_user, "08:00", action="Ванна", is_pleasant=True, reward=None)
+
+    freeze_now(8, 0)
+    assert run_reminders(sent_messages) == 1
+
+    assert len(sent_messages) == 1
+    assert sent_messages[0][0] == "100500"
+    assert "Отжимания" in sent_messages[0][1]
+
+    due.refresh_from_db()
+    assert due.last_notified_at is not None
+
+
+@pytest.mark.django_db
+def test_send_habits_reminders_skips_users_without_chat(freeze_now, sent_messages):
+    freeze_now(7, 0)
+    user = User.objects.create_user(username="no_chat", password="pass12345")
+    make_habit(user, "08:00")
+
+    freeze_now(8, 0)
+    assert run_reminders(sent_messages) == 0
+    assert sent_messages == []
+
+    # Напоминание пропущено, но next_due_at сдвинут: ниже водяного знака ничего не застревает
+    habit = Habit.objects.get(owner=user)
+    assert habit.next_due_at == timezone.make_aware(datetime(2026, 1, 11, 8, 0))
+    assert habit.last_notified_at is None
+
+
+@pytest.mark.django_db
+def test_next_due_at_follows_schedule_changes(tg_user, freeze_now):
+    now = freeze_now(9, 0)
+    habit = make_habit(tg_user, "08:00", periodicity=2)
+
+    # 08:00 сегодня уже прошло -> ближайшее напоминание завтра
+    assert habit.next_due_at == timezone.make_aware(datetime(2026, 1, 11, 8, 0))
+
+    habit.time = "10:15"
+    habit.save()
+    assert habit.next_due_at == timezone.make_aware(datetime(2026, 1, 10, 10, 15))
+
+    record = ReminderRecord(*Habit.objects.values_list(*ReminderRecord.fields).get(id=habit.id))
+    record.mark_notified(now)
+    assert record.next_due_at == timezone.make_aware(datetime(2026, 1, 12, 10, 15))
+
+
+@pytest.mark.django_db
+def test_send_habits_reminders_respects_periodicity(tg_user, freeze_now, sent_messages):
+    freeze_now(7, 0)
+    habit = make_habit(tg_user, "08:00", periodicity=2)
+
+    freeze_now(8, 0, day=10)
+    assert run_reminders(sent_messages) == 1
+
+    # Через день - ещё рано, через два - пора
+    freeze_now(8, 0, day=11)
+    assert run_reminders(sent_messages) == 0
+
+    freeze_now(8, 0, day=12)
+    assert run_reminders(sent_messages) == 1
+
+    habit.refresh_from_db()
+    assert habit.next_due_at == timezone.make_aware(datetime(2026, 1, 14, 8, 0))
+
+
+@pytest.mark.django_db
+def test_reminders_are_written_in_batches(freeze_now, sent_messages, settings, task_log):
+    settings.HABITS_REMINDER_WRITE_BATCH_SIZE = 2
+    settings.HABITS_REMINDER_SHARDS = 1
+    freeze_now(7, 0)
+    habits = [make_habit(make_chat_user(f"batch_{i}", str(300 + i)), "08:00") for i in range(3)]
+
+    now = freeze_now(8, 0)
+    assert run_reminders(sent_messages) == 3
+
+    # 3 напоминания при пачке 2 -> две пачки по INSERT в outbox + UPDATE отметок
+    assert "queued=3 messages=3 skipped=0 write_statements=4 " in task_log.text
+    assert OutboxMessage.objects.filter(status=OutboxMessage.Status.SENT).count() == 3
+    for habit in habits:
+        habit.refresh_from_db()
+        assert habit.last_notified_at == now
+
+
+@pytest.mark.django_db
+def test_habit_changed_during_scan_keeps_new_schedule(
+    tg_user, freeze_now, sent_messages, monkeypatch, settings
+):
+    settings.HABITS_REMINDER_SHARDS = 1
+    freeze_now(7, 0)
+    moved = make_habit(tg_user, "08:00", action="Перенесённая")
+    make_habit(tg_user, "08:00", action="Обычная")
+    now = freeze_now(8, 0)
+    moved_to = now.replace(hour=11)
+    enqueue_batch = tasks._enqueue_batch
+
+    def edit_during_scan(habits, *args):
+        # Пользователь перенёс привычку, пока шард шёл по выборке
+        Habit.objects.filter(id=moved.id).update(time="11:00", next_due_at=moved_to)
+        return enqueue_batch(habits, *args)
+
+    monkeypatch.setattr(tasks, "_enqueue_batch", edit_during_scan)
+
+    assert run_reminders(sent_messages) == 1
+    assert "Обычная" in sent_messages[0][1]
+    moved.refresh_from_db()
+    assert moved.next_due_at == moved_to
+    assert moved.last_notified_at is None
+
+
+@pytest.mark.django_db
+def test_committed_batches_survive_task_crash(tg_user, freeze_now, monkeypatch, settings):
+    settings.HABITS_REMINDER_WRITE_BATCH_SIZE = 1
+    settings.HABITS_REMINDER_SHARDS = 1
+    freeze_now(7, 0)
+    make_habit(tg_user, "08:00", action="Первая")
+    make_habit(make_chat_user("tg_second", "200600"), "08:00", action="Вторая")
+
+    calls = []
+
+    def crashing_enqueue(messages):
+        calls.append(messages)
+        if len(calls) == 2:
+            raise SystemExit("worker killed")
+        return outbox.enqueue_messages(messages)
+
+    monkeypatch.setattr(tasks, "enqueue_messages", crashing_enqueue)
+    freeze_now(8, 0)
+
+    with pytest.raises(SystemExit):
+        tasks.send_habits_reminders()
+
+    # Первая пачка закоммичена целиком, вторая откатилась целиком
+    assert Habit.objects.filter(last_notified_at__isnull=False).count() == 1
+    assert OutboxMessage.objects.count() == 1
+    # Водяной знак не сдвинут; следующий запуск выберет всё ещё due вторую привычку
+    assert not ReminderWatermark.objects.exists()
+
+    # Блокировка запуска и ключи откатившейся пачки сняты - повтор не считается дублем
+    monkeypatch.setattr(tasks, "enqueue_messages", outbox.enqueue_messages)
+    tasks.send_habits_reminders()
+    assert Habit.objects.filter(last_notified_at__isnull=False).count() == 2
+    assert OutboxMessage.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_late_run_catches_up_whole_window(tg_user, freeze_now, sent_messages, task_log, settings):
+    settings.HABITS_REMINDER_SHARDS = 1
+    freeze_now(7, 0)
+    make_habit(tg_user, "08:00", action="Зарядка")
+    make_habit(tg_user, "08:02", action="Прогулка")
+    make_habit(tg_user, "08:10", action="Чтение")
+
+    freeze_now(7, 59)
+    assert run_reminders(sent_messages) == 0
+    watermark = ReminderWatermark.objects.get()
+    assert watermark.processed_until == timezone.make_aware(datetime(2026, 1, 10, 7, 59, 5))
+
+    # beat опоздал на несколько минут: обе пропущенные минуты уходят одним запуском
+    now = freeze_now(8, 4)
+    assert run_reminders(sent_messages) == 2
+    actions = sorted(text.split("\n")[1] for _, text in sent_messages)
+    assert actions == ["Действие: Зарядка", "Действие: Прогулка"]
+    assert ReminderWatermark.objects.get().processed_until == now
+    assert "habits_due=2" in task_log.text
+
+
+@pytest.mark.django_db
+def test_habit_due_below_watermark_is_still_sent(tg_user, freeze_now, sent_messages, settings):
+    settings.HABITS_REMINDER_SHARDS = 1
+    freeze_now(7, 0)
+    habit = make_habit(tg_user, "08:00", action="Зарядка")
+
+    now = freeze_now(8, 5)
+    # Запуск уже отчитался за 08:05, а строка стала due задним числом (откат транзакции,
+    # отставшая реплика): нижней границы у выборки нет, и привычка не теряется
+    ReminderWatermark.objects.create(name=tasks.WATERMARK_NAME, processed_until=now)
+    Habit.objects.filter(id=habit.id).update(next_due_at=now.replace(minute=0))
+
+    assert run_reminders(sent_messages) == 1
+
+    assert run_reminders(sent_messages) == 0
+
+
+@pytest.mark.django_db
+def test_too_late_reminders_are_skipped(tg_user, freeze_now, sent_messages, settings):
+    settings.HABITS_REMINDER_MAX_LATENESS = 3600
+    freeze_now(7, 0)
+    habit = make_habit(tg_user, "08:00")
+
+    # Воркеры простаивали почти три часа: напоминание о 08:00 уже неактуально
+    freeze_now(10, 50)
+    assert run_reminders(sent_messages) == 0
+
+    habit.refresh_from_db()
+    assert habit.last_notified_at is None
+    assert habit.next_due_at == timezone.make_aware(datetime(2026, 1, 11, 8, 0))
+
+
+@pytest.mark.django_db
+def test_pleasant_habit_turned_useful_is_rescheduled(tg_user, freeze_now):
+    freeze_now(7, 0, day=1)
+    habit = make_habit(tg_user, "08:00", is_pleasant=True, reward=None)
+
+    freeze_now(9, 0)
+    habit.is_pleasant = False
+    habit.save(update_fields=["is_pleasant"])
+
+    habit.refresh_from_db()
+    assert habit.next_due_at == timezone.make_aware(datetime(2026, 1, 11, 8, 0))
+
+
+@pytest.mark.django_db
+def test_shard_streams_projection_without_count(tg_user, freeze_now, sent_messages):
+    freeze_now(7, 0)
+    pleasant = make_habit(tg_user, "20:00", action="Ванна", is_pleasant=True, reward=None)
+    make_habit(tg_user, "08:00", reward=None, related_habit=pleasant)
+    make_habit(tg_user, "08:00")
+
+    now = freeze_now(8, 0)
+    with CaptureQueriesContext(connection) as queries:
+        counters = tasks.send_habits_reminders_shard(now.isoformat(), 0, 1)
+
+    assert counters["queued"] == 2
+    selects = [query["sql"] for query in queries if query["sql"].startswith('SELECT "habits_habit"')]
+    # Один SELECT привычек по окну и одна перепроверка пачки по id, без COUNT и без лишних колонок
+    assert len(selects) == 2
+    assert '"habits_habit"."reminder_text"' not in selects[1]
+    assert not any("COUNT(" in query["sql"] for query in queries)
+    assert '"habits_habit"."duration"' not in selects[0]
+    # Текст награды уже в reminder_text: self-join на related_habit не нужен
+    assert 'JOIN "habits_habit"' not in selects[0]
+    assert "Награда: Ванна" in sent_messages[0][1]
+
+
+@pytest.mark.django_db
+def test_reminder_text_follows_habit_and_related_habit(tg_user):
+    pleasant = make_habit(tg_user, "20:00", action="Ванна", is_pleasant=True, reward=None)
+    habit = make_habit(tg_user, "08:00", action="Прогулка", place="Парк", reward=None, related_habit=pleasant)
+    assert habit.reminder_text == "Действие: Прогулка\nМесто: Парк\nВремя: 08:00\nНаграда: Ванна"
+
+    habit.place = "Набережная"
+    habit.save(update_fields=["place"])
+    habit.refresh_from_db()
+    assert "Место: Набережная" in habit.reminder_text
+
+    # Правка награды пересобирает тексты ссылающихся на неё привычек
+    pleasant.action = "Горячая ванна"
+    pleasant.save()
+    habit.refresh_from_db()
+    assert habit.reminder_text.endswith("Награда: Горячая ванна")
+
+    # Удаление награды (SET_NULL) - текст остаётся без неё
+    pleasant.delete()
+    habit.refresh_from_db()
+    assert habit.related_habit is None
+    assert habit.reminder_text == "Действие: Прогулка\nМесто: Набережная\nВремя: 08:00"
+
+
+@pytest.mark.django_db
+def test_run_is_skipped_while_previous_run_holds_lock(tg_user, freeze_now, sent_messages, task_log):
+    freeze_now(7, 0)
+    make_habit(tg_user, "08:00")
+
+    freeze_now(8, 0)
+    lock = ReminderRunLock()
+    token = lock.acquire()
+    assert run_reminders(sent_messages) == 0
+    assert "previous run still in progress" in task_log.text
+    assert not ReminderWatermark.objects.exists()
+
+    # Предыдущий запуск закончился - окно подхватывает следующий тик
+    lock.release(token)
+    freeze_now(8, 1)
+    assert run_reminders(sent_messages) == 1
+    assert lock.acquire() is not None
+
+
+@pytest.mark.django_db
+def test_failed_shard_releases_run_lock(tg_user, freeze_now, monkeypatch, task_log):
+    freeze_now(7, 0)
+    make_habit(tg_user, "08:00")
+    freeze_now(8, 0)
+    started = []
+    # Шарды ушли воркерам, колбэк ждёт их результатов
+    monkeypatch.setattr(tasks, "chord", lambda header: started.append)
+
+    tasks.send_habits_reminders()
+    lock = ReminderRunLock()
+    assert lock.acquire() is None
+
+    # Так backend Celery вызывает errback колбэка, когда один из шардов упал
+    callback = started[0]
+    for errback in callback.options["link_error"]:
+        celery_app.signature(errback)(SimpleNamespace(id="shard-1"), RuntimeError("shard failed"), None)
+
+    assert "shard failed" in task_log.text
+    assert lock.acquire() is not None
+    assert not ReminderWatermark.objects.exists()
+
+
+@pytest.mark.django_db
+def test_habit_claimed_by_overlapping_run_is_not_sent_twice(tg_user, freeze_now, sent_messages, task_log):
+    freeze_now(7, 0)
+    taken = make_habit(tg_user, "08:00", action="Зарядка")
+    make_habit(tg_user, "08:00", action="Прогулка")
+
+    # Пересекающийся запуск уже поставил ключ этой привычки и сейчас её отправляет
+    row = Habit.objects.filter(id=taken.id).values_list(*ReminderRecord.fields).get()
+    assert SentReminderKeys().claim([ReminderRecord(*row)]) == {taken.id}
+
+    freeze_now(8, 0)
+    assert run_reminders(sent_messages) == 1
+    assert "Прогулка" in sent_messages[0][1]
+    assert "duplicates=1" in task_log.text
+
+    # Отметку пишет запуск, которому принадлежит ключ
+    taken.refresh_from_db()
+    assert taken.last_notified_at is None
+
+
+@pytest.mark.django_db
+def test_reminders_follow_owner_timezone(tg_user, freeze_now, sent_messages):
+    berlin = zoneinfo.ZoneInfo("Europe/Berlin")
+    tg_user.profile.timezone = "Europe/Berlin"
+    tg_user.profile.save()
+
+    freeze_now(7, 0)
+    habit = make_habit(tg_user, "08:00")
+    # 08:00 по Берлину - это 10:00 по Москве (поясу проекта)
+    assert habit.next_due_at == datetime(2026, 1, 10, 8, 0, tzinfo=berlin)
+
+    freeze_now(8, 0)
+    assert run_reminders(sent_messages) == 0
+    freeze_now(10, 0)
+    assert run_reminders(sent_messages) == 1
+
+    habit.refresh_from_db()
+    assert habit.next_due_at == datetime(2026, 1, 11, 8, 0, tzinfo=berlin)
+
+    # Смена пояса пересчитывает абсолютный момент, местное время привычки то же
+    profile = tg_user.profile.__class__.objects.get(user=tg_user)
+    profile.timezone = "Asia/Tokyo"
+    profile.save(update_fields=["timezone"])
+    habit.refresh_from_db()
+    assert habit.next_due_at == datetime(2026, 1, 11, 8, 0, tzinfo=zoneinfo.ZoneInfo("Asia/Tokyo"))
+
+
+def test_next_reminder_at_crosses_dst_in_local_time():
+    berlin = zoneinfo.ZoneInfo("Europe/Berlin")
+    # 29.03.2026 Берлин переходит на летнее время: 08:00 CET = 07:00 UTC, 08:00 CEST = 06:00 UTC
+    sent_at = datetime(2026, 3, 28, 8, 0, 5, tzinfo=berlin)
+    due = next_reminder_at("08:00", 1, sent_at, now=sent_at, tz=berlin)
+
+    utc = zoneinfo.ZoneInfo("UTC")
+    assert due == datetime(2026, 3, 29, 8, 0, tzinfo=berlin)
+    assert due.astimezone(utc) == datetime(2026, 3, 29, 6, 0, tzinfo=utc)
+    # Сутки перехода короче на час
+    assert (due.astimezone(utc) - sent_at.astimezone(utc)).total_seconds() == 23 * 3600 - 5
+
+
+@pytest.mark.django_db
+def test_reminders_are_split_into_shards(freeze_now, sent_messages, settings, task_log):
+    settings.HABITS_REMINDER_SHARDS = 3
+    freeze_now(7, 0)
+    for i in range(4):
+        make_habit(make_chat_user(f"shard_user_{i}", str(1000 + i)), "08:00")
+
+    freeze_now(8, 0)
+    assert tasks.send_habits_reminders() == 3
+
+    # Каждая привычка ровно в одном шарде, итог chord суммирует все шарды
+    assert sorted(chat_id for chat_id, _ in sent_messages) == ["1000", "1001", "1002", "1003"]
+    assert task_log.text.count("habits_due=") == 3
+    assert "shards=3 queued=4 messages=4" in task_log.text
+
+
+@pytest.mark.django_db
+def test_shards_are_owner_id_ranges(tg_user):
+    make_habit(tg_user, "08:00")
+
+    ranges = tasks._owner_ranges(3)
+
+    # Диапазоны идут подряд от 0, последний открыт: новые владельцы попадут в него
+    assert ranges[0][0] == 0 and ranges[-1][1] is None
+    assert all(until_id == after_id for (_, until_id), (after_id, _) in zip(ranges, ranges[1:]))
+    assert sum(1 for after_id, until_id in ranges if after_id < tg_user.id and (
+        until_id is None or tg_user.id <= until_id)) == 1
+
+
+@pytest.mark.django_db
+def test_group_reminders_coalesces_habits_of_one_chat(tg_user, freeze_now, sent_messages):
+    tg_user.profile.group_reminders = True
+    tg_user.profile.save(update_fields=["group_reminders"])
+
+    freeze_now(7, 0)
+    pleasant = make_habit(tg_user, "20:00", action="Ванна", is_pleasant=True, reward=None)
+    make_habit(tg_user, "08:00", action="Зарядка", place="Дом", reward="Кофе")
+    make_habit(tg_user, "08:00", action="Прогулка", place="Парк", reward=None, related_habit=pleasant)
+    make_habit(tg_user, "08:00", action="Медитация", place="Балкон", reward="Чай")
+
+    other = make_chat_user("no_group", "777")
+    make_habit(other, "08:00", action="Чтение")
+    make_habit(other, "08:00", action="Растяжка")
+
+    now = freeze_now(8, 0)
+    # Одно сообщение на три привычки + два отдельных
+    assert run_reminders(sent_messages) == 3
+
+    grouped = [text for chat_id, text in sent_messages if chat_id == "100500"]
+    assert len(grouped) == 1
+    parts = ("Напоминание о привычках (3)", "Зарядка", "Награда: Кофе", "Парк", "Награда: Ванна", "Медитация")
+    for part in parts:
+        assert part in grouped[0]
+
+    # Пользователь без группировки по-прежнему получает по сообщению на привычку
+    assert len([chat_id for chat_id, _ in sent_messages if chat_id == "777"]) == 2
+
+    assert Habit.objects.filter(is_pleasant=False, last_notified_at=now).count() == 5
+
+
+@pytest.mark.django_db
+def test_group_reminders_split_to_telegram_message_limit(tg_user, freeze_now, sent_messages):
+    tg_user.profile.group_reminders = True
+    tg_user.profile.save(update_fields=["group_reminders"])
+
+    freeze_now(7, 0)
+    for number in range(30):
+        make_habit(tg_user, "08:00", action=f"{number} " + "🏃" * 120, place="Д" * 200)
+
+    now = freeze_now(8, 0)
+    messages = run_reminders(sent_messages)
+
+    assert messages > 1
+    for _chat_id, text in sent_messages:
+        assert len(text.encode("utf-16-le")) // 2 <= 4096
+    # Все привычки отправлены, каждая - ровно в одной части
+    assert sum(text.count("🏃" * 120) for _chat_id, text in sent_messages) == 30
+    assert Habit.objects.filter(last_notified_at=now).count() == 30
+
+
+@pytest.mark.django_db
+def test_timeline_follows_habit_and_profile_changes(redis_timeline, freeze_now):
+    freeze_now(9, 0)
+    user = make_chat_user("timeline_owner", "700")
+    habit = make_habit(user, "10:00")
+    pleasant = make_habit(user, "10:00", is_pleasant=True, reward=None)
+    member = ReminderTimeline.member(user.id, habit.id)
+
+    # Приятные привычки не напоминаются и в расписание не попадают
+    assert timeline_members(redis_timeline) == {member: habit.next_due_at.timestamp()}
+    assert ReminderTimeline.member(user.id, pleasant.id) not in timeline_members(redis_timeline)
+
+    habit.time = "11:30"
+    habit.save()
+    assert timeline_members(redis_timeline)[member] == habit.next_due_at.timestamp()
+
+    # Без telegram_chat_id напоминать некуда - член убирается, с ним - возвращается
+    user.profile.telegram_chat_id = None
+    user.profile.save()
+    assert timeline_members(redis_timeline) == {}
+    user.profile.telegram_chat_id = "700"
+    user.profile.save()
+    assert member in timeline_members(redis_timeline)
+
+    habit.delete()
+    assert timeline_members(redis_timeline) == {}
+
+
+@pytest.mark.django_db
+def test_timeline_backend_sends_due_habits_and_reschedules(
+    redis_timeline, freeze_now, sent_messages, django_assert_num_queries
+):
+    freeze_now(9, 0)
+    user = make_chat_user("timeline_sender", "701")
+    habit = make_habit(user, "10:00")
+
+    # Тихая минута: расписание в Redis пустое на сейчас - к БД не обращаемся
+    freeze_now(9, 30)
+    with django_assert_num_queries(0):
+        assert run_reminders(sent_messages) == 0
+
+    freeze_now(10, 0)
+    assert run_reminders(sent_messages) == 1
+    assert sent_messages[-1][0] == "701"
+
+    habit.refresh_from_db()
+    assert habit.next_due_at == timezone.make_aware(datetime(2026, 1, 11, 10, 0))
+    member = ReminderTimeline.member(user.id, habit.id)
+    assert timeline_members(redis_timeline)[member] == habit.next_due_at.timestamp()
+
+    # Повторный запуск в ту же минуту ничего не находит
+    assert run_reminders(sent_messages) == 0
+
+
+@pytest.mark.django_db
+def test_rebuild_reminder_timeline_command(redis_timeline, freeze_now):
+    freeze_now(9, 0)
+    user = make_chat_user("timeline_rebuild", "702")
+    habits = [make_habit(user, "10:00"), make_habit(user, "12:00")]
+    make_habit(User.objects.create_user(username="no_chat", password="pass12345"), "10:00")
+
+    redis_timeline.client.flushall()
+    call_command("rebuild_reminder_timeline")
+
+    assert timeline_members(redis_timeline) == {
+        ReminderTimeline.member(user.id, habit.id): habit.next_due_at.timestamp() for habit in habits
+    }
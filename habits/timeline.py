@@ -0,0 +1,123 @@
+from django.conf import settings
+
+from config.redis_client import get_redis
+from habits.models import Habit
+
+
+def timeline_enabled() -> bool:
+    return settings.HABITS_REMINDER_BACKEND == "redis"
+
+
+class ReminderTimeline:
+    """
+    Расписание напоминаний в Redis (HABITS_REMINDER_BACKEND=redis).
+
+    Все активные напоминания лежат в одном ZSET: член "owner_id:habit_id",
+    score - next_due_at в секундах unix. Поиск того, что пора отправить, -
+    ZRANGEBYSCORE: O(log n + due) и ни одного запроса к БД в тихие минуты.
+
+    Активное напоминание: полезная привычка с next_due_at, у владельца есть telegram_chat_id.
+    Расписание поддерживают сигналы Habit/UserProfile (habits.signals) и сама задача
+    напоминаний; восстановить его из БД можно командой rebuild_reminder_timeline.
+    """
+
+    key = "habits:reminders:timeline"
+
+    # Забираем due-члены и сразу сдвигаем их score на время аренды: параллельный запуск
+    # их не увидит, а если воркер упадёт, члены снова станут due после аренды.
+    claim_script = """
+    local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[3])
+    for _, member in ipairs(members) do
+        redis.call('ZADD', KEYS[1], ARGV[2], member)
+    end
+    return members
+    """
+
+    def __init__(self, client=None):
+        self.client = client or get_redis()
+        self._claim = self.client.register_script(self.claim_script)
+
+    @staticmethod
+    def member(owner_id: int, habit_id: int) -> str:
+        return f"{owner_id}:{habit_id}"
+
+    @staticmethod
+    def parse_member(member) -> tuple[int, int]:
+        if isinstance(member, bytes):
+            member = member.decode()
+        owner_id, habit_id = member.split(":")
+        return int(owner_id), int(habit_id)
+
+    def claim_due(self, now, limit: int | None = None) -> list[tuple[int, int]]:
+        """
+        Возвращает [(owner_id, habit_id), ...] напоминаний, которые пора отправить.
+        """
+        members = self._claim(
+            keys=[self.key],
+            args=[
+                now.timestamp(),
+                now.timestamp() + settings.HABITS_REMINDER_TIMELINE_LEASE,
+                limit or settings.HABITS_REMINDER_TIMELINE_BATCH_SIZE,
+            ],
+        )
+        return [self.parse_member(member) for member in members]
+
+    def sync(self, members) -> None:
+        """
+        Приводит члены [(owner_id, habit_id), ...] в соответствие с БД: один запрос и один pipeline.
+        Удалённые и ставшие неактивными привычки из расписания убираются.
+        """
+        members = list(members)
+        if not members:
+            return
+
+        rows = (
+            Habit.objects
+            .filter(id__in=[habit_id for _owner_id, habit_id in members])
+            .values_list("id", "owner_id", "is_pleasant", "next_due_at", "owner__profile__telegram_chat_id")
+        )
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrem(self.key, *(self.member(owner_id, habit_id) for owner_id, habit_id in members))
+        for habit_id, owner_id, is_pleasant, next_due_at, chat_id in rows:
+            if not is_pleasant and next_due_at and chat_id:
+                pipe.zadd(self.key, {self.member(owner_id, habit_id): next_due_at.timestamp()})
+        pipe.execute()
+
+    def sync_owner(self, owner_id: int) -> None:
+        habit_ids = Habit.objects.filter(owner_id=owner_id).values_list("id", flat=True)
+        self.sync((owner_id, habit_id) for habit_id in habit_ids)
+
+    def remove(self, owner_id: int, habit_id: int) -> None:
+        self.client.zrem(self.key, self.member(owner_id, habit_id))
+
+    def rebuild(self, chunk_size: int = 5000) -> int:
+        """
+        Полностью пересобирает расписание из БД. Возвращает число активных напоминаний.
+        """
+        tmp_key = f"{self.key}:rebuild"
+        self.client.delete(tmp_key)
+
+        total = 0
+        rows = (
+            Habit.objects
+            .filter(is_pleasant=False, next_due_at__isnull=False)
+            .filter(owner__profile__telegram_chat_id__isnull=False)
+            .values_list("id", "owner_id", "next_due_at")
+        )
+        batch = {}
+        for habit_id, owner_id, next_due_at in rows.iterator(chunk_size=chunk_size):
+            batch[self.member(owner_id, habit_id)] = next_due_at.timestamp()
+            if len(batch) >= chunk_size:
+                self.client.zadd(tmp_key, batch)
+                total += len(batch)
+                batch = {}
+        if batch:
+            self.client.zadd(tmp_key, batch)
+            total += len(batch)
+
+        # Подменяем расписание атомарно: задача напоминаний не увидит его пустым
+        if total:
+            self.client.rename(tmp_key, self.key)
+        else:
+            self.client.delete(self.key)
+        return total
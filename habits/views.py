@@ -1,40 +1,118 @@
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from config.db_router import ReplicaReadMixin
+
+from .bulk import HabitBulkWriter
+from .conditional import ConditionalGetMixin
+from .feed import PublicFeedCache
 from .models import Habit
-from .serializers import HabitSerializer
+from .serializers import HabitBulkSerializer, HabitSerializer, HabitValuesSerializer
 from .pagination import HabitPagination
 from .permissions import IsOwnerOrReadOnly
 
 
-class HabitViewSet(viewsets.ModelViewSet):
+class ValuesListMixin:
+    """
+    Списки привычек сериализуются из values() (HabitValuesSerializer), без экземпляров модели.
+    """
+
+    values_serializer = HabitValuesSerializer()
+
+    def list_response(self, request, *args, **kwargs):
+        queryset = self.values_serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.values_serializer.to_representation(page))
+        return Response(self.values_serializer.to_representation(queryset))
+
+
+class HabitViewSet(ReplicaReadMixin, ValuesListMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     CRUD для привычек пользователя.
     Пользователь видит и изменяет только свои привычки.
+    GET отдаёт ETag (карточка - ещё и Last-Modified), на совпавший условный запрос - 304.
+    GET читает с реплики, если она есть, кроме первых секунд после своей записи.
     """
 
     serializer_class = HabitSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     pagination_class = HabitPagination
+    # Бюджеты SQL-запросов (config.query_budget) с запросом пользователя при промахе кэша аутентификации
+    query_budgets = {
+        "list": 5,
+        "retrieve": 3,
+        "create": 4,
+        "update": 5,
+        "partial_update": 4,
+        "destroy": 4,
+        "bulk": 11,
+    }
 
     def get_queryset(self):
         # Пользователь должен видеть только свои привычки
-        return Habit.objects.filter(owner=self.request.user)
+        queryset = Habit.objects.filter(owner=self.request.user)
+        if self.action in ("update", "partial_update"):
+            # HabitSerializer.validate проверяет текущую связанную привычку - берём её тем же запросом
+            queryset = queryset.select_related("related_habit")
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "bulk":
+            return HabitBulkSerializer
+        return super().get_serializer_class()
 
     def perform_create(self, serializer):
         # Автоматически подставляем владельца привычки
         serializer.save(owner=self.request.user)
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Пакетное создание, изменение и удаление своих привычек (см. HabitBulkWriter).
+
+        {"create": [{...}], "update": [{"id": 1, ...}], "delete": [2, 3]} - при ошибке
+        в любом элементе ничего не пишется, а в ответе 400 ошибки по каждому элементу.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data, errors = HabitBulkWriter(request.user).apply(**serializer.validated_data)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
 
-class PublicHabitViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicHabitViewSet(
+    ReplicaReadMixin, ValuesListMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Список публичных привычек.
     Доступен всем авторизованным пользователям, только чтение.
+    Лента одна на всех, поэтому страницы отдаются из кэша (PublicFeedCache),
+    а промахи кэша читаются с реплики, если она есть.
     """
 
     serializer_class = HabitSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = HabitPagination
+    etag_per_user = False
+    # Промах кэша ленты; попадание обходится запросом пользователя при аутентификации
+    query_budgets = {"list": 5}
 
     def get_queryset(self):
         return Habit.objects.filter(is_public=True)
+
+    def use_replica(self, request) -> bool:
+        # Страница попадёт в кэш под новой версией для всех: после изменения ленты
+        # её считаем по default, пока реплика не догонит
+        return super().use_replica(request) and not PublicFeedCache().recently_changed()
+
+    def get_list_state(self) -> dict:
+        # Валидаторы меняются вместе с версией ленты: их агрегат тоже берём из кэша
+        return PublicFeedCache().get_state(self.request, super().get_list_state)
+
+    def list_response(self, request, *args, **kwargs):
+        compute = super().list_response
+        return Response(PublicFeedCache().get_page(request, lambda: compute(request, *args, **kwargs).data))
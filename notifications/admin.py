@@ -1,3 +1,55 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
 
-# Register your models here.
+from .models import Broadcast, OutboxMessage
+from .tasks import start_broadcast
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """
+    Исходящие сообщения: видно, что не доставилось и почему.
+    """
+
+    list_display = (
+        "id",
+        "chat_id",
+        "status",
+        "priority",
+        "attempts",
+        "next_attempt_at",
+        "created_at",
+        "sent_at",
+    )
+    list_filter = ("status", "priority")
+    search_fields = ("chat_id", "last_error")
+
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    """
+    Рассылки: создаётся черновик, запускается действием "Запустить рассылку".
+    Прогресс - счётчики подзадач и поставленных в outbox сообщений.
+    """
+
+    list_display = (
+        "id",
+        "text",
+        "timezone",
+        "status",
+        "chunks_done",
+        "chunks_total",
+        "recipients",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+    readonly_fields = ("status", "chunks_total", "chunks_done", "recipients", "started_at", "finished_at")
+    actions = ("run_broadcast",)
+
+    @admin.action(description="Запустить рассылку")
+    def run_broadcast(self, request, queryset):
+        ids = list(queryset.filter(status=Broadcast.Status.DRAFT).values_list("id", flat=True))
+        for broadcast_id in ids:
+            transaction.on_commit(lambda broadcast_id=broadcast_id: start_broadcast.delay(broadcast_id))
+        self.message_user(request, f"Запущено рассылок: {len(ids)}", messages.SUCCESS)
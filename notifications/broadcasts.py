@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from notifications.models import Broadcast, OutboxMessage
+from notifications.outbox import enqueue_messages
+from users.models import UserProfile
+
+
+def recipients_queryset(broadcast: Broadcast):
+    """
+    Профили получателей рассылки: только с непустым telegram_chat_id и по фильтрам рассылки.
+    """
+    profiles = UserProfile.objects.filter(telegram_chat_id__isnull=False).filter(~Q(telegram_chat_id=""))
+    if broadcast.only_active:
+        profiles = profiles.filter(user__is_active=True)
+    if broadcast.timezone:
+        profiles = profiles.filter(timezone=broadcast.timezone)
+    return profiles
+
+
+def chunk_bounds(profiles, chunk_size: int | None = None):
+    """
+    Делит получателей на диапазоны id профилей (after_id, until_id] по chunk_size строк.
+
+    Каждая граница - один запрос по индексу первичного ключа от предыдущей границы
+    (keyset), сами строки получателей здесь не читаются. until_id=None у последнего
+    диапазона: в него попадут и профили, появившиеся после разбиения.
+    """
+    chunk_size = chunk_size or settings.NOTIFICATIONS_BROADCAST_CHUNK_SIZE
+    ids = profiles.order_by("id").values_list("id", flat=True)
+    after_id = 0
+    while True:
+        boundary = list(ids.filter(id__gt=after_id)[chunk_size - 1:chunk_size])
+        if not boundary:
+            break
+        yield after_id, boundary[0]
+        after_id = boundary[0]
+    if ids.filter(id__gt=after_id).exists():
+        yield after_id, None
+
+
+def enqueue_chunk(broadcast: Broadcast, after_id: int, until_id: int | None) -> int:
+    """
+    Ставит в outbox сообщения рассылки для профилей из диапазона (after_id, until_id].
+
+    Сообщения и счётчики прогресса пишутся в одной транзакции: упавшая подзадача
+    не оставит половину диапазона в outbox, и счётчики совпадают с outbox.
+    """
+    profiles = recipients_queryset(broadcast).filter(id__gt=after_id)
+    if until_id is not None:
+        profiles = profiles.filter(id__lte=until_id)
+    chat_ids = profiles.values_list("telegram_chat_id", flat=True)
+
+    with transaction.atomic():
+        queued = enqueue_messages(
+            ((chat_id, broadcast.text) for chat_id in chat_ids), priority=OutboxMessage.Priority.BROADCAST
+        )
+        Broadcast.objects.filter(id=broadcast.id).update(
+            recipients=F("recipients") + queued,
+            chunks_done=F("chunks_done") + 1,
+        )
+    return queued
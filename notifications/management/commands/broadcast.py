@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from notifications.models import Broadcast
+from notifications.tasks import start_broadcast
+
+
+class Command(BaseCommand):
+    """
+    Рассылка сообщения всем пользователям с telegram_chat_id.
+
+    Команда только создаёт рассылку и ставит start_broadcast в очередь:
+    получателей в outbox раскладывают подзадачи на воркерах Celery,
+    прогресс виден в админке (Рассылки).
+
+        python manage.py broadcast "Сервис обновлён" --timezone Europe/Moscow
+    """
+
+    help = "Поставить в очередь рассылку сообщения пользователям с Telegram"
+
+    def add_arguments(self, parser):
+        parser.add_argument("text", help="Текст сообщения")
+        parser.add_argument("--timezone", default="", help="Только пользователи с этим часовым поясом")
+        parser.add_argument(
+            "--include-inactive", action="store_true", help="Отправить и пользователям с is_active=False"
+        )
+
+    def handle(self, *args, **options):
+        broadcast = Broadcast.objects.create(
+            text=options["text"],
+            timezone=options["timezone"],
+            only_active=not options["include_inactive"],
+        )
+        start_broadcast.delay(broadcast.id)
+        self.stdout.write(self.style.SUCCESS(f"Broadcast {broadcast.id} queued"))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Broadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('timezone', models.CharField(blank=True, default='', help_text='Если задан - только пользователи с этим поясом в профиле.', max_length=64, verbose_name='Часовой пояс получателей')),
+                ('only_active', models.BooleanField(default=True, help_text='Не отправлять пользователям с is_active=False.', verbose_name='Только активные')),
+                ('status', models.CharField(choices=[('draft', 'Черновик'), ('running', 'Ставится в очередь'), ('done', 'Поставлена в очередь')], default='draft', max_length=16, verbose_name='Статус')),
+                ('chunks_total', models.PositiveIntegerField(default=0, verbose_name='Подзадач всего')),
+                ('chunks_done', models.PositiveIntegerField(default=0, verbose_name='Подзадач выполнено')),
+                ('recipients', models.PositiveIntegerField(default=0, verbose_name='Поставлено сообщений')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Запущена')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+            ],
+            options={
+                'verbose_name': 'Рассылка',
+                'verbose_name_plural': 'Рассылки',
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_broadcast'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outboxmessage',
+            name='outbox_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='priority',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Напоминание'), (10, 'Рассылка')], default=0, help_text='Сообщения с меньшим значением забираются на отправку раньше.', verbose_name='Приоритет'),
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['priority', 'next_attempt_at'], name='outbox_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_outbox_priority'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='broadcast',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Черновик'), ('running', 'Ставится в очередь'), ('done', 'Поставлена в очередь'), ('failed', 'Ошибка постановки')], default='draft', max_length=16, verbose_name='Статус'),
+        ),
+    ]
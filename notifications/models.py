@@ -1,3 +1,176 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class OutboxMessage(models.Model):
+    """
+    Исходящее Telegram-сообщение (outbox).
+
+    Задачи, которые решают "кому и что отправить" (напоминания, рассылки), только
+    пишут сюда строки. Доставкой занимается notifications.tasks.deliver_outbox:
+    забирает строки через SELECT ... FOR UPDATE SKIP LOCKED, отправляет и при ошибке
+    повторяет с экспоненциальной задержкой, а после N попыток переводит в DEAD.
+
+    Очередь общая, но не FIFO: строки забираются по (priority, next_attempt_at), поэтому
+    напоминания уходят раньше поставленной до них рассылки на сотни тысяч сообщений.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Ожидает отправки"
+        SENT = "sent", "Отправлено"
+        DEAD = "dead", "Не доставлено"
+
+    class Priority(models.IntegerChoices):
+        # Меньше - раньше
+        REMINDER = 0, "Напоминание"
+        BROADCAST = 10, "Рассылка"
+
+    chat_id = models.CharField(
+        max_length=64,
+        verbose_name="Telegram chat_id",
+        help_text="Получатель сообщения.",
+    )
+
+    payload = models.JSONField(
+        verbose_name="Содержимое",
+        help_text='Параметры sendMessage, например {"text": "..."}.',
+    )
+
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Статус",
+    )
+
+    priority = models.PositiveSmallIntegerField(
+        choices=Priority.choices,
+        default=Priority.REMINDER,
+        verbose_name="Приоритет",
+        help_text="Сообщения с меньшим значением забираются на отправку раньше.",
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Попыток отправки",
+    )
+
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Следующая попытка",
+        help_text="Раньше этого момента сообщение не забирается на отправку.",
+    )
+
+    last_error = models.TextField(
+        blank=True,
+        default="",
+        verbose_name="Последняя ошибка",
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Создано",
+    )
+
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Отправлено",
+    )
+
+    class Meta:
+        verbose_name = "Исходящее сообщение"
+        verbose_name_plural = "Исходящие сообщения"
+        indexes = [
+            # Под выборку deliver_outbox: status='pending' AND next_attempt_at <= now
+            # ORDER BY priority, next_attempt_at
+            models.Index(
+                fields=["priority", "next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="outbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Outbox({self.chat_id}, {self.status})"
+
+
+class Broadcast(models.Model):
+    """
+    Рассылка администратора: одно сообщение всем пользователям с telegram_chat_id
+    (с учётом фильтров).
+
+    notifications.tasks.start_broadcast делит получателей на диапазоны id профилей
+    (keyset, без OFFSET по таблице) и раздаёт их подзадачам send_broadcast_chunk: каждая
+    пишет свой диапазон в outbox одним INSERT и увеличивает счётчики прогресса.
+    """
+
+    class Status(models.TextChoices):
+        DRAFT = "draft", "Черновик"
+        RUNNING = "running", "Ставится в очередь"
+        DONE = "done", "Поставлена в очередь"
+        FAILED = "failed", "Ошибка постановки"
+
+    text = models.TextField(
+        verbose_name="Текст",
+    )
+
+    timezone = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        verbose_name="Часовой пояс получателей",
+        help_text="Если задан - только пользователи с этим поясом в профиле.",
+    )
+
+    only_active = models.BooleanField(
+        default=True,
+        verbose_name="Только активные",
+        help_text="Не отправлять пользователям с is_active=False.",
+    )
+
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.DRAFT,
+        verbose_name="Статус",
+    )
+
+    chunks_total = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Подзадач всего",
+    )
+
+    chunks_done = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Подзадач выполнено",
+    )
+
+    recipients = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Поставлено сообщений",
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Создана",
+    )
+
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Запущена",
+    )
+
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Завершена",
+    )
+
+    class Meta:
+        verbose_name = "Рассылка"
+        verbose_name_plural = "Рассылки"
+
+    def __str__(self) -> str:
+        return f"Broadcast({self.id}, {self.status})"
@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from config.redis_client import RedisLock
+from notifications.models import OutboxMessage
+from notifications.services import send_many
+
+
+class DeliveryLock(RedisLock):
+    """
+    Блокировка доставки: outbox разбирает один запуск deliver_outbox за раз.
+
+    Общий лимит Telegram (~30 сообщений/с на бота) всё равно делят все отправители,
+    поэтому параллельные запуски доставку не ускоряют, а только занимают слоты воркеров.
+    Истекает вместе с арендой забранных строк (NOTIFICATIONS_OUTBOX_LEASE): если воркер
+    умер, следующий запуск заберёт и блокировку, и вернувшиеся в очередь строки.
+    """
+
+    key = "notifications:outbox:deliver-lock"
+
+    @property
+    def timeout(self) -> int:
+        return settings.NOTIFICATIONS_OUTBOX_LEASE
+
+
+def has_due() -> bool:
+    """
+    Есть ли в outbox сообщения, которые пора отправить.
+    """
+    return OutboxMessage.objects.filter(
+        status=OutboxMessage.Status.PENDING, next_attempt_at__lte=timezone.now()
+    ).exists()
+
+
+def enqueue_messages(messages, priority: int = OutboxMessage.Priority.REMINDER) -> int:
+    """
+    Пишет пачку сообщений [(chat_id, text), ...] в outbox одним INSERT.
+
+    priority - очерёдность доставки (OutboxMessage.Priority): массовые рассылки ставятся
+    с BROADCAST, чтобы не задерживать напоминания.
+
+    Вызывать внутри той же транзакции, что и бизнес-изменения (например отметку
+    last_notified_at), тогда сообщение и отметка появятся или пропадут вместе.
+    """
+    now = timezone.now()
+    rows = [
+        OutboxMessage(chat_id=chat_id, payload={"text": text}, priority=priority, next_attempt_at=now)
+        for chat_id, text in messages
+    ]
+    OutboxMessage.objects.bulk_create(rows)
+    return len(rows)
+
+
+def claim_batch(batch_size: int | None = None) -> list[OutboxMessage]:
+    """
+    Забирает пачку сообщений, которые пора отправить.
+
+    SELECT ... FOR UPDATE SKIP LOCKED: параллельные воркеры получают разные строки
+    и не ждут друг друга. Забранным строкам next_attempt_at сдвигается на время аренды
+    (NOTIFICATIONS_OUTBOX_LEASE), поэтому после коммита их не заберёт никто другой,
+    а если воркер умрёт посреди отправки, строки вернутся в очередь сами.
+
+    Сначала забираются строки с меньшим priority: напоминание, поставленное после
+    рассылки, не ждёт, пока уйдёт вся рассылка.
+    """
+    batch_size = batch_size or settings.NOTIFICATIONS_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=OutboxMessage.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("priority", "next_attempt_at")[:batch_size]
+        )
+        if messages:
+            OutboxMessage.objects.filter(id__in=[message.id for message in messages]).update(
+                next_attempt_at=now + timedelta(seconds=settings.NOTIFICATIONS_OUTBOX_LEASE)
+            )
+    return messages
+
+
+def deliver_batch(messages: list[OutboxMessage], counters: dict) -> None:
+    """
+    Отправляет забранную пачку и записывает результат одним UPDATE.
+
+    Ошибка -> повтор через NOTIFICATIONS_OUTBOX_BACKOFF * 2^(attempts-1) секунд,
+    после NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS попыток -> DEAD.
+    """
+    results = send_many((message.chat_id, message.payload["text"]) for message in messages)
+    now = timezone.now()
+
+    for message, result in zip(messages, results):
+        message.attempts += 1
+        counters["queue_wait_total"] += result.waited
+        counters["queue_wait_max"] = max(counters["queue_wait_max"], result.waited)
+
+        if result.ok:
+            message.status = OutboxMessage.Status.SENT
+            message.sent_at = now
+            message.last_error = ""
+            counters["sent"] += 1
+            continue
+
+        message.last_error = result.error
+        if message.attempts >= settings.NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS:
+            message.status = OutboxMessage.Status.DEAD
+            counters["dead"] += 1
+        else:
+            backoff = settings.NOTIFICATIONS_OUTBOX_BACKOFF * 2 ** (message.attempts - 1)
+            message.next_attempt_at = now + timedelta(seconds=backoff)
+            counters["retried"] += 1
+
+    OutboxMessage.objects.bulk_update(
+        messages,
+        ["status", "attempts", "next_attempt_at", "sent_at", "last_error"],
+    )
@@ -0,0 +1,149 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+
+
+class BaseRateLimiter(ABC):
+    """
+    Планировщик отправок под лимиты Telegram.
+
+    Два ведра токенов (token bucket) в форме GCRA: общее на бота (global_rate в секунду)
+    и отдельное на каждый чат (per_chat_rate в секунду). Токен берётся в момент
+    фактической отправки, а не заранее: сообщение, ждущее свой чат, не занимает
+    общий слот, и сообщения в другие чаты уходят без задержки. Так пачка растягивается
+    на минимально допустимое окно.
+    """
+
+    @abstractmethod
+    def try_acquire(self, chat_id: str) -> float:
+        """
+        Пытается взять слот. Возвращает 0, если можно отправлять, иначе сколько ждать.
+        """
+
+    @abstractmethod
+    def penalize(self, retry_after: float) -> None:
+        """
+        Telegram ответил 429: до retry_after секунд не отправляем ничего.
+        """
+
+    def wait(self, chat_id: str) -> float:
+        """
+        Блокирует поток до разрешённого слота. Возвращает, сколько секунд ждали.
+        """
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(chat_id)
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+
+class InMemoryRateLimiter(BaseRateLimiter):
+    """
+    Лимиты в пределах одного процесса (TELEGRAM_RATE_LIMIT_BACKEND=memory).
+
+    У каждого процесса свой бюджет: N процессов доставки вместе отправят до N * global_rate
+    сообщений в секунду, поэтому годится только для одного процесса.
+    """
+
+    # Выше этого размера из словаря чатов вычищаются уже неактуальные записи
+    max_tracked_chats = 10_000
+
+    def __init__(self, global_rate: float, per_chat_rate: float):
+        self.global_interval = 1.0 / global_rate
+        self.chat_interval = 1.0 / per_chat_rate
+        self._global_tat = 0.0
+        self._chat_tat = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, chat_id: str) -> float:
+        with self._lock:
+            now = time.monotonic()
+            ready_at = max(self._global_tat, self._chat_tat.get(chat_id, 0.0))
+            if ready_at > now:
+                return ready_at - now
+
+            self._global_tat = now + self.global_interval
+            self._chat_tat[chat_id] = now + self.chat_interval
+
+            if len(self._chat_tat) > self.max_tracked_chats:
+                self._chat_tat = {key: tat for key, tat in self._chat_tat.items() if tat > now}
+            return 0.0
+
+    def penalize(self, retry_after: float) -> None:
+        with self._lock:
+            self._global_tat = max(self._global_tat, time.monotonic() + retry_after)
+
+
+class RedisRateLimiter(BaseRateLimiter):
+    """
+    Те же лимиты, но состояние в Redis: все воркеры делят один бюджет бота (по умолчанию).
+
+    Проверка и взятие слота - один Lua-скрипт (атомарно), время берётся с сервера Redis,
+    поэтому расхождение часов воркеров не важно.
+    """
+
+    key_prefix = "telegram:ratelimit"
+
+    acquire_script = """
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+    local global_tat = tonumber(redis.call('GET', KEYS[1]) or now)
+    local chat_tat = tonumber(redis.call('GET', KEYS[2]) or now)
+    local ready_at = math.max(global_tat, chat_tat)
+    if ready_at > now then
+        return ready_at - now
+    end
+
+    local global_interval = tonumber(ARGV[1])
+    local chat_interval = tonumber(ARGV[2])
+    redis.call('SET', KEYS[1], now + global_interval, 'PX', global_interval + 1000)
+    redis.call('SET', KEYS[2], now + chat_interval, 'PX', chat_interval + 1000)
+    return 0
+    """
+
+    penalize_script = """
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+    local until_ms = now + tonumber(ARGV[1])
+    local global_tat = tonumber(redis.call('GET', KEYS[1]) or now)
+    if until_ms > global_tat then
+        redis.call('SET', KEYS[1], until_ms, 'PX', until_ms - now + 1000)
+    end
+    return 0
+    """
+
+    def __init__(self, client, global_rate: float, per_chat_rate: float):
+        self.client = client
+        # В Redis храним миллисекунды: целые числа без потерь точности
+        self.global_interval = max(1, int(1000 / global_rate))
+        self.chat_interval = max(1, int(1000 / per_chat_rate))
+        self._acquire = client.register_script(self.acquire_script)
+        self._penalize = client.register_script(self.penalize_script)
+
+    def try_acquire(self, chat_id: str) -> float:
+        wait_ms = self._acquire(
+            keys=[f"{self.key_prefix}:global", f"{self.key_prefix}:chat:{chat_id}"],
+            args=[self.global_interval, self.chat_interval],
+        )
+        return int(wait_ms) / 1000
+
+    def penalize(self, retry_after: float) -> None:
+        self._penalize(keys=[f"{self.key_prefix}:global"], args=[int(retry_after * 1000)])
+
+
+def build_rate_limiter() -> BaseRateLimiter:
+    """
+    Создаёт лимитер по настройкам TELEGRAM_RATE_LIMIT_*.
+    """
+    global_rate = settings.TELEGRAM_RATE_LIMIT_GLOBAL
+    per_chat_rate = settings.TELEGRAM_RATE_LIMIT_PER_CHAT
+
+    if settings.TELEGRAM_RATE_LIMIT_BACKEND == "redis":
+        from config.redis_client import get_redis
+
+        return RedisRateLimiter(get_redis(), global_rate, per_chat_rate)
+    return InMemoryRateLimiter(global_rate, per_chat_rate)
@@ -1,22 +1,189 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
 import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from notifications.ratelimit import build_rate_limiter
+
+# Лимит Bot API на длину текста sendMessage: длиннее - ответ 400 Bad Request.
+# Telegram считает длину в кодовых единицах UTF-16 (эмодзи вне BMP - за две)
+TELEGRAM_MESSAGE_MAX_LENGTH = 4096
 
 
 class TelegramError(Exception):
     """Ошибка при отправке сообщения в Telegram."""
 
 
+class TelegramRetryAfter(TelegramError):
+    """Telegram ответил 429: повторить можно не раньше чем через retry_after секунд."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class SendResult:
+    """
+    Результат отправки одного сообщения из send_many().
+    """
+
+    chat_id: str
+    ok: bool
+    error: str = ""
+    # Сколько секунд сообщение ждало своего слота в лимитере (включая паузы после 429)
+    waited: float = 0.0
+
+
+class TelegramClient:
+    """
+    Клиент Telegram Bot API с пулом соединений.
+
+    - один requests.Session с keep-alive: TCP+TLS рукопожатие не повторяется на каждое сообщение
+    - размер пула соединений задаётся pool_size (TELEGRAM_POOL_SIZE)
+    - send_many() отправляет пачку сообщений параллельно в пуле потоков (TELEGRAM_SEND_CONCURRENCY)
+    - каждое сообщение ждёт слот в лимитере (30/с на бота, 1/с на чат), после 429
+      клиент выдерживает retry_after и повторяет отправку до TELEGRAM_MAX_RETRIES раз
+
+    Session и пул потоков создаются лениво, чтобы не переживать fork воркеров Celery.
+    """
+
+    def __init__(self, api_url=None, pool_size=None, concurrency=None, timeout=None, rate_limiter=None):
+        self.api_url = (api_url or settings.TELEGRAM_API_URL).rstrip("/")
+        self.pool_size = pool_size or settings.TELEGRAM_POOL_SIZE
+        self.concurrency = concurrency or settings.TELEGRAM_SEND_CONCURRENCY
+        self.timeout = timeout or settings.TELEGRAM_TIMEOUT
+        self.max_retries = settings.TELEGRAM_MAX_RETRIES
+        self.rate_limiter = rate_limiter or build_rate_limiter()
+        self._session = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.concurrency,
+                        thread_name_prefix="telegram-send",
+                    )
+        return self._executor
+
+    def send(self, chat_id: str, text: str) -> float:
+        """
+        Отправляет одно сообщение с учётом лимитов. При ошибке поднимает TelegramError.
+
+        Возвращает, сколько секунд сообщение ждало в очереди лимитера.
+        """
+        waited = 0.0
+        attempt = 0
+        while True:
+            waited += self.rate_limiter.wait(chat_id)
+            try:
+                self._post(chat_id, text)
+                return waited
+            except TelegramRetryAfter as exc:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                # Telegram сам сказал, когда можно снова: притормаживаем весь бюджет бота
+                self.rate_limiter.penalize(exc.retry_after)
+
+    def _post(self, chat_id: str, text: str) -> None:
+        token = os.getenv("TELEGRAM_BOT_TOKEN", "")
+        if not token:
+            raise TelegramError("Не задан TELEGRAM_BOT_TOKEN в окружении.")
+
+        url = f"{self.api_url}/bot{token}/sendMessage"
+        payload = {"chat_id": chat_id, "text": text}
+
+        try:
+            resp = self.session.post(url, json=payload, timeout=self.timeout)
+        except requests.RequestException as exc:
+            raise TelegramError(f"Telegram API request failed: {exc}") from exc
+
+        if resp.status_code == 429:
+            retry_after = _retry_after(resp)
+            raise TelegramRetryAfter(f"Telegram API error: 429 {resp.text}", retry_after)
+        if resp.status_code != 200:
+            raise TelegramError(f"Telegram API error: {resp.status_code} {resp.text}")
+
+    def _send_one(self, chat_id: str, text: str) -> SendResult:
+        started = time.monotonic()
+        try:
+            waited = self.send(chat_id, text)
+        except TelegramError as exc:
+            return SendResult(chat_id=chat_id, ok=False, error=str(exc), waited=time.monotonic() - started)
+        return SendResult(chat_id=chat_id, ok=True, waited=waited)
+
+    def send_many(self, messages) -> list[SendResult]:
+        """
+        Отправляет пачку сообщений [(chat_id, text), ...] параллельно.
+
+        Результаты возвращаются в том же порядке, что и сообщения.
+        Ошибка одного сообщения не прерывает остальные.
+        """
+        messages = list(messages)
+        if not messages:
+            return []
+        if len(messages) == 1:
+            return [self._send_one(*messages[0])]
+
+        futures = [self.executor.submit(self._send_one, chat_id, text) for chat_id, text in messages]
+        return [future.result() for future in futures]
+
+
+def _retry_after(resp) -> float:
+    # {"ok": false, "error_code": 429, "parameters": {"retry_after": 5}}
+    try:
+        return float(resp.json()["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return 1.0
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_telegram_client() -> TelegramClient:
+    """
+    Общий на процесс клиент: соединения из пула переиспользуются всеми задачами.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = TelegramClient()
+    return _client
+
+
 def send_telegram_message(chat_id: str, text: str) -> None:
     """
     Отправляет сообщение в Telegram через Bot API.
     """
-    token = os.getenv("TELEGRAM_BOT_TOKEN", "")
-    if not token:
-        raise TelegramError("Не задан TELEGRAM_BOT_TOKEN в окружении.")
+    get_telegram_client().send(chat_id, text)
 
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {"chat_id": chat_id, "text": text}
 
-    resp = requests.post(url, json=payload, timeout=10)
-    if resp.status_code != 200:
-        raise TelegramError(f"Telegram API error: {resp.status_code} {resp.text}")
+def send_many(messages) -> list[SendResult]:
+    """
+    Пакетная отправка [(chat_id, text), ...], по результату на каждое сообщение.
+    """
+    return get_telegram_client().send_many(messages)
@@ -1,11 +1,15 @@
-from celery import shared_task
-from django.contrib.auth import get_user_model
 import logging
+import time
 
-from notifications.services import send_telegram_message
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from notifications.broadcasts import chunk_bounds, enqueue_chunk, recipients_queryset
+from notifications.models import Broadcast
+from notifications.outbox import DeliveryLock, claim_batch, deliver_batch, has_due
 
 logger = logging.getLogger("notifications")
-User = get_user_model()
 
 
 @shared_task
@@ -15,33 +19,150 @@ def ping():
 
 
 @shared_task
-def send_test_reminders():
+def send_test_reminders() -> int:
     """
     Тестовая периодическая задача:
     отправляет сообщение всем пользователям, у кого есть telegram_chat_id.
     Нужна, чтобы проверить связку Celery -> Django -> Telegram.
+
+    Это обычная рассылка (Broadcast): получатели ставятся в outbox пачками
+    в подзадачах, доставляет deliver_outbox. Возвращает id рассылки.
+    """
+    broadcast = Broadcast.objects.create(text="Тестовое напоминание из Celery")
+    start_broadcast.delay(broadcast.id)
+    return broadcast.id
+
+
+@shared_task
+def start_broadcast(broadcast_id: int) -> int:
+    """
+    Запуск рассылки.
+
+    Логика:
+    - делим получателей на диапазоны id профилей по NOTIFICATIONS_BROADCAST_CHUNK_SIZE (keyset)
+    - каждый диапазон - отдельная подзадача send_broadcast_chunk, подзадачи идут параллельно
+      на всех воркерах, ни один воркер не держит всю рассылку
+    - когда все подзадачи закончились, finish_broadcast отмечает рассылку выполненной
+      и один раз запускает доставку; если подзадача упала - fail_broadcast
+
+    Запускается только для черновика: повторный запуск той же рассылки ничего не делает.
+    Возвращает число подзадач.
+    """
+    if not Broadcast.objects.filter(id=broadcast_id, status=Broadcast.Status.DRAFT).update(
+        status=Broadcast.Status.RUNNING, started_at=timezone.now()
+    ):
+        logger.warning("start_broadcast: broadcast=%s already started", broadcast_id)
+        return 0
+
+    broadcast = Broadcast.objects.get(id=broadcast_id)
+    chunks = list(chunk_bounds(recipients_queryset(broadcast)))
+    Broadcast.objects.filter(id=broadcast_id).update(chunks_total=len(chunks))
+    logger.info("start_broadcast: broadcast=%s chunks=%s", broadcast_id, len(chunks))
+
+    if not chunks:
+        finish_broadcast([], broadcast_id)
+        return 0
+
+    # Без errback упавшая подзадача оставила бы рассылку в RUNNING навсегда
+    callback = finish_broadcast.s(broadcast_id).on_error(fail_broadcast.s(broadcast_id=broadcast_id))
+    chord(
+        group(send_broadcast_chunk.s(broadcast_id, after_id, until_id) for after_id, until_id in chunks)
+    )(callback)
+    return len(chunks)
+
+
+@shared_task
+def send_broadcast_chunk(broadcast_id: int, after_id: int, until_id: int | None) -> int:
+    """
+    Подзадача рассылки: ставит в outbox сообщения для профилей из (after_id, until_id].
+
+    Доставку не запускает: на большую рассылку это были бы сотни запусков deliver_outbox
+    в общей очереди Celery. Её один раз запускает колбэк рассылки.
     """
+    broadcast = Broadcast.objects.get(id=broadcast_id)
+    return enqueue_chunk(broadcast, after_id, until_id)
+
 
-    logger.info("send_test_reminders: started")
-    users = User.objects.select_related("profile").all()
-    logger.info("send_test_reminders: users_count=%s", users.count())
+@shared_task
+def finish_broadcast(results, broadcast_id: int) -> int:
+    """
+    Колбэк chord: все подзадачи рассылки выполнены, запускаем доставку.
+    """
+    Broadcast.objects.filter(id=broadcast_id).update(
+        status=Broadcast.Status.DONE, finished_at=timezone.now()
+    )
+    queued = sum(results)
+    logger.info("finish_broadcast: broadcast=%s chunks=%s queued=%s", broadcast_id, len(results), queued)
+    if queued:
+        deliver_outbox.delay()
+    return queued
+
+
+@shared_task
+def fail_broadcast(request, exc, traceback, broadcast_id: int) -> None:
+    """
+    Errback колбэка chord: подзадача рассылки упала.
 
-    sent = 0
+    Рассылка отмечается FAILED (счётчики показывают, сколько успели поставить), а уже
+    поставленные сообщения всё равно доставляются.
+    """
+    logger.error("finish_broadcast: broadcast=%s failed task_id=%s error=%r", broadcast_id, request.id, exc)
+    Broadcast.objects.filter(id=broadcast_id, status=Broadcast.Status.RUNNING).update(
+        status=Broadcast.Status.FAILED, finished_at=timezone.now()
+    )
+    deliver_outbox.delay()
+
+
+@shared_task
+def deliver_outbox() -> dict:
+    """
+    Доставка сообщений из outbox.
+
+    Логика:
+    - одновременно работает один запуск (DeliveryLock): остальные сразу выходят
+    - пачками забираем сообщения, которые пора отправить (FOR UPDATE SKIP LOCKED)
+    - отправляем пачку параллельно (send_many) с учётом лимитов Telegram
+    - ошибки повторяются с экспоненциальной задержкой, после N попыток - DEAD
+    - новые пачки забираем не дольше NOTIFICATIONS_OUTBOX_RUN_SECONDS: запуск укладывается
+      и в аренду строк, и в CELERY_TASK_TIME_LIMIT, поэтому его не убивают посреди пачки
+      и забранные строки не уходят второй раз; остаток доставит следующий запуск,
+      поставленный в конце этого
+
+    Запускается по расписанию (CELERY_BEAT_SCHEDULE) и сразу после постановки напоминаний
+    и рассылок.
+    """
+    counters = {"sent": 0, "retried": 0, "dead": 0, "queue_wait_total": 0.0, "queue_wait_max": 0.0}
 
-    for user in users:
-        chat_id = getattr(getattr(user, "profile", None), "telegram_chat_id", None)
-        logger.info("send_test_reminders: user=%s chat_id=%s", user.username, chat_id)
+    lock = DeliveryLock()
+    token = lock.acquire()
+    if token is None:
+        logger.info("deliver_outbox: skipped, another run in progress")
+        return counters
 
-        if not chat_id:
-            continue
+    deadline = time.monotonic() + settings.NOTIFICATIONS_OUTBOX_RUN_SECONDS
+    try:
+        while True:
+            messages = claim_batch()
+            if not messages:
+                break
+            deliver_batch(messages, counters)
+            if time.monotonic() >= deadline:
+                break
+    finally:
+        lock.release(token)
 
-        try:
-            send_telegram_message(chat_id, "Тестовое напоминание из Celery")
-            sent += 1
-            logger.info("send_test_reminders: sent_to=%s", user.username)
-        except Exception:
-            # Не роняем всю задачу из-за одной ошибки
-            logger.exception("send_test_reminders: failed_to_send user=%s", user.username)
+    # Продолжение, а заодно то, что поставили, пока этот запуск держал блокировку
+    # и уже не смотрел в очередь
+    if has_due():
+        deliver_outbox.delay()
 
-    logger.info("send_test_reminders: finished sent=%s", sent)
-    return sent
+    processed = counters["sent"] + counters["retried"] + counters["dead"]
+    logger.info(
+        "deliver_outbox: finished sent=%s retried=%s dead=%s queue_wait_avg=%.3fs queue_wait_max=%.3fs",
+        counters["sent"],
+        counters["retried"],
+        counters["dead"],
+        counters["queue_wait_total"] / processed if processed else 0.0,
+        counters["queue_wait_max"],
+    )
+    return counters
@@ -0,0 +1,113 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubTelegramServer:
+    """
+    Локальная заглушка Telegram Bot API для тестов и бенчмарков.
+
+    - принимает POST /bot<token>/sendMessage и отвечает {"ok": true}
+    - latency: задержка ответа в секундах (имитация сети)
+    - fail_chat_ids: для этих chat_id отвечает ошибкой 400
+    - error_rate: доля случайных ответов 500 (имитация сбоев Telegram)
+    - throttle_first: на столько первых запросов отвечает 429 с retry_after
+    - в messages копятся принятые сообщения, в received_at - моменты их приёма (time.perf_counter()),
+      в connections - адреса клиентских соединений
+
+    Использование:
+        with StubTelegramServer() as stub:
+            TelegramClient(api_url=stub.url).send("1", "text")
+    """
+
+    def __init__(self, latency: float = 0.0, fail_chat_ids=(), throttle_first: int = 0,
+                 retry_after: float = 1, error_rate: float = 0.0):
+        self.latency = latency
+        self.fail_chat_ids = {str(chat_id) for chat_id in fail_chat_ids}
+        self.throttle_first = throttle_first
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.messages = []
+        self.received_at = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubTelegramServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def respond(self, chat_id: str, text: str, client_address) -> tuple[int, dict]:
+        """
+        Решает, что ответить на сообщение. Точка расширения для наследников.
+        """
+        with self._lock:
+            self.connections.add(client_address)
+            if self.throttle_first > 0:
+                self.throttle_first -= 1
+                return 429, {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests",
+                    "parameters": {"retry_after": self.retry_after},
+                }
+            self.messages.append((chat_id, text))
+            self.received_at.append(time.perf_counter())
+
+        if self.error_rate and random.random() < self.error_rate:
+            return 500, {"ok": False, "error_code": 500, "description": "Internal Server Error"}
+        if chat_id in self.fail_chat_ids:
+            return 400, {"ok": False, "error_code": 400, "description": "Bad Request: chat not found"}
+        return 200, {"ok": True, "result": {"chat": {"id": chat_id}, "text": text}}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 нужен для keep-alive: иначе клиент не сможет переиспользовать соединение
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                status, body = stub.respond(
+                    str(payload.get("chat_id")), payload.get("text", ""), self.client_address
+                )
+                data = json.dumps(body).encode()
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                # Не засоряем вывод тестов access-логом
+                pass
+
+        return Handler
@@ -0,0 +1,186 @@
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from config.celery import app as celery_app
+from notifications import outbox
+from notifications.broadcasts import chunk_bounds, recipients_queryset
+from notifications.models import Broadcast, OutboxMessage
+from notifications.services import SendResult
+from notifications.tasks import fail_broadcast, send_broadcast_chunk, send_test_reminders, start_broadcast
+
+User = get_user_model()
+
+# Блокировка доставки (DeliveryLock) - в fakeredis
+pytestmark = pytest.mark.usefixtures("fake_redis")
+
+
+@pytest.fixture(autouse=True)
+def eager_celery(monkeypatch):
+    # chord рассылки выполняется синхронно, без брокера и result backend
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(celery_app.conf, "task_eager_propagates", True)
+
+
+@pytest.fixture
+def sent_messages(monkeypatch):
+    sent = []
+
+    def fake_send_many(messages):
+        messages = list(messages)
+        sent.extend(messages)
+        return [SendResult(chat_id=chat_id, ok=True) for chat_id, _ in messages]
+
+    monkeypatch.setattr(outbox, "send_many", fake_send_many)
+    return sent
+
+
+def make_users(count, chat=True, **profile):
+    users = []
+    for number in range(count):
+        user = User.objects.create_user(username=f"u{User.objects.count()}_{number}", password="pass12345")
+        user.profile.telegram_chat_id = str(user.id) if chat else None
+        for field, value in profile.items():
+            setattr(user.profile, field, value)
+        user.profile.save()
+        users.append(user)
+    return users
+
+
+@pytest.mark.django_db
+def test_chunk_bounds_cover_all_recipients_once():
+    make_users(5)
+    make_users(2, chat=False)
+    profiles = recipients_queryset(Broadcast(text="x"))
+
+    bounds = list(chunk_bounds(profiles, chunk_size=2))
+
+    assert len(bounds) == 3
+    assert bounds[0][0] == 0 and bounds[-1][1] is None
+    covered = []
+    for after_id, until_id in bounds:
+        chunk = profiles.filter(id__gt=after_id)
+        if until_id is not None:
+            chunk = chunk.filter(id__lte=until_id)
+        covered.extend(chunk.values_list("id", flat=True))
+    assert sorted(covered) == sorted(profiles.values_list("id", flat=True))
+
+
+@pytest.mark.django_db
+def test_broadcast_queues_only_users_with_chat(settings, sent_messages):
+    settings.NOTIFICATIONS_BROADCAST_CHUNK_SIZE = 2
+    users = make_users(5)
+    make_users(2, chat=False)
+    inactive = make_users(1)[0]
+    inactive.is_active = False
+    inactive.save()
+    broadcast = Broadcast.objects.create(text="Новости")
+
+    assert start_broadcast(broadcast.id) == 3
+
+    broadcast.refresh_from_db()
+    assert broadcast.status == Broadcast.Status.DONE
+    assert (broadcast.chunks_total, broadcast.chunks_done, broadcast.recipients) == (3, 3, 5)
+    assert broadcast.finished_at is not None
+    assert sorted(sent_messages) == sorted((str(user.id), "Новости") for user in users)
+    assert OutboxMessage.objects.filter(status=OutboxMessage.Status.SENT).count() == 5
+    assert set(OutboxMessage.objects.values_list("priority", flat=True)) == {OutboxMessage.Priority.BROADCAST}
+
+
+@pytest.mark.django_db
+def test_broadcast_timezone_filter(sent_messages):
+    berlin = make_users(2, timezone="Europe/Berlin")
+    make_users(3)
+    broadcast = Broadcast.objects.create(text="Привет", timezone="Europe/Berlin")
+
+    start_broadcast(broadcast.id)
+
+    assert sorted(chat_id for chat_id, _ in sent_messages) == sorted(str(user.id) for user in berlin)
+
+
+@pytest.mark.django_db
+def test_broadcast_starts_once(sent_messages):
+    make_users(2)
+    broadcast = Broadcast.objects.create(text="Один раз")
+
+    start_broadcast(broadcast.id)
+    assert start_broadcast(broadcast.id) == 0
+
+    assert OutboxMessage.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_broadcast_without_recipients_finishes(sent_messages):
+    make_users(1, chat=False)
+    broadcast = Broadcast.objects.create(text="Никому")
+
+    assert start_broadcast(broadcast.id) == 0
+
+    broadcast.refresh_from_db()
+    assert broadcast.status == Broadcast.Status.DONE
+    assert broadcast.recipients == 0
+
+
+@pytest.mark.django_db
+def test_broadcast_triggers_delivery_once(settings, monkeypatch):
+    settings.NOTIFICATIONS_BROADCAST_CHUNK_SIZE = 2
+    triggered = []
+    monkeypatch.setattr("notifications.tasks.deliver_outbox.delay", lambda: triggered.append(1))
+    make_users(5)
+    broadcast = Broadcast.objects.create(text="x")
+
+    assert start_broadcast(broadcast.id) == 3
+
+    assert len(triggered) == 1
+    assert OutboxMessage.objects.filter(status=OutboxMessage.Status.PENDING).count() == 5
+
+
+@pytest.mark.django_db
+def test_failed_chunk_marks_broadcast_failed_and_delivers_queued(sent_messages):
+    make_users(2)
+    broadcast = Broadcast.objects.create(text="x", status=Broadcast.Status.RUNNING, chunks_total=2)
+    send_broadcast_chunk(broadcast.id, 0, None)
+
+    fail_broadcast(SimpleNamespace(id="chunk-2"), RuntimeError("boom"), None, broadcast_id=broadcast.id)
+
+    broadcast.refresh_from_db()
+    assert broadcast.status == Broadcast.Status.FAILED
+    assert broadcast.finished_at is not None
+    assert len(sent_messages) == 2
+
+
+@pytest.mark.django_db
+def test_broadcast_chunk_query_count_does_not_grow():
+    make_users(50)
+    broadcast = Broadcast.objects.create(text="x")
+
+    with CaptureQueriesContext(connection) as queries:
+        assert send_broadcast_chunk(broadcast.id, 0, None) == 50
+
+    # рассылка + выборка получателей + INSERT outbox + счётчики (+ savepoint)
+    assert len(queries.captured_queries) <= 6
+
+
+@pytest.mark.django_db
+def test_send_test_reminders_is_a_broadcast(sent_messages):
+    users = make_users(2)
+    make_users(1, chat=False)
+
+    broadcast_id = send_test_reminders()
+
+    assert Broadcast.objects.get(id=broadcast_id).recipients == 2
+    assert sorted(chat_id for chat_id, _ in sent_messages) == sorted(str(user.id) for user in users)
+
+
+@pytest.mark.django_db
+def test_broadcast_command(sent_messages):
+    make_users(2)
+
+    call_command("broadcast", "Из консоли")
+
+    assert Broadcast.objects.get().recipients == 2
+    assert {text for _, text in sent_messages} == {"Из консоли"}
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from notifications import outbox
+from notifications.models import OutboxMessage
+from notifications.services import SendResult
+from notifications.tasks import deliver_outbox
+
+# Блокировка доставки (DeliveryLock) - в fakeredis
+pytestmark = pytest.mark.usefixtures("fake_redis")
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    """
+    Подмена send_many: чаты из failing отвечают ошибкой, остальные - успехом.
+    """
+    state = {"sent": [], "failing": set()}
+
+    def fake_send_many(messages):
+        results = []
+        for chat_id, text in messages:
+            if chat_id in state["failing"]:
+                results.append(SendResult(chat_id=chat_id, ok=False, error="Telegram API error: 502"))
+            else:
+                state["sent"].append((chat_id, text))
+                results.append(SendResult(chat_id=chat_id, ok=True))
+        return results
+
+    monkeypatch.setattr(outbox, "send_many", fake_send_many)
+    return state
+
+
+@pytest.mark.django_db
+def test_deliver_outbox_sends_pending_messages(telegram):
+    outbox.enqueue_messages([("1", "a"), ("2", "b")])
+
+    counters = deliver_outbox()
+
+    assert counters["sent"] == 2
+    assert sorted(telegram["sent"]) == [("1", "a"), ("2", "b")]
+    assert OutboxMessage.objects.filter(status=OutboxMessage.Status.SENT, sent_at__isnull=False).count() == 2
+
+
+@pytest.mark.django_db
+def test_failed_message_is_retried_with_backoff_then_dead(telegram, settings):
+    settings.NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS = 3
+    settings.NOTIFICATIONS_OUTBOX_BACKOFF = 10
+    telegram["failing"].add("1")
+    outbox.enqueue_messages([("1", "a")])
+    message = OutboxMessage.objects.get()
+
+    for attempt, backoff in ((1, 10), (2, 20)):
+        before = timezone.now()
+        deliver_outbox()
+        message.refresh_from_db()
+        assert message.status == OutboxMessage.Status.PENDING
+        assert message.attempts == attempt
+        assert message.next_attempt_at >= before + timedelta(seconds=backoff)
+
+        # Следующая попытка ещё не наступила: повторный запуск сообщение не трогает
+        deliver_outbox()
+        message.refresh_from_db()
+        assert message.attempts == attempt
+
+        OutboxMessage.objects.filter(id=message.id).update(next_attempt_at=timezone.now())
+
+    deliver_outbox()
+    message.refresh_from_db()
+    assert message.status == OutboxMessage.Status.DEAD
+    assert message.attempts == 3
+    assert "502" in message.last_error
+
+
+@pytest.mark.django_db
+def test_claimed_messages_are_leased(telegram):
+    outbox.enqueue_messages([("1", "a"), ("2", "b"), ("3", "c")])
+
+    first = outbox.claim_batch(batch_size=2)
+    second = outbox.claim_batch(batch_size=2)
+
+    # Пока аренда первой пачки не истекла, второй воркер получает только оставшееся
+    assert len(first) == 2
+    assert [message.chat_id for message in second] == ["3"]
+    assert outbox.claim_batch(batch_size=2) == []
+
+
+@pytest.mark.django_db
+def test_deliver_outbox_skips_while_another_run_delivers(telegram):
+    outbox.enqueue_messages([("1", "a")])
+    token = outbox.DeliveryLock().acquire()
+
+    assert deliver_outbox()["sent"] == 0
+    assert telegram["sent"] == []
+
+    outbox.DeliveryLock().release(token)
+    assert deliver_outbox()["sent"] == 1
+
+
+@pytest.mark.django_db
+def test_deliver_outbox_run_is_capped_and_continued(telegram, settings, monkeypatch):
+    settings.NOTIFICATIONS_OUTBOX_BATCH_SIZE = 2
+    settings.NOTIFICATIONS_OUTBOX_RUN_SECONDS = 0
+    continued = []
+    monkeypatch.setattr("notifications.tasks.deliver_outbox.delay", lambda: continued.append(True))
+    outbox.enqueue_messages([("1", "a"), ("2", "b"), ("3", "c")])
+
+    # Время запуска вышло после первой пачки: остаток доставит следующий запуск
+    assert deliver_outbox()["sent"] == 2
+    assert continued == [True]
+    assert outbox.DeliveryLock().acquire() is not None
+
+
+@pytest.mark.django_db
+def test_reminders_are_claimed_before_earlier_broadcast(telegram):
+    outbox.enqueue_messages(
+        [(str(chat), "рассылка") for chat in range(5)], priority=OutboxMessage.Priority.BROADCAST
+    )
+    outbox.enqueue_messages([("100", "напоминание")])
+
+    # Рассылка поставлена раньше, но напоминание не ждёт её целиком
+    first = outbox.claim_batch(batch_size=2)
+
+    assert [message.chat_id for message in first] == ["100", "0"]
@@ -0,0 +1,74 @@
+import time
+
+import fakeredis
+import pytest
+
+from notifications.ratelimit import InMemoryRateLimiter, RedisRateLimiter
+from notifications.services import TelegramClient
+from notifications.testing import StubTelegramServer
+
+
+def test_per_chat_limit_does_not_block_other_chats():
+    limiter = InMemoryRateLimiter(global_rate=1000, per_chat_rate=2)
+
+    assert limiter.try_acquire("1") == 0
+    assert limiter.try_acquire("1") == pytest.approx(0.5, abs=0.01)
+
+    # Ожидающий чат не занимает общий слот: другой чат ждёт только общий интервал
+    time.sleep(0.002)
+    assert limiter.try_acquire("2") == 0
+
+
+def test_global_burst_is_spread_evenly():
+    limiter = InMemoryRateLimiter(global_rate=20, per_chat_rate=1)
+
+    started = time.monotonic()
+    waited = [limiter.wait(str(chat_id)) for chat_id in range(5)]
+    elapsed = time.monotonic() - started
+
+    # 5 сообщений при 20/с - это 4 интервала по 50 мс
+    assert elapsed == pytest.approx(0.2, abs=0.05)
+    assert waited[0] == 0
+    assert sum(waited) == pytest.approx(0.2, abs=0.05)
+
+
+def test_penalize_pauses_everything():
+    limiter = InMemoryRateLimiter(global_rate=30, per_chat_rate=1)
+
+    limiter.penalize(3)
+
+    assert limiter.try_acquire("1") == pytest.approx(3, abs=0.01)
+
+
+def test_redis_limiter_shares_budget_between_workers():
+    server = fakeredis.FakeServer()
+    worker_1 = RedisRateLimiter(fakeredis.FakeRedis(server=server), global_rate=10, per_chat_rate=1)
+    worker_2 = RedisRateLimiter(fakeredis.FakeRedis(server=server), global_rate=10, per_chat_rate=1)
+
+    assert worker_1.try_acquire("1") == 0
+    # Второй воркер видит слот, занятый первым
+    assert worker_2.try_acquire("2") == pytest.approx(0.1, abs=0.02)
+    time.sleep(0.11)
+    assert worker_2.try_acquire("2") == 0
+    assert worker_2.try_acquire("1") == pytest.approx(0.9, abs=0.05)
+
+    worker_1.penalize(5)
+    assert worker_2.try_acquire("3") == pytest.approx(5, abs=0.02)
+
+
+def test_client_honors_retry_after(monkeypatch):
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test-token")
+    limiter = InMemoryRateLimiter(global_rate=1000, per_chat_rate=1000)
+
+    with StubTelegramServer(throttle_first=1, retry_after=0.3) as stub:
+        client = TelegramClient(api_url=stub.url, rate_limiter=limiter)
+
+        started = time.monotonic()
+        result = client.send_many([("1", "hello")])[0]
+        elapsed = time.monotonic() - started
+
+    assert result.ok
+    assert stub.messages == [("1", "hello")]
+    # Повтор ушёл только после retry_after, и это ожидание видно в результате
+    assert elapsed >= 0.3
+    assert result.waited == pytest.approx(0.3, abs=0.05)
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from notifications.services import TelegramClient, TelegramError
+from notifications.testing import StubTelegramServer
+
+# Лимитер по умолчанию (TELEGRAM_RATE_LIMIT_BACKEND=redis) - в fakeredis
+pytestmark = pytest.mark.usefixtures("fake_redis")
+
+
+@pytest.fixture(autouse=True)
+def bot_token(monkeypatch):
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "test-token")
+
+
+@pytest.fixture
+def stub():
+    with StubTelegramServer(fail_chat_ids=["404"]) as server:
+        yield server
+
+
+def test_send_many_returns_result_per_message(stub):
+    client = TelegramClient(api_url=stub.url, pool_size=4, concurrency=4)
+
+    results = client.send_many([("1", "a"), ("404", "b"), ("2", "c")])
+
+    assert [r.chat_id for r in results] == ["1", "404", "2"]
+    assert [r.ok for r in results] == [True, False, True]
+    assert "400" in results[1].error
+    assert sorted(stub.messages) == [("1", "a"), ("2", "c"), ("404", "b")]
+
+
+def test_client_reuses_keep_alive_connection(stub):
+    client = TelegramClient(api_url=stub.url, pool_size=2, concurrency=2)
+
+    for i in range(10):
+        client.send(str(i), "ping")
+
+    # Последовательные отправки идут через одно и то же соединение из пула
+    assert len(stub.messages) == 10
+    assert len(stub.connections) == 1
+
+
+def test_send_many_sends_concurrently():
+    with StubTelegramServer(latency=0.2) as slow_stub:
+        client = TelegramClient(api_url=slow_stub.url, pool_size=10, concurrency=10)
+
+        started = time.monotonic()
+        results = client.send_many([(str(i), "ping") for i in range(10)])
+        elapsed = time.monotonic() - started
+
+    assert all(r.ok for r in results)
+    # Последовательно это заняло бы ~2 секунды
+    assert elapsed < 1.0
+
+
+def test_send_without_token_fails(stub, monkeypatch):
+    monkeypatch.delenv("TELEGRAM_BOT_TOKEN")
+    client = TelegramClient(api_url=stub.url)
+
+    with pytest.raises(TelegramError):
+        client.send("1", "text")
+
+    assert client.send_many([("1", "text")])[0].ok is False
@@ -0,0 +1,196 @@
+import pickle
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+User = get_user_model()
+
+
+class BaseUserCache(ABC):
+    """
+    Кэш строк пользователей для аутентификации: user_id -> значения полей User.
+
+    Хранятся значения, а не сам объект: каждый запрос получает свой экземпляр User
+    (from_db), и изменения request.user в одном запросе не видны другим.
+    Ключ - строка: в токене user_id строкой, в сигналах - числом.
+    """
+
+    @abstractmethod
+    def get(self, user_id) -> tuple | None:
+        ...
+
+    @abstractmethod
+    def set(self, user_id, values: tuple) -> None:
+        ...
+
+    @abstractmethod
+    def invalidate(self, user_id) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class InMemoryUserCache(BaseUserCache):
+    """
+    LRU с TTL в памяти процесса (по умолчанию).
+
+    Сброс при изменении пользователя виден только этому процессу: другие воркеры
+    увидят новый пароль или is_active не позже чем через ttl секунд.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, values = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return values
+
+    def set(self, user_id, values):
+        key = str(user_id)
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, values)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._items.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class RedisUserCache(BaseUserCache):
+    """
+    Тот же кэш в Redis: общий для всех воркеров, поэтому сброс виден сразу всем.
+
+    Размер ограничивает TTL ключей (и maxmemory самого Redis), а не LRU в процессе.
+    """
+
+    key_prefix = "users:auth"
+
+    def __init__(self, client, ttl: float):
+        self.client = client
+        self.ttl = max(1, int(ttl))
+
+    def key(self, user_id) -> str:
+        return f"{self.key_prefix}:{user_id}"
+
+    def get(self, user_id):
+        raw = self.client.get(self.key(user_id))
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, user_id, values):
+        self.client.set(self.key(user_id), pickle.dumps(values), ex=self.ttl)
+
+    def invalidate(self, user_id):
+        self.client.delete(self.key(user_id))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f"{self.key_prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+_user_cache = None
+_lock = threading.Lock()
+
+
+def get_user_cache() -> BaseUserCache:
+    """
+    Общий на процесс кэш пользователей по настройкам USERS_AUTH_CACHE_*.
+    """
+    global _user_cache
+    if _user_cache is None:
+        with _lock:
+            if _user_cache is None:
+                if settings.USERS_AUTH_CACHE_BACKEND == "redis":
+                    from config.redis_client import get_redis
+
+                    _user_cache = RedisUserCache(get_redis(), settings.USERS_AUTH_CACHE_TTL)
+                else:
+                    _user_cache = InMemoryUserCache(
+                        settings.USERS_AUTH_CACHE_TTL, settings.USERS_AUTH_CACHE_SIZE
+                    )
+    return _user_cache
+
+
+def reset_user_cache() -> None:
+    """
+    Забывает кэш процесса: следующий get_user_cache() создаст его заново по настройкам.
+    """
+    global _user_cache
+    with _lock:
+        _user_cache = None
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication, который не читает User из БД на каждый запрос.
+
+    Токен проверяется как обычно (подпись, срок жизни access-токена), а строка
+    пользователя берётся из кэша (get_user_cache) на USERS_AUTH_CACHE_TTL секунд.
+    При попадании в кэш аутентификация не делает ни одного запроса к БД.
+
+    Пользователь пропадает из кэша при любом save()/delete() (см. users.signals),
+    в том числе при смене пароля и is_active. Проверки is_active и
+    CHECK_REVOKE_TOKEN выполняются и для пользователя из кэша.
+    """
+
+    field_names = tuple(field.attname for field in User._meta.concrete_fields)
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or api_settings.USER_ID_FIELD != User._meta.pk.name:
+            return super().get_user(validated_token)
+
+        cache = get_user_cache()
+        values = cache.get(user_id)
+        if values is None:
+            user = super().get_user(validated_token)
+            cache.set(user_id, tuple(getattr(user, name) for name in self.field_names))
+            return user
+
+        user = User.from_db(DEFAULT_DB_ALIAS, self.field_names, values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """
+    Та же схема Bearer JWT в OpenAPI (drf-spectacular сам находит только JWTAuthentication).
+    """
+
+    target_class = "users.authentication.CachedJWTAuthentication"
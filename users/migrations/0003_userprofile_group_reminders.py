@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_userprofile_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='group_reminders',
+            field=models.BooleanField(default=False, help_text='Если True - привычки одной минуты приходят одним сообщением.', verbose_name='Группировать напоминания'),
+        ),
+    ]
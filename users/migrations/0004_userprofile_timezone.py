@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_userprofile_group_reminders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='timezone',
+            field=models.CharField(
+                default='Europe/Moscow',
+                help_text='IANA-имя (например Europe/Berlin): в этом поясе приходят напоминания о привычках.',
+                max_length=64,
+                verbose_name='Часовой пояс',
+            ),
+        ),
+    ]
@@ -26,9 +26,33 @@ class UserProfile(models.Model):
         help_text="Идентификатор чата пользователя в Telegram для отправки напоминаний.",
     )
 
+    group_reminders = models.BooleanField(
+        default=False,
+        verbose_name="Группировать напоминания",
+        help_text="Если True - привычки одной минуты приходят одним сообщением.",
+    )
+
+    timezone = models.CharField(
+        max_length=64,
+        default=settings.TIME_ZONE,
+        verbose_name="Часовой пояс",
+        help_text="IANA-имя (например Europe/Berlin): в этом поясе приходят напоминания о привычках.",
+    )
+
     def __str__(self) -> str:
         return f"Profile({self.user})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Пояс из БД: по нему сигналы habits понимают, что пояс сменился и расписание надо пересчитать
+        instance._saved_timezone = instance.__dict__.get("timezone")
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._saved_timezone = self.timezone
+
 
 # ВАЖНО:
 # Импорт сигналов должен быть в самом конце файла,
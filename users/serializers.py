@@ -1,3 +1,5 @@
+import zoneinfo
+
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
@@ -26,3 +28,29 @@ class TelegramChatIdSerializer(serializers.Serializer):
     Сериализатор для сохранения telegram_chat_id в профиле пользователя.
     """
     telegram_chat_id = serializers.CharField(max_length=64)
+
+
+class ReminderSettingsSerializer(serializers.Serializer):
+    """
+    Сериализатор настроек напоминаний в профиле пользователя.
+
+    Можно передать любое подмножество полей.
+    """
+    group_reminders = serializers.BooleanField(required=False)
+    timezone = serializers.CharField(max_length=64, required=False)
+
+    def validate_timezone(self, value):
+        try:
+            zoneinfo.ZoneInfo(value)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError(
+                "Неизвестный часовой пояс. Нужно IANA-имя, например Europe/Berlin."
+            )
+        return value
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError(
+                "Передайте хотя бы одну настройку: group_reminders или timezone."
+            )
+        return attrs
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from .models import UserProfile
@@ -14,3 +15,20 @@ def create_profile(sender, instance, created, **kwargs):  # noqa: F841
     """
     if created:
         UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Сбрасывает пользователя в кэше аутентификации (users.authentication).
+
+    Сразу - чтобы этот процесс не отдал старые is_active / пароль, и после коммита -
+    чтобы параллельный запрос не успел положить в кэш строку до коммита.
+    """
+    from .authentication import get_user_cache
+
+    cache, user_id = get_user_cache(), instance.pk
+    cache.invalidate(user_id)
+    # После delete() у instance уже pk=None, поэтому id запоминаем заранее
+    transaction.on_commit(lambda: cache.invalidate(user_id))
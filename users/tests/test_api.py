@@ -40,3 +40,34 @@ def test_set_telegram_chat_id_success():
 
     # Профиль должен создаться автоматически через get_or_create в view
     assert user.profile.telegram_chat_id == "213259069"
+
+
+@pytest.mark.django_db
+def test_set_group_reminders():
+    client = APIClient()
+
+    user = User.objects.create_user(username="group_user", password="pass12345")
+    client.force_authenticate(user=user)
+
+    resp = client.patch("/api/users/reminders/", {"group_reminders": True}, format="json")
+
+    assert resp.status_code == 200
+    user.refresh_from_db()
+    assert user.profile.group_reminders is True
+
+
+@pytest.mark.django_db
+def test_set_timezone():
+    client = APIClient()
+
+    user = User.objects.create_user(username="tz_user", password="pass12345")
+    client.force_authenticate(user=user)
+
+    resp = client.patch("/api/users/reminders/", {"timezone": "Mars/Olympus"}, format="json")
+    assert resp.status_code == 400
+
+    resp = client.patch("/api/users/reminders/", {"timezone": "Asia/Tokyo"}, format="json")
+    assert resp.status_code == 200
+    user.refresh_from_db()
+    assert user.profile.timezone == "Asia/Tokyo"
+    assert user.profile.group_reminders is False
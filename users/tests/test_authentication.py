@@ -0,0 +1,136 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users import authentication
+from users.authentication import CachedJWTAuthentication, InMemoryUserCache, reset_user_cache
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def fresh_user_cache():
+    reset_user_cache()
+    yield
+    reset_user_cache()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="auth_user", password="pass12345")
+
+
+@pytest.fixture
+def authenticate(user):
+    header = f"Bearer {AccessToken.for_user(user)}"
+
+    def run():
+        request = APIRequestFactory().get("/api/habits/", HTTP_AUTHORIZATION=header)
+        authenticated, _token = CachedJWTAuthentication().authenticate(request)
+        return authenticated
+
+    return run
+
+
+@pytest.mark.django_db
+def test_cache_hit_costs_no_queries(authenticate, user, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert authenticate() == user
+
+    with django_assert_num_queries(0):
+        cached = authenticate()
+
+    assert cached == user
+    assert cached.username == "auth_user"
+    # Каждый запрос получает свой экземпляр: изменения request.user не протекают в кэш
+    assert cached is not authenticate()
+
+
+@pytest.mark.django_db
+def test_password_change_invalidates_cache(authenticate, user, django_assert_num_queries):
+    authenticate()
+
+    user.set_password("new-pass-678")
+    user.save()
+
+    with django_assert_num_queries(1):
+        assert authenticate().check_password("new-pass-678")
+
+
+@pytest.mark.django_db
+def test_deactivated_user_is_rejected(authenticate, user):
+    authenticate()
+
+    user.is_active = False
+    user.save(update_fields=["is_active"])
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate()
+
+
+@pytest.mark.django_db
+def test_deleted_user_is_rejected(authenticate, user, django_capture_on_commit_callbacks):
+    authenticate()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.delete()
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate()
+
+
+@pytest.mark.django_db
+def test_api_request_skips_user_query_on_cache_hit(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+    with CaptureQueriesContext(connection) as first:
+        client.get("/api/habits/")
+    with CaptureQueriesContext(connection) as second:
+        resp = client.get("/api/habits/")
+
+    assert resp.status_code == 200
+    assert len(second.captured_queries) == len(first.captured_queries) - 1
+    assert not any('FROM "auth_user"' in query["sql"] for query in second.captured_queries)
+
+
+def test_in_memory_cache_is_lru_with_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(authentication.time, "monotonic", lambda: now[0])
+    cache = InMemoryUserCache(ttl=60, max_size=2)
+
+    cache.set(1, ("a",))
+    cache.set(2, ("b",))
+    assert cache.get(1) == ("a",)
+    # 1 только что читали, поэтому вытесняется 2
+    cache.set(3, ("c",))
+    assert cache.get(2) is None
+    assert cache.get(1) == ("a",)
+
+    now[0] += 61
+    assert cache.get(1) is None
+    assert cache.get(3) is None
+
+
+@pytest.mark.django_db
+def test_redis_backend_is_shared_and_invalidated(
+    settings, fake_redis, authenticate, user, django_assert_num_queries
+):
+    settings.USERS_AUTH_CACHE_BACKEND = "redis"
+    reset_user_cache()
+
+    authenticate()
+    # Новый кэш процесса (другой воркер) видит ту же запись
+    reset_user_cache()
+    with django_assert_num_queries(0):
+        assert authenticate() == user
+
+    user.is_active = False
+    user.save()
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate()
@@ -1,8 +1,9 @@
 from django.urls import path
 
-from .views import RegisterAPIView, SetTelegramChatIdAPIView
+from .views import RegisterAPIView, ReminderSettingsAPIView, SetTelegramChatIdAPIView
 
 urlpatterns = [
     path("register/", RegisterAPIView.as_view(), name="register"),
     path("telegram/", SetTelegramChatIdAPIView.as_view(), name="set-telegram-chat-id"),
+    path("reminders/", ReminderSettingsAPIView.as_view(), name="reminder-settings"),
 ]
@@ -4,7 +4,7 @@ from rest_framework.response import Response
 from rest_framework.generics import GenericAPIView
 
 from .models import UserProfile
-from .serializers import RegisterSerializer, TelegramChatIdSerializer
+from .serializers import RegisterSerializer, ReminderSettingsSerializer, TelegramChatIdSerializer
 
 
 class RegisterAPIView(generics.CreateAPIView):
@@ -22,6 +22,7 @@ class RegisterAPIView(generics.CreateAPIView):
 
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
+    query_budgets = {"post": 4}
 
 
 class SetTelegramChatIdAPIView(GenericAPIView):
@@ -30,6 +31,7 @@ class SetTelegramChatIdAPIView(GenericAPIView):
     """
     serializer_class = TelegramChatIdSerializer
     permission_classes = [IsAuthenticated]
+    query_budgets = {"patch": 3}
 
     def patch(self, request, *_args, **_kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -40,3 +42,26 @@ class SetTelegramChatIdAPIView(GenericAPIView):
         profile.save(update_fields=["telegram_chat_id"])
 
         return Response({"status": "ok"}, status=status.HTTP_200_OK)
+
+
+class ReminderSettingsAPIView(GenericAPIView):
+    """
+    Настройки напоминаний в профиле пользователя.
+
+    group_reminders=True - все привычки одной минуты приходят одним сообщением.
+    timezone - часовой пояс, в котором считается время привычек (смена пересчитывает расписание).
+    """
+    serializer_class = ReminderSettingsSerializer
+    permission_classes = [IsAuthenticated]
+    query_budgets = {"patch": 5}
+
+    def patch(self, request, *_args, **_kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        profile, _created = UserProfile.objects.get_or_create(user=request.user)
+        for field, value in serializer.validated_data.items():
+            setattr(profile, field, value)
+        profile.save(update_fields=list(serializer.validated_data))
+
+        return Response({"status": "ok"}, status=status.HTTP_200_OK)